@@ -0,0 +1,355 @@
+"""
+Secondary indexes over an apartment inventory.
+
+This module defines the ApartmentIndex class that answers price-range,
+floor-range, type, view and pool queries, and the only_valid_apts and
+how_many_rooftop style queries built on them, without scanning the whole
+inventory. It keeps every apartment sorted by price and by floor, posting
+sets by type, view and pool, and two narrower sorted lists (apartments
+with a view by price, roof apartments with pools by floor) so the mmn15
+counts take logarithmic time. Insert and delete update every index
+incrementally. Listings take time proportional to their smallest
+condition.
+
+Prices are computed when apartments are inserted, under the current
+pricing constants. After pricing.configure the index reprices every
+apartment once, on the next query that depends on prices.
+"""
+
+__author__ = "Bar-chaim Billy"
+
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+
+import mmn15
+import pricing
+from apt import type_counts_by_name
+from filters import HAS_VIEW, HAS_POOL, TYPE
+
+
+def _range(pairs, low, high):
+    """
+    Returns:
+        tuple: (start, stop) positions in sorted (value, id) pairs of the
+               values between low and high, both inclusive; None for no
+               bound
+    """
+    start = 0 if low is None else bisect_left(pairs, (low, -1))
+    stop = len(pairs) if high is None else bisect_right(pairs, (high, float('inf')))
+    return start, max(start, stop)
+
+
+
+class ApartmentIndex:
+    """
+    Indexes an apartment inventory by price, floor, type, view and pool.
+
+    Every apartment gets an integer id when inserted; ids grow with
+    insertion order, so query results listed by id keep the order the
+    apartments were inserted in, like the list order of mmn15.
+
+    Attributes:
+        _apts (dict): Apartment of each id
+        _prices (dict): Price of each id, computed on insert
+        _epoch (int): The pricing epoch _prices were computed under
+        _by_price (list): Sorted (price, id) pairs of every apartment
+        _by_floor (list): Sorted (floor, id) pairs of every apartment
+        _view_by_price (list): Sorted (price, id) pairs of the apartments
+                               with a view
+        _rooftop_by_floor (list): Sorted (floor, id) pairs of the roof
+                                  apartments with pools
+        _by_type (dict): Set of ids of each apartment type code
+        _with_view (set): Ids of the apartments with a view
+        _with_pool (set): Ids of the roof apartments with pools
+        _next_id (int): Id of the next inserted apartment
+    """
+
+    def __init__(self, apts=()):
+        """
+        Initialize a new ApartmentIndex.
+
+        Args:
+            apts (iterable): Apartments to index right away; the sorted
+                             indexes are built once for all of them
+        """
+        self._apts = {}
+        self._prices = {}
+        self._epoch = pricing.epoch
+        self._by_price = []
+        self._by_floor = []
+        self._view_by_price = []
+        self._rooftop_by_floor = []
+        self._by_type = defaultdict(set)
+        self._with_view = set()
+        self._with_pool = set()
+        self._next_id = 0
+
+        for apt in apts:
+            apt_id = self._add_postings(apt)
+            price = self._prices[apt_id]
+            floor = apt.get_floor()
+            self._by_price.append((price, apt_id))
+            self._by_floor.append((floor, apt_id))
+            if apt_id in self._with_view:
+                self._view_by_price.append((price, apt_id))
+            if apt_id in self._with_pool:
+                self._rooftop_by_floor.append((floor, apt_id))
+        self._by_price.sort()
+        self._by_floor.sort()
+        self._view_by_price.sort()
+        self._rooftop_by_floor.sort()
+
+
+    def _add_postings(self, apt):
+        """
+        Register an apartment everywhere except in the sorted indexes.
+
+        Returns:
+            int: The id of the apartment
+        """
+        apt_id = self._next_id
+        self._next_id += 1
+
+        self._apts[apt_id] = apt
+        self._prices[apt_id] = apt.get_price()
+        self._by_type[apt.TYPE_CODE].add(apt_id)
+        if HAS_VIEW.matches(apt):
+            self._with_view.add(apt_id)
+        if HAS_POOL.matches(apt):
+            self._with_pool.add(apt_id)
+
+        return apt_id
+
+
+    def insert(self, apt):
+        """
+        Add an apartment to the index.
+
+        Args:
+            apt (Apt): The apartment to add
+
+        Returns:
+            int: The id of the apartment, used to delete it
+        """
+        apt_id = self._add_postings(apt)
+        price = self._prices[apt_id]
+        floor = apt.get_floor()
+        insort(self._by_price, (price, apt_id))
+        insort(self._by_floor, (floor, apt_id))
+        if apt_id in self._with_view:
+            insort(self._view_by_price, (price, apt_id))
+        if apt_id in self._with_pool:
+            insort(self._rooftop_by_floor, (floor, apt_id))
+        return apt_id
+
+
+    def delete(self, apt_id):
+        """
+        Remove an apartment from the index.
+
+        Args:
+            apt_id (int): The id returned by insert
+
+        Raises:
+            KeyError: If no apartment has this id
+        """
+        apt = self._apts.pop(apt_id)
+        price = self._prices.pop(apt_id)
+        floor = apt.get_floor()
+        self._by_type[apt.TYPE_CODE].discard(apt_id)
+
+        del self._by_price[bisect_left(self._by_price, (price, apt_id))]
+        del self._by_floor[bisect_left(self._by_floor, (floor, apt_id))]
+        if apt_id in self._with_view:
+            self._with_view.discard(apt_id)
+            del self._view_by_price[bisect_left(self._view_by_price, (price, apt_id))]
+        if apt_id in self._with_pool:
+            self._with_pool.discard(apt_id)
+            del self._rooftop_by_floor[bisect_left(self._rooftop_by_floor, (floor, apt_id))]
+
+
+    def __len__(self):
+        """
+        Returns:
+            int: The number of indexed apartments
+        """
+        return len(self._apts)
+
+
+    def get(self, apt_id):
+        """
+        Returns:
+            Apt: The apartment with the given id
+        """
+        return self._apts[apt_id]
+
+
+    def _reprice(self):
+        """
+        Reprice every apartment if the pricing constants changed since
+        they were priced.
+        """
+        if self._epoch == pricing.epoch:
+            return
+        apts = self._apts
+        self._prices = {apt_id: apt.get_price() for apt_id, apt in apts.items()}
+        self._by_price = sorted((price, apt_id) for apt_id, price in self._prices.items())
+        self._view_by_price = [pair for pair in self._by_price if pair[1] in self._with_view]
+        self._epoch = pricing.epoch
+
+
+    def _first_priced_over(self, threshold):
+        """
+        Returns:
+            int: Position in _view_by_price of the first apartment priced
+                 over threshold (default: mmn15.MILLION)
+        """
+        if threshold is None:
+            threshold = mmn15.MILLION
+        self._reprice()
+        return bisect_right(self._view_by_price, (threshold, float('inf')))
+
+
+    def only_valid_apts(self, threshold=None):
+        """
+        Find apartments with a view and a price over a threshold.
+
+        Args:
+            threshold (int): Minimum price, exclusive (default: mmn15.MILLION)
+
+        Returns:
+            list or None: The qualifying apartments in insertion order,
+                          or None if there are none
+        """
+        start = self._first_priced_over(threshold)
+        if start == len(self._view_by_price):
+            return None
+
+        valid_ids = sorted(apt_id for _, apt_id in self._view_by_price[start:])
+        return [self._apts[apt_id] for apt_id in valid_ids]
+
+
+    def count_valid_apts(self, threshold=None):
+        """
+        Count apartments with a view and a price over a threshold.
+
+        Args:
+            threshold (int): Minimum price, exclusive (default: mmn15.MILLION)
+
+        Returns:
+            int: Number of qualifying apartments
+        """
+        return len(self._view_by_price) - self._first_priced_over(threshold)
+
+
+    def how_many_rooftop(self, min_floor=None):
+        """
+        Count roof apartments with pools.
+
+        Args:
+            min_floor (int): Only count apartments on this floor or above
+
+        Returns:
+            int: Number of roof apartments with pools
+        """
+        start, stop = _range(self._rooftop_by_floor, min_floor, None)
+        return stop - start
+
+
+    def how_many_apt_type(self):
+        """
+        Returns:
+            dict: Apartment type names as keys and counts as values
+        """
+        return type_counts_by_name({code: len(ids) for code, ids in self._by_type.items()})
+
+
+    def _select_ids(self, min_price, max_price, min_floor, max_floor, types, has_view, has_pool):
+        """
+        Returns:
+            iterable: Ids of the apartments meeting every condition of
+                      select, in no particular order
+        """
+        # every condition as (size, ids meeting it, membership test)
+        conditions = []
+
+        if min_price is not None or max_price is not None:
+            self._reprice()
+            start, stop = _range(self._by_price, min_price, max_price)
+            prices = self._prices
+            conditions.append((stop - start, (apt_id for _, apt_id in self._by_price[start:stop]),
+                               lambda apt_id: (min_price is None or prices[apt_id] >= min_price)
+                               and (max_price is None or prices[apt_id] <= max_price)))
+
+        if min_floor is not None or max_floor is not None:
+            start, stop = _range(self._by_floor, min_floor, max_floor)
+            apts = self._apts
+            conditions.append((stop - start, (apt_id for _, apt_id in self._by_floor[start:stop]),
+                               lambda apt_id: (min_floor is None
+                                               or apts[apt_id].get_floor() >= min_floor)
+                               and (max_floor is None or apts[apt_id].get_floor() <= max_floor)))
+
+        if types is not None:
+            type_ids = set()
+            for apt_type in types:
+                type_ids |= self._by_type.get(TYPE.code(apt_type), set())
+            conditions.append((len(type_ids), type_ids, type_ids.__contains__))
+
+        for wanted, ids in ((has_view, self._with_view), (has_pool, self._with_pool)):
+            if wanted is True:
+                conditions.append((len(ids), ids, ids.__contains__))
+            elif wanted is False:
+                conditions.append((len(self._apts) - len(ids),
+                                   (apt_id for apt_id in self._apts if apt_id not in ids),
+                                   lambda apt_id, ids=ids: apt_id not in ids))
+
+        if not conditions:
+            return self._apts.keys()
+
+        # walk the smallest condition and test the others on its ids
+        conditions.sort(key=lambda condition: condition[0])
+        _, ids, _ = conditions[0]
+        tests = [test for _, _, test in conditions[1:]]
+        return (apt_id for apt_id in ids if all(test(apt_id) for test in tests))
+
+
+    def select(self, min_price=None, max_price=None, min_floor=None, max_floor=None,
+               types=None, has_view=None, has_pool=None):
+        """
+        Find apartments by price range, floor range, type, view and pool.
+
+        Every condition left as None is not checked. The ids are taken
+        from the most selective condition and checked against the others.
+
+        Args:
+            min_price (int): Lowest price, inclusive
+            max_price (int): Highest price, inclusive
+            min_floor (int): Lowest floor, inclusive
+            max_floor (int): Highest floor, inclusive
+            types (iterable): Allowed apartment classes, type names or codes
+            has_view (bool): Whether the apartments have a view
+            has_pool (bool): Whether the apartments are roof apartments
+                             with pools
+
+        Returns:
+            list: The matching apartments in insertion order
+        """
+        ids = self._select_ids(min_price, max_price, min_floor, max_floor,
+                               types, has_view, has_pool)
+        return [self._apts[apt_id] for apt_id in sorted(ids)]
+
+
+    def count(self, min_price=None, max_price=None, min_floor=None, max_floor=None,
+              types=None, has_view=None, has_pool=None):
+        """
+        Count apartments by price range, floor range, type, view and pool.
+
+        Args:
+            See select
+
+        Returns:
+            int: The number of apartments select would return
+        """
+        ids = self._select_ids(min_price, max_price, min_floor, max_floor,
+                               types, has_view, has_pool)
+        return sum(1 for _ in ids)
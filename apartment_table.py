@@ -0,0 +1,326 @@
+"""
+Columnar apartment storage for the apartment management system.
+
+This module defines the ApartmentTable class that keeps a whole inventory of
+apartments as parallel NumPy columns instead of a list of objects, and
+provides table-aware versions of the mmn15 utility functions that compute
+prices and filters as whole-array operations.
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import numpy as np
+
+from apt import Apt, type_counts_by_name
+from special_apt import SpecialApt
+from garden_apt import GardenApt
+from roof_apt import RoofApt
+from pricing import price_batch
+from mmn15 import valid_apt_predicate
+from group_by import group_by_table
+
+# type codes stored in the type column (see Apt.TYPE_CODE)
+APT_CODE = Apt.TYPE_CODE
+SPECIAL_APT_CODE = SpecialApt.TYPE_CODE
+GARDEN_APT_CODE = GardenApt.TYPE_CODE
+ROOF_APT_CODE = RoofApt.TYPE_CODE
+
+TABLE_CODES = (APT_CODE, SPECIAL_APT_CODE, GARDEN_APT_CODE, ROOF_APT_CODE)
+
+
+def _column(values, dtype):
+    """
+    Convert column values to an array, keeping compatible arrays as they are.
+
+    Args:
+        values (array-like): The column values
+        dtype (type): The dtype to convert to when values is not compatible
+
+    Returns:
+        ndarray: The column
+    """
+    if isinstance(values, np.ndarray):
+        if np.dtype(dtype).kind == 'b':
+            if values.dtype.kind == 'b':
+                return values
+        elif values.dtype.kind in 'iu':
+            return values
+    return np.asarray(values, dtype=dtype)
+
+
+class ApartmentTable:
+    """
+    Represents an inventory of apartments stored column by column.
+
+    Every apartment is a row; the columns hold the attributes of all four
+    apartment types. Attributes that a type does not have are stored with
+    the value the type implies (no view for Apt, no pool for non-roof
+    apartments, zero garden area for non-garden apartments).
+
+    Attributes:
+        _type_code (ndarray): Type code of each apartment (see TABLE_CODES)
+        _floor (ndarray): Floor number of each apartment
+        _area (ndarray): Area of each apartment in square meters
+        _has_view (ndarray): Whether each apartment has a view
+        _has_pool (ndarray): Whether each apartment has a pool
+        _garden_area (ndarray): Garden area of each apartment in square meters
+    """
+
+    def __init__(self, type_code, floor, area, has_view, has_pool, garden_area):
+        """
+        Initialize a new ApartmentTable from equally sized columns.
+
+        Columns that are already NumPy arrays of a matching kind (any integer
+        dtype for integer columns, bool for flag columns) are used without
+        copying, so a table can be a view over memory-mapped or shared data.
+
+        Args:
+            type_code (array-like): Type code of each apartment
+            floor (array-like): Floor number of each apartment
+            area (array-like): Area of each apartment in square meters
+            has_view (array-like): Whether each apartment has a view
+            has_pool (array-like): Whether each apartment has a pool
+            garden_area (array-like): Garden area of each apartment
+
+        Raises:
+            ValueError: If the columns do not all have the same length
+        """
+        self._type_code = _column(type_code, np.int8)
+        self._floor = _column(floor, np.int64)
+        self._area = _column(area, np.int64)
+        self._has_view = _column(has_view, np.bool_)
+        self._has_pool = _column(has_pool, np.bool_)
+        self._garden_area = _column(garden_area, np.int64)
+
+        size = len(self._type_code)
+        for column in (self._floor, self._area, self._has_view,
+                       self._has_pool, self._garden_area):
+            if len(column) != size:
+                raise ValueError("all columns must have the same length")
+
+
+    @classmethod
+    def from_apts(cls, apts):
+        """
+        Build a table from apartment objects.
+
+        Apartments of unregistered subclasses are stored as their nearest
+        registered ancestor.
+
+        Args:
+            apts (iterable): Apt, SpecialApt, GardenApt or RoofApt objects
+
+        Returns:
+            ApartmentTable: A table with one row per apartment, in order
+
+        Raises:
+            ValueError: If an apartment has a type code the table cannot store
+        """
+        type_code = []
+        floor = []
+        area = []
+        has_view = []
+        has_pool = []
+        garden_area = []
+
+        for apt in apts:
+            code = apt.TYPE_CODE
+            if code not in TABLE_CODES:
+                raise ValueError(f"cannot store apartments of type code {code}")
+
+            type_code.append(code)
+            floor.append(apt._floor)
+            area.append(apt._area)
+            has_view.append(apt.SUPPORTS_VIEW and apt._has_view)
+            has_pool.append(apt.SUPPORTS_POOL and apt._has_pool)
+            garden_area.append(apt._garden_area if code == GARDEN_APT_CODE else 0)
+
+        return cls(type_code, floor, area, has_view, has_pool, garden_area)
+
+
+    def __len__(self):
+        """
+        Returns:
+            int: The number of apartments in the table
+        """
+        return len(self._type_code)
+
+
+    def get_type_code(self):
+        """
+        Returns:
+            ndarray: The type code column
+        """
+        return self._type_code
+
+    def get_floor(self):
+        """
+        Returns:
+            ndarray: The floor column
+        """
+        return self._floor
+
+    def get_area(self):
+        """
+        Returns:
+            ndarray: The area column
+        """
+        return self._area
+
+    def get_has_view(self):
+        """
+        Returns:
+            ndarray: The has_view column
+        """
+        return self._has_view
+
+    def get_has_pool(self):
+        """
+        Returns:
+            ndarray: The has_pool column
+        """
+        return self._has_pool
+
+    def get_garden_area(self):
+        """
+        Returns:
+            ndarray: The garden area column
+        """
+        return self._garden_area
+
+
+    def get_prices(self, rows=None):
+        """
+        Calculate the price of every apartment in one vectorized pass.
+
+        Uses the same rules as the get_price methods of the apartment classes
+        (see pricing.price_batch).
+
+        Args:
+            rows (array-like): Only price these rows (default: all rows)
+
+        Returns:
+            ndarray: The price of each apartment, or of each of rows (int64)
+        """
+        if rows is None:
+            return price_batch(self._floor, self._area, self._has_view,
+                               self._type_code == ROOF_APT_CODE, self._has_pool)
+
+        return price_batch(self._floor[rows], self._area[rows], self._has_view[rows],
+                           self._type_code[rows] == ROOF_APT_CODE, self._has_pool[rows])
+
+
+    def apt_at(self, index):
+        """
+        Build the apartment object stored in a row.
+
+        Args:
+            index (int): The row number
+
+        Returns:
+            Apt: An Apt, SpecialApt, GardenApt or RoofApt equal to the row
+
+        Raises:
+            ValueError: If the row holds an unknown type code
+        """
+        code = self._type_code[index]
+        floor = int(self._floor[index])
+        area = int(self._area[index])
+
+        if code == APT_CODE:
+            return Apt(floor, area)
+        if code == SPECIAL_APT_CODE:
+            return SpecialApt(floor, area, bool(self._has_view[index]))
+        if code == GARDEN_APT_CODE:
+            return GardenApt(area, int(self._garden_area[index]))
+        if code == ROOF_APT_CODE:
+            return RoofApt(floor, area, bool(self._has_pool[index]))
+        raise ValueError(f"unknown apartment type code {code} in row {index}")
+
+
+
+# table-aware versions of the mmn15 functions
+
+def average_price(table):
+    """
+    Calculate the average price of the apartments in the table.
+
+    Args:
+        table (ApartmentTable): The apartments
+
+    Returns:
+        float: The average price of all apartments, or 0 if the table is empty
+    """
+    if not len(table):
+        return 0
+
+    return int(table.get_prices().sum()) / len(table)
+
+
+def how_many_rooftop(table):
+    """
+    Count the number of roof apartments with pools in the table.
+
+    Args:
+        table (ApartmentTable): The apartments
+
+    Returns:
+        int: Number of roof apartments that have pools
+    """
+    is_roof = table.get_type_code() == ROOF_APT_CODE
+    return int(np.count_nonzero(is_roof & table.get_has_pool()))
+
+
+def how_many_apt_type(table):
+    """
+    Count apartments by type.
+
+    Args:
+        table (ApartmentTable): The apartments
+
+    Returns:
+        dict: Apartment type names as keys and counts as values.
+              Keys are: 'Apt', 'SpecialApt', 'GardenApt', 'RoofApt'
+    """
+    type_counts = type_counts_by_name({})
+    for (type_name,), results in group_by_table(table, keys=('type',), aggs=('count',)).items():
+        type_counts[type_name] = results['count']
+    return type_counts
+
+
+def top_price(table):
+    """
+    Find the apartment with the highest price in the table.
+
+    Args:
+        table (ApartmentTable): The apartments
+
+    Returns:
+        Apt or None: The apartment with the highest price, or None if the
+                     table is empty. If several apartments share the highest
+                     price, returns the first one.
+    """
+    if not len(table):
+        return None
+
+    # argmax returns the first occurrence of the maximum
+    return table.apt_at(int(np.argmax(table.get_prices())))
+
+
+def only_valid_apts(table):
+    """
+    Filter apartments with a view and a price over 1 million.
+
+    Args:
+        table (ApartmentTable): The apartments
+
+    Returns:
+        list or None: List of qualifying apartments in table order, or None
+                      if no apartment meets the criteria.
+    """
+    # prices are only computed for the rows with a view
+    indexes = valid_apt_predicate().select(table)
+    if not len(indexes):
+        return None
+
+    return [table.apt_at(index) for index in indexes]
@@ -0,0 +1,415 @@
+"""
+Approximate apartment statistics for interactive dashboards.
+
+This module defines the ApproximateReport class that keeps a fixed-size
+random sample of every apartment type as apartments are added, and answers
+the mmn15 statistics and price percentiles from the samples, with
+confidence intervals, in time that does not depend on the number of
+apartments.
+
+Apartments are sampled per type (stratified sampling) with bottom-k
+sampling: every apartment draws a random key and each type keeps the
+apartments with the smallest keys, which is a uniform sample without
+replacement. Only sampled apartments are priced, so adding an apartment
+usually costs one random number and a type count. After pricing.configure
+the sampled apartments are repriced once, on the next update or estimate
+that depends on prices.
+
+The number of apartments of each type is counted exactly, so type counts
+and proportions are exact. When every apartment of a type fits in its
+sample, the estimates of that type are exact too.
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import bisect
+import heapq
+import math
+import random
+from collections import Counter
+from fractions import Fraction
+from itertools import accumulate
+from statistics import NormalDist
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed to sample ApartmentTable rows
+    np = None
+
+import pricing
+from apt import APT_TYPES, type_counts_by_name
+
+DEFAULT_SAMPLE_SIZE = 2048  # sampled apartments per type
+DEFAULT_CONFIDENCE = 0.95
+
+
+def _z(confidence):
+    """
+    Returns:
+        float: The two-sided standard normal quantile of a confidence level
+
+    Raises:
+        ValueError: If confidence is not between 0 and 1
+    """
+    if not 0 < confidence < 1:
+        raise ValueError("confidence must be between 0 and 1")
+    return NormalDist().inv_cdf((1 + confidence) / 2)
+
+
+def _estimate(value, half_width, lowest=None):
+    """
+    Returns:
+        dict: The 'value' and the 'low' and 'high' ends of its interval,
+              with 'low' no smaller than lowest
+    """
+    low = value - half_width
+    if lowest is not None:
+        low = max(low, lowest)
+    return {'value': value, 'low': low, 'high': value + half_width}
+
+
+
+class ApproximateReport:
+    """
+    Estimates the mmn15 statistics of a stream from per-type samples.
+
+    Attributes:
+        _sample_size (int): Largest number of sampled apartments per type
+        _rng (Random): Draws the sampling keys
+        _type_counts (Counter): Number of apartments added of each type code
+        _samples (dict): Type code -> heap of (-key, number, price,
+                         has_pool, apt) of the sampled apartments, largest
+                         key first; number counts the apartments of the
+                         type, so entries never compare their apartments
+        _epoch (int): The pricing epoch the sampled prices were computed under
+        _quantiles (tuple): Sorted sampled prices, their cumulative weights
+                            and the weight scale, or None until percentiles
+                            are asked
+    """
+
+    def __init__(self, apts=(), sample_size=DEFAULT_SAMPLE_SIZE, seed=None):
+        """
+        Initialize a new ApproximateReport.
+
+        Args:
+            apts (iterable): Apartments to add to the report right away
+            sample_size (int): Largest number of sampled apartments per type
+            seed (int): Seed of the sampling, for reproducible estimates
+
+        Raises:
+            ValueError: If sample_size is not positive
+        """
+        if sample_size < 1:
+            raise ValueError("sample_size must be positive")
+
+        self._sample_size = sample_size
+        self._rng = random.Random(seed)
+        self._type_counts = Counter()
+        self._samples = {}
+        self._epoch = pricing.epoch
+        self._quantiles = None
+
+        self.update(apts)
+
+
+    def add(self, apt):
+        """
+        Add a single apartment to the report.
+
+        Args:
+            apt (Apt): The apartment to add
+        """
+        self.update((apt,))
+
+
+    def update(self, apts):
+        """
+        Add every apartment of an iterable to the report in one pass.
+
+        Args:
+            apts (iterable): Apartment objects, consumed only once
+        """
+        self._reprice()
+        sample_size = self._sample_size
+        draw = self._rng.random
+        type_counts = self._type_counts
+        samples = self._samples
+
+        for apt in apts:
+            code = apt.TYPE_CODE
+            type_counts[code] += 1
+            key = draw()
+
+            sample = samples.get(code)
+            if sample is None:
+                sample = samples[code] = []
+            if len(sample) < sample_size:
+                heapq.heappush(sample, (-key, type_counts[code], apt.get_price(),
+                                        apt.SUPPORTS_POOL and apt.get_has_pool(), apt))
+            elif key < -sample[0][0]:
+                heapq.heapreplace(sample, (-key, type_counts[code], apt.get_price(),
+                                           apt.SUPPORTS_POOL and apt.get_has_pool(), apt))
+
+        self._quantiles = None
+
+
+    def update_table(self, table):
+        """
+        Add every row of an apartment table to the report.
+
+        Keys are drawn for all rows at once, and only the rows that enter a
+        sample are priced and converted to apartment objects.
+
+        Args:
+            table (ApartmentTable): The apartments
+
+        Raises:
+            ImportError: If numpy is not installed
+        """
+        if np is None:
+            raise ImportError("sampling apartment tables requires numpy")
+
+        self._reprice()
+        sample_size = self._sample_size
+        rng = np.random.default_rng(self._rng.getrandbits(64))
+        type_codes = table.get_type_code()
+        counts = np.bincount(type_codes)
+
+        for code in np.flatnonzero(counts).tolist():
+            first_number = self._type_counts[code] + 1
+            self._type_counts[code] += int(counts[code])
+            rows = np.flatnonzero(type_codes == code)
+            keys = rng.random(len(rows))
+
+            sample = self._samples.setdefault(code, [])
+            if len(sample) == sample_size:
+                candidates = np.flatnonzero(keys < -sample[0][0])
+            else:
+                candidates = np.arange(len(rows))
+            if len(candidates) > sample_size:
+                smallest = np.argpartition(keys[candidates], sample_size)[:sample_size]
+                candidates = candidates[smallest]
+
+            rows = rows[candidates]
+            entries = zip((-keys[candidates]).tolist(), (candidates + first_number).tolist(),
+                          table.get_prices(rows).tolist(), table.get_has_pool()[rows].tolist(),
+                          map(table.apt_at, rows.tolist()))
+            for entry in entries:
+                if len(sample) < sample_size:
+                    heapq.heappush(sample, entry)
+                elif entry[0] > sample[0][0]:
+                    heapq.heapreplace(sample, entry)
+
+        self._quantiles = None
+
+
+    def _reprice(self):
+        """
+        Reprice the sampled apartments if the pricing constants changed
+        since they were priced. Keys are kept, so every sample stays a heap.
+        """
+        if self._epoch == pricing.epoch:
+            return
+        for code, sample in self._samples.items():
+            self._samples[code] = [(key, number, apt.get_price(), has_pool, apt)
+                                   for key, number, _, has_pool, apt in sample]
+        self._epoch = pricing.epoch
+        self._quantiles = None
+
+
+    def __len__(self):
+        """
+        Returns:
+            int: The number of apartments added to the report
+        """
+        return sum(self._type_counts.values())
+
+
+    def get_sample_size(self):
+        """
+        Returns:
+            int: Largest number of sampled apartments per type
+        """
+        return self._sample_size
+
+
+    def _strata(self):
+        """
+        Yields:
+            tuple: (type code, apartments of the type, sampled entries)
+                   of every type added so far
+        """
+        for code, count in self._type_counts.items():
+            if count:
+                yield code, count, self._samples[code]
+
+
+    def average_price(self, confidence=DEFAULT_CONFIDENCE):
+        """
+        Estimate the average price.
+
+        Args:
+            confidence (float): Confidence level of the interval
+
+        Returns:
+            dict: The estimated average price 'value' (0 if no apartments
+                  were added) and the 'low' and 'high' ends of its
+                  confidence interval
+        """
+        z = _z(confidence)
+        total = len(self)
+        if not total:
+            return _estimate(0, 0)
+        self._reprice()
+
+        mean = 0
+        variance = 0
+        for _, count, sample in self._strata():
+            size = len(sample)
+            weight = count / total
+            prices = [price for _, _, price, _, _ in sample]
+            stratum_mean = sum(prices) / size
+            mean += weight * stratum_mean
+            if size > 1:
+                stratum_variance = sum((price - stratum_mean) ** 2 for price in prices) / (size - 1)
+                variance += weight ** 2 * (1 - size / count) * stratum_variance / size
+
+        return _estimate(mean, z * math.sqrt(variance))
+
+
+    def how_many_rooftop(self, confidence=DEFAULT_CONFIDENCE):
+        """
+        Estimate the number of roof apartments with pools.
+
+        Args:
+            confidence (float): Confidence level of the interval
+
+        Returns:
+            dict: The estimated count 'value' and the 'low' and 'high' ends
+                  of its confidence interval
+        """
+        z = _z(confidence)
+        estimate = 0
+        variance = 0
+        for code, count, sample in self._strata():
+            if not APT_TYPES[code].SUPPORTS_POOL:
+                continue
+            size = len(sample)
+            pools = sum(1 for _, _, _, has_pool, _ in sample if has_pool)
+            share = pools / size
+            estimate += count * pools / size
+            if size > 1:
+                variance += count ** 2 * (1 - size / count) * share * (1 - share) / (size - 1)
+
+        return _estimate(estimate, z * math.sqrt(variance), lowest=0)
+
+
+    def how_many_apt_type(self):
+        """
+        Returns:
+            dict: Apartment type names as keys and exact counts as values
+        """
+        return type_counts_by_name(self._type_counts)
+
+
+    def type_proportions(self):
+        """
+        Returns:
+            dict: Apartment type names as keys and their share of all
+                  apartments as estimates; type counts are exact, so the
+                  intervals have no width
+        """
+        total = len(self) or 1
+        return {name: _estimate(count / total, 0)
+                for name, count in self.how_many_apt_type().items()}
+
+
+    def _quantile_table(self):
+        """
+        Returns:
+            tuple: (sampled prices in ascending order, cumulative weights of
+                   the prices, scale of the weights). A sampled apartment
+                   weighs scale times as many apartments of its type as it
+                   stands for; scale makes every weight an integer, so the
+                   cumulative weights are exact.
+        """
+        self._reprice()
+        if self._quantiles is None:
+            strata = list(self._strata())
+            scale = math.lcm(*(len(sample) for _, _, sample in strata))
+            weighted = sorted((price, count * (scale // len(sample)))
+                              for _, count, sample in strata
+                              for _, _, price, _, _ in sample)
+            self._quantiles = ([price for price, _ in weighted],
+                               list(accumulate(weight for _, weight in weighted)),
+                               scale)
+        return self._quantiles
+
+
+    def price_percentile(self, q, confidence=DEFAULT_CONFIDENCE):
+        """
+        Estimate a price percentile using the nearest-rank method.
+
+        The interval comes from a bound on the error of the sampled share
+        of apartments below any price, so it holds for every percentile.
+
+        Args:
+            q (float): Percentile between 0 and 100
+            confidence (float): Confidence level of the interval
+
+        Returns:
+            dict or None: The estimated percentile 'value' and the 'low' and
+                          'high' ends of its confidence interval, or None
+                          if no apartments were added. When every
+                          apartment is sampled, the value equals
+                          price_stats.price_percentile.
+
+        Raises:
+            ValueError: If q is not between 0 and 100
+        """
+        if not 0 <= q <= 100:
+            raise ValueError("percentile must be between 0 and 100")
+        z = _z(confidence)
+        total = len(self)
+        if not total:
+            return None
+
+        # the variance of a sampled share is at most 1/4 per sampled apartment
+        variance = sum((count / total) ** 2 * (1 - len(sample) / count) / (4 * len(sample))
+                       for _, count, sample in self._strata())
+        error = z * math.sqrt(variance)
+
+        prices, cumulative, scale = self._quantile_table()
+
+        def price_at(rank):
+            # first price whose cumulative weight reaches the rank
+            index = bisect.bisect_left(cumulative, max(rank, 1) * scale)
+            return prices[min(index, len(prices) - 1)]
+
+        share = q / 100
+        # the exact rank of q, like price_stats.price_percentile
+        return {'value': price_at(math.ceil(Fraction(q) * total / 100)),
+                'low': price_at(max(share - error, 0) * total),
+                'high': price_at(min(share + error, 1) * total)}
+
+
+    def summary(self, percentiles=(50, 90, 99), confidence=DEFAULT_CONFIDENCE):
+        """
+        Estimate every dashboard statistic at once.
+
+        Args:
+            percentiles (tuple): Price percentiles to estimate
+            confidence (float): Confidence level of the intervals
+
+        Returns:
+            dict: 'count', 'average_price', 'type_proportions',
+                  'how_many_rooftop' and 'price_percentiles' (percentile ->
+                  estimate), with estimates as returned by the methods
+        """
+        return {
+            'count': len(self),
+            'average_price': self.average_price(confidence),
+            'type_proportions': self.type_proportions(),
+            'how_many_rooftop': self.how_many_rooftop(confidence),
+            'price_percentiles': {q: self.price_percentile(q, confidence) for q in percentiles},
+        }
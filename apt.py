@@ -8,9 +8,47 @@ with floor and area attributes, and provides price calculation functionality.
 
 __author__ = "Bar-chaim Aminadav"
 
-PRICE_PER_SQR_METER = 20000
-ADDITIONAL_PRICE_PER_FLOOR = 5000
-FIRST_FLOOR = 1
+import gc
+from collections import deque
+from itertools import repeat
+from operator import itemgetter
+
+import pricing
+from pricing import price
+
+# registered apartment classes by type code, see Apt.__init_subclass__
+APT_TYPES = {}
+
+
+def register_type(cls):
+    """
+    Register an apartment class under its TYPE_CODE.
+
+    Args:
+        cls (type): Apt or a subclass defining its own TYPE_CODE
+
+    Raises:
+        ValueError: If a different class already uses the type code
+    """
+    code = cls.TYPE_CODE
+    registered = APT_TYPES.get(code)
+    if registered is not None and registered.__qualname__ != cls.__qualname__:
+        raise ValueError(f"type code {code} is already used by {registered.__name__}")
+    APT_TYPES[code] = cls
+
+
+def type_counts_by_name(code_counts):
+    """
+    Convert apartment counts by type code to counts by type name.
+
+    Args:
+        code_counts (dict): Type code -> number of apartments
+
+    Returns:
+        dict: Name of every registered apartment type, in type code order,
+              mapped to its count (0 for codes missing from code_counts)
+    """
+    return {APT_TYPES[code].__name__: code_counts.get(code, 0) for code in sorted(APT_TYPES)}
 
 
 class Apt:
@@ -21,11 +59,44 @@ class Apt:
     Each apartment has a floor number and area in square meters, and the price
     is calculated based on these attributes.
 
+    Apartments are stored in large numbers, so the whole hierarchy uses
+    __slots__ instead of a per-instance __dict__.
+
+    Every apartment class declares an integer TYPE_CODE and the capability
+    flags SUPPORTS_VIEW and SUPPORTS_POOL, so code that classifies
+    apartments reads one class attribute instead of checking types.
+    Subclasses that do not define their own TYPE_CODE are not registered
+    and inherit the code and flags of their nearest registered ancestor.
+
     Attributes:
         _floor (int): The floor number where the apartment is located
         _area (int): The area of the apartment in square meters
     """
 
+    TYPE_CODE = 0
+    SUPPORTS_VIEW = False
+    SUPPORTS_POOL = False
+
+    __slots__ = ('_floor', '_area')
+
+    # how the bulk factories fill the slots: the constructor arguments in
+    # order, and the slots the constructor sets to fixed values
+    _ARG_SLOTS = ('_floor', '_area')
+    _FIXED_SLOTS = {}
+
+    # the fields __str__ shows, in order; the bulk exporters read them from
+    # the slots of the same names with a leading underscore
+    _STR_FIELDS = ('floor', 'area')
+
+    def __init_subclass__(cls, **kwargs):
+        """
+        Register subclasses that declare their own TYPE_CODE.
+        """
+        super().__init_subclass__(**kwargs)
+        if 'TYPE_CODE' in cls.__dict__:
+            register_type(cls)
+
+
     def __init__(self,floor, area):
         """
         Initialize a new Apt instance.
@@ -36,6 +107,79 @@ class Apt:
         self._floor = floor
         self._area = area
 
+    @classmethod
+    def from_arrays(cls, *columns):
+        """
+        Build many apartments of this class at once from argument columns.
+
+        The apartments are allocated without calling __init__ and their
+        slots are set column by column, which avoids the super().__init__
+        chain of every object. The garbage collector is paused while they
+        are built, since the new objects cannot form reference cycles.
+
+        Args:
+            *columns (sequence): One column per constructor argument, in
+                                 constructor order, e.g. floors, areas and
+                                 has_pool values for RoofApt. NumPy arrays
+                                 are converted to Python values.
+
+        Returns:
+            list: The apartments, equal to calling the constructor on
+                  every row of the columns
+
+        Raises:
+            ValueError: If the number of columns does not match the
+                        constructor or the columns differ in length
+        """
+        if len(columns) != len(cls._ARG_SLOTS):
+            raise ValueError(f"{cls.__name__} takes {len(cls._ARG_SLOTS)} columns, "
+                             f"got {len(columns)}")
+        columns = [column.tolist() if hasattr(column, 'tolist') else column
+                   for column in columns]
+        count = len(columns[0])
+        if any(len(column) != count for column in columns):
+            raise ValueError("columns must have the same length")
+
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            apts = list(map(object.__new__, repeat(cls, count)))
+            for name, column in zip(cls._ARG_SLOTS, columns):
+                deque(map(getattr(cls, name).__set__, apts, column), maxlen=0)
+            for name, value in cls._FIXED_SLOTS.items():
+                deque(map(getattr(cls, name).__set__, apts, repeat(value)), maxlen=0)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+        return apts
+
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Build many apartments of this class at once from argument tuples.
+
+        Args:
+            records (iterable): Tuples of constructor arguments, e.g.
+                                (floor, area, has_pool) for RoofApt
+
+        Returns:
+            list: The apartments, in the order of the records
+
+        Raises:
+            ValueError: If a record does not match the constructor
+        """
+        records = list(records)
+        if not records:
+            return []
+        width = len(cls._ARG_SLOTS)
+        if set(map(len, records)) != {width}:
+            raise ValueError(f"{cls.__name__} records must have {width} fields")
+        # itemgetter columns are much cheaper than zip(*records) on long lists
+        return cls.from_arrays(*(list(map(itemgetter(i), records)) for i in range(width)))
+
+
     def get_floor(self):
         """
         Returns:
@@ -73,6 +217,22 @@ class Apt:
         return NotImplemented
 
 
+    def __hash__(self):
+        """
+        Hash the apartment consistently with __eq__.
+
+        Every equality rule of the hierarchy, including the comparison of
+        SpecialApt with a basic Apt, requires the same floor and area, so
+        hashing only those two keeps equal apartments in the same bucket
+        for every pair of types. Subclasses that override __eq__ inherit
+        this hash explicitly.
+
+        Returns:
+            int: Hash of the floor and area
+        """
+        return hash((self._floor, self._area))
+
+
     def __str__(self):
         """
         Return string representation of the apartment.
@@ -80,6 +240,17 @@ class Apt:
         return f"floor: {self._floor}, area: {self._area}"
 
 
+    def __reduce__(self):
+        """
+        Pickle the apartment as its constructor arguments.
+
+        This is much smaller and faster than the default pickling of
+        slotted objects, which matters when apartments are sent to worker
+        processes.
+        """
+        return type(self), (self._floor, self._area)
+
+
     def get_price(self):
         """
         Calculate the price of the apartment.
@@ -89,15 +260,18 @@ class Apt:
         - Floor surcharge: floor * ADDITIONAL_PRICE_PER_FLOOR
         - No additional payment for apartments <= floor 1
 
+        The formula is computed by pricing.price.
+
         Returns:
             int: The calculated price in currency units
         """
-        area_price = self._area * PRICE_PER_SQR_METER
-        floor_price = self._floor * ADDITIONAL_PRICE_PER_FLOOR
+        return price(self._floor, self._area)
+
 
-        # No additional payment for apartments on first floor
-        if self._floor <= FIRST_FLOOR:
-            floor_price = 0
+register_type(Apt)
 
-        return area_price + floor_price
 
+# the pricing constants of this module moved to pricing, reads and
+# assignments of them here are forwarded there
+pricing.forward_constants(__name__, 'PRICE_PER_SQR_METER', 'ADDITIONAL_PRICE_PER_FLOOR',
+                          'FIRST_FLOOR')
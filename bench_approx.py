@@ -0,0 +1,107 @@
+"""
+Accuracy and latency benchmark of the approximate statistics.
+
+Builds a random columnar inventory, computes the exact average price,
+rooftop count and price percentiles with the apartment_table functions,
+and compares them with ApproximateReport estimates for several sample
+sizes. Reports the query time, the relative error and whether the exact
+answer lies in the 95% confidence interval.
+
+Usage:
+    python bench_approx.py [--count N] [--sample-sizes 256 1024 4096]
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import argparse
+import time
+
+import numpy as np
+
+import apartment_table
+from apartment_table import ApartmentTable, GARDEN_APT_CODE, ROOF_APT_CODE, SPECIAL_APT_CODE
+from approx_report import ApproximateReport
+
+PERCENTILES = (50, 90, 99)
+
+
+def random_table(count, seed=0):
+    """
+    Returns:
+        ApartmentTable: count random apartments of the four types, with the
+                        attribute ranges of synthetic.random_apts
+    """
+    rng = np.random.default_rng(seed)
+    type_code = rng.integers(0, 4, count, dtype=np.int8)
+    floor = np.where(type_code == GARDEN_APT_CODE, 0, rng.integers(0, 31, count))
+    area = rng.integers(30, 201, count)
+    has_view = np.where(type_code == SPECIAL_APT_CODE, rng.random(count) < 0.5,
+                        type_code == ROOF_APT_CODE)
+    has_pool = (type_code == ROOF_APT_CODE) & (rng.random(count) < 0.5)
+    garden_area = np.where(type_code == GARDEN_APT_CODE, rng.integers(0, 151, count), 0)
+    return ApartmentTable(type_code, floor, area, has_view, has_pool, garden_area)
+
+
+def timed(func, *args):
+    """
+    Returns:
+        tuple: (result of func(*args), seconds taken)
+    """
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def exact(table):
+    """
+    Returns:
+        dict: The exact answers, keyed like the rows of the report
+    """
+    prices = table.get_prices()
+    answers = {'average_price': apartment_table.average_price(table),
+               'how_many_rooftop': apartment_table.how_many_rooftop(table)}
+    for q in PERCENTILES:
+        # inverted_cdf is the nearest-rank method of price_stats.price_percentile
+        answers[f"p{q}"] = int(np.percentile(prices, q, method='inverted_cdf'))
+    return answers
+
+
+def estimates(report):
+    """
+    Returns:
+        dict: The estimates of report, keyed like exact()
+    """
+    answers = {'average_price': report.average_price(),
+               'how_many_rooftop': report.how_many_rooftop()}
+    for q in PERCENTILES:
+        answers[f"p{q}"] = report.price_percentile(q)
+    return answers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--count', type=int, default=5000000, help="number of apartments")
+    parser.add_argument('--sample-sizes', type=int, nargs='+', default=[256, 1024, 4096],
+                        help="sampled apartments per type")
+    args = parser.parse_args()
+
+    table = random_table(args.count, seed=1)
+    answers, seconds = timed(exact, table)
+    print(f"{args.count} apartments, exact answers in {seconds * 1000:.1f} ms")
+
+    for sample_size in args.sample_sizes:
+        report = ApproximateReport(sample_size=sample_size, seed=1)
+        _, build_seconds = timed(report.update_table, table)
+        results, query_seconds = timed(estimates, report)
+        print(f"\nsample {sample_size} per type: sampled in {build_seconds * 1000:.1f} ms, "
+              f"queried in {query_seconds * 1000:.2f} ms")
+        print(f"{'':>18}{'exact':>16}{'estimate':>16}{'error':>10}  in 95% interval")
+        for name, value in answers.items():
+            estimate = results[name]
+            error = abs(estimate['value'] - value) / value if value else 0
+            inside = estimate['low'] <= value <= estimate['high']
+            print(f"{name:>18}{value:16,.0f}{estimate['value']:16,.0f}{error:10.3%}  {inside}")
+
+
+if __name__ == '__main__':
+    main()
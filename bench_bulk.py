@@ -0,0 +1,76 @@
+"""
+Benchmark of per-object construction against the bulk factories.
+
+Builds the same apartments of every type by calling the constructor once
+per apartment, with from_records and with from_arrays, and reports the
+time and the speedup of each bulk path.
+
+Usage:
+    python bench_bulk.py [--count N] [--repeat R]
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import argparse
+import random
+import time
+
+from apt import Apt
+from special_apt import SpecialApt
+from garden_apt import GardenApt
+from roof_apt import RoofApt
+
+
+def columns_for(cls, count, rng):
+    """
+    Returns:
+        list: Random constructor argument columns for count apartments of cls
+    """
+    floors = [rng.randint(0, 30) for _ in range(count)]
+    areas = [rng.randint(40, 200) for _ in range(count)]
+    flags = [rng.random() < 0.5 for _ in range(count)]
+    if cls is Apt:
+        return [floors, areas]
+    if cls is GardenApt:
+        return [areas, [rng.randint(10, 100) for _ in range(count)]]
+    return [floors, areas, flags]
+
+
+def best_time(func, repeat):
+    """
+    Returns:
+        float: The fastest of repeat runs of func, in seconds
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--count', type=int, default=1000000, help="apartments per type")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per measurement")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    print(f"{args.count} apartments per type, best of {args.repeat}")
+    print(f"{'type':>12}{'constructor':>14}{'from_records':>22}{'from_arrays':>22}")
+
+    for cls in (Apt, SpecialApt, GardenApt, RoofApt):
+        columns = columns_for(cls, args.count, rng)
+        records = list(zip(*columns))
+
+        per_object = best_time(lambda: [cls(*record) for record in records], args.repeat)
+        from_records = best_time(lambda: cls.from_records(records), args.repeat)
+        from_arrays = best_time(lambda: cls.from_arrays(*columns), args.repeat)
+
+        print(f"{cls.__name__:>12}{per_object:13.3f}s"
+              f"{from_records:13.3f}s x{per_object / from_records:5.2f}"
+              f"{from_arrays:13.3f}s x{per_object / from_arrays:5.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Throughput benchmark of the bulk exporters.
+
+Writes an inventory to a temporary file in every export format, once per
+apartment with str(), csv.DictWriter or json.dumps over records, and once
+with ExportWriter, then reads the str file back once line by line with a
+naive parser and once with export.read_str_file. Reports MB/s of text.
+
+Usage:
+    python bench_export.py [--count 200000]
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+
+from apt import APT_TYPES
+from export import CSV, JSONL, STR, export_apts, read_str_file
+from records import FIELDS, apt_to_record
+from synthetic import random_apts
+
+
+def per_object(path, apts, file_format):
+    """
+    Write the way callers did before export: one conversion per apartment.
+    """
+    with open(path, 'w', newline='') as file:
+        if file_format == STR:
+            for apt in apts:
+                file.write(str(apt) + "\n")
+        elif file_format == CSV:
+            writer = csv.DictWriter(file, FIELDS, lineterminator='\n')
+            writer.writeheader()
+            for apt in apts:
+                writer.writerow(apt_to_record(apt))
+        else:
+            for apt in apts:
+                file.write(json.dumps(apt_to_record(apt)) + "\n")
+
+
+def naive_read(path):
+    """
+    Parse a str file one apartment at a time through the constructors.
+    """
+    types = {tuple(cls._STR_FIELDS): cls for cls in APT_TYPES.values()}
+    apts = []
+    with open(path) as file:
+        for line in file:
+            values = dict(field.split(': ') for field in line.rstrip('\n').split(', '))
+            cls = types[tuple(values)]
+            arguments = {name: value == 'True' if name.startswith('has_') else int(value)
+                         for name, value in values.items()
+                         if '_' + name in cls._ARG_SLOTS}
+            apts.append(cls(**arguments))
+    return apts
+
+
+def throughput(func, path, *args):
+    """
+    Returns:
+        float: MB/s of the file at path processed by func(path, *args)
+    """
+    start = time.perf_counter()
+    func(path, *args)
+    seconds = time.perf_counter() - start
+    return os.path.getsize(path) / seconds / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--count', type=int, default=200000, help="inventory size")
+    args = parser.parse_args()
+
+    apts = random_apts(args.count, seed=1)
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'write':<10}{'per object':>14}{'ExportWriter':>16}")
+        for file_format in (STR, CSV, JSONL):
+            path = os.path.join(directory, 'apts.' + file_format)
+            before = throughput(per_object, path, apts, file_format)
+            after = throughput(export_apts, path, apts, file_format)
+            print(f"{file_format:<10}{before:>9.1f} MB/s{after:>11.1f} MB/s")
+
+        path = os.path.join(directory, 'apts.str')
+        before = throughput(naive_read, path)
+        after = throughput(read_str_file, path)
+        print(f"\n{'read':<10}{'naive':>14}{'read_str_file':>16}")
+        print(f"{STR:<10}{before:>9.1f} MB/s{after:>11.1f} MB/s")
+
+
+if __name__ == '__main__':
+    main()
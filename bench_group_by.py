@@ -0,0 +1,72 @@
+"""
+Scaling benchmark of the group_by engine.
+
+Breaks the average and top price down by type, floor band and view for
+growing inventories, once by hand with one filtering pass and mmn15 call
+per group, once with group_by over objects and once with group_by_table.
+Reports milliseconds and nanoseconds per apartment, which stay flat for
+the linear engines.
+
+Usage:
+    python bench_group_by.py [--counts 100000 200000 400000]
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import argparse
+import time
+
+import mmn15
+from apartment_table import ApartmentTable
+from group_by import floor_band, group_by, group_by_table
+from synthetic import random_apts
+
+KEYS = ('type', floor_band(10), 'has_view')
+AGGS = ('count', 'avg_price', 'top_price')
+
+
+def by_hand(apts):
+    """
+    Group the way callers did before group_by: one pass per group.
+    """
+    groups = {(type(apt).__name__, apt.get_floor() // 10 * 10,
+               apt.SUPPORTS_VIEW and apt.get_has_view()) for apt in apts}
+    results = {}
+    for group in groups:
+        members = [apt for apt in apts
+                   if (type(apt).__name__, apt.get_floor() // 10 * 10,
+                       apt.SUPPORTS_VIEW and apt.get_has_view()) == group]
+        results[group] = {'count': len(members), 'avg_price': mmn15.average_price(members),
+                          'top_price': mmn15.top_price(members)}
+    return results
+
+
+def timed(func, *args):
+    """
+    Returns:
+        float: Seconds taken by func(*args)
+    """
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--counts', type=int, nargs='+', default=[100000, 200000, 400000],
+                        help="inventory sizes to try")
+    args = parser.parse_args()
+
+    print(f"{'count':>10}{'by hand':>22}{'group_by':>22}{'group_by_table':>22}")
+    for count in args.counts:
+        apts = random_apts(count, seed=1)
+        table = ApartmentTable.from_apts(apts)
+        cells = []
+        for seconds in (timed(by_hand, apts), timed(group_by, apts, KEYS, AGGS),
+                        timed(group_by_table, table, KEYS, AGGS)):
+            cells.append(f"{seconds * 1000:10.1f} ms {seconds / count * 1e9:5.0f} ns")
+        print(f"{count:>10}" + "".join(f"{cell:>22}" for cell in cells))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Throughput benchmark of the asyncio ingestion pipeline.
+
+Feeds the same JSON Lines records through IngestPipeline split across a
+number of in-memory producers, for every combination of queue size and
+producer count, and reports apartments ingested per second.
+
+Usage:
+    python bench_ingest.py [--count N] [--queue-sizes 1 16 256] [--producers 1 4 16]
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import argparse
+import asyncio
+import json
+import time
+
+from ingest import IngestPipeline
+from records import apt_to_record
+from synthetic import random_apts
+
+
+async def memory_lines(lines):
+    """
+    Yield lines, giving other tasks a turn between lines like a real stream.
+    """
+    for line in lines:
+        yield line
+        await asyncio.sleep(0)
+
+
+async def ingest(lines, queue_size, producers, batch_size):
+    """
+    Returns:
+        float: Seconds taken to ingest lines through one pipeline
+    """
+    pipeline = IngestPipeline(queue_size=queue_size, batch_size=batch_size)
+    parts = [lines[i::producers] for i in range(producers)]
+
+    start = time.perf_counter()
+    await pipeline.run(*(pipeline.feed(memory_lines(part), f"producer {i}")
+                         for i, part in enumerate(parts)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--count', type=int, default=200000, help="number of apartments")
+    parser.add_argument('--queue-sizes', type=int, nargs='+', default=[1, 16, 256],
+                        help="queue sizes to try")
+    parser.add_argument('--producers', type=int, nargs='+', default=[1, 4, 16],
+                        help="producer counts to try")
+    parser.add_argument('--batch-size', type=int, default=256, help="apartments per batch")
+    args = parser.parse_args()
+
+    lines = [json.dumps(apt_to_record(apt)) for apt in random_apts(args.count, seed=1)]
+
+    print(f"{args.count} apartments, batches of {args.batch_size}, apartments per second")
+    print(f"{'queue':>8}" + "".join(f"{count:>10} prod" for count in args.producers))
+    for queue_size in args.queue_sizes:
+        cells = []
+        for producers in args.producers:
+            seconds = asyncio.run(ingest(lines, queue_size, producers, args.batch_size))
+            cells.append(f"{args.count / seconds:15,.0f}")
+        print(f"{queue_size:>8}" + "".join(cells))
+
+
+if __name__ == '__main__':
+    main()
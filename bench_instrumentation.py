@@ -0,0 +1,69 @@
+"""
+Overhead benchmark of the instrumentation layer.
+
+Times the mmn15 functions with instrumentation never enabled, enabled, and
+enabled then disabled again, and reports the overhead over the baseline.
+
+Usage:
+    python bench_instrumentation.py [--count N] [--repeat R]
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import argparse
+import time
+
+import instrumentation
+import mmn15
+from synthetic import random_apts
+
+
+def best_time(function, apts, repeat):
+    """
+    Returns:
+        float: The fastest of repeat runs of function(apts), in seconds
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(apts)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def time_functions(apts, repeat):
+    """
+    Returns:
+        dict: Best time of every instrumented mmn15 function
+    """
+    # looked up on the module every time, as instrumentation requires
+    return {name: best_time(getattr(mmn15, name), apts, repeat)
+            for name in instrumentation.INSTRUMENTED_FUNCTIONS}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--count', type=int, default=200000, help="number of apartments")
+    parser.add_argument('--repeat', type=int, default=5, help="runs per measurement")
+    args = parser.parse_args()
+
+    apts = random_apts(args.count, seed=1)
+
+    baseline = time_functions(apts, args.repeat)
+    instrumentation.enable()
+    enabled = time_functions(apts, args.repeat)
+    instrumentation.disable()
+    disabled = time_functions(apts, args.repeat)
+
+    print(f"{args.count} apartments, best of {args.repeat}")
+    print(f"{'function':>20}{'baseline':>12}{'enabled':>20}{'disabled':>20}")
+    for name in instrumentation.INSTRUMENTED_FUNCTIONS:
+        cells = [f"{baseline[name]:11.4f}s"]
+        for seconds in (enabled[name], disabled[name]):
+            overhead = (seconds / baseline[name] - 1) * 100
+            cells.append(f"{seconds:11.4f}s {overhead:+6.1f}%")
+        print(f"{name:>20}" + "".join(cells))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Memory and speed benchmark of lazy apartments.
+
+Measures the memory held by a list of apartment objects and by a
+LazyInventory over an ApartmentTable of the same apartments, and times the
+mmn15 functions on both.
+
+Usage:
+    python bench_lazy.py [--count N]
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+import mmn15
+from apartment_table import ApartmentTable
+from lazy_apt import LazyInventory
+from synthetic import random_specs
+
+FUNCTIONS = ('average_price', 'how_many_rooftop', 'how_many_apt_type',
+             'top_price', 'only_valid_apts')
+
+
+def measure(build):
+    """
+    Returns:
+        tuple: (result of build(), bytes it still holds when done)
+    """
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, held
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--count', type=int, default=1000000, help="number of apartments")
+    args = parser.parse_args()
+
+    specs = random_specs(args.count, seed=1)
+    apts, objects_bytes = measure(lambda: [cls(*ctor_args) for cls, ctor_args in specs])
+    table = ApartmentTable.from_apts(apts)
+    inventory, lazy_bytes = measure(lambda: LazyInventory(ApartmentTable(
+        table.get_type_code().copy(), table.get_floor().copy(), table.get_area().copy(),
+        table.get_has_view().copy(), table.get_has_pool().copy(),
+        table.get_garden_area().copy())))
+
+    print(f"{args.count} apartments")
+    print(f"{'memory':>20}{'objects':>14}{'lazy':>14}")
+    print(f"{'MB held':>20}{objects_bytes / 1e6:14.1f}{lazy_bytes / 1e6:14.1f}"
+          f"   x{objects_bytes / lazy_bytes:.1f} less")
+
+    print(f"{'function':>20}{'objects':>14}{'lazy':>14}")
+    for name in FUNCTIONS:
+        function = getattr(mmn15, name)
+        times = []
+        for apartments in (apts, inventory):
+            start = time.perf_counter()
+            function(apartments)
+            times.append(time.perf_counter() - start)
+        print(f"{name:>20}{times[0]:13.3f}s{times[1]:13.3f}s")
+
+
+if __name__ == '__main__':
+    main()
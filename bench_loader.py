@@ -0,0 +1,107 @@
+"""
+Throughput benchmark of the chunked CSV and JSON Lines loader.
+
+Writes a listings file in both formats, then loads each one line by line
+with the csv and json modules, and with ChunkedLoader in process and with
+worker processes. Reports rows per second and the peak memory traced in
+the main process while the batches are consumed into an ApartmentReport.
+
+Usage:
+    python bench_loader.py [--count N] [--chunk-size BYTES] [--workers W]
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from loader import ChunkedLoader
+from records import FIELDS, apt_from_record, apt_to_record, parse_json_line
+from report import ApartmentReport
+from synthetic import random_apts
+
+
+def line_by_line(path):
+    """
+    Load a file one row at a time, the way a simple loader would.
+    """
+    report = ApartmentReport()
+    with open(path, newline='') as file:
+        if path.endswith('.csv'):
+            for record in csv.DictReader(file):
+                report.add(apt_from_record(record))
+        else:
+            for line in file:
+                report.add(parse_json_line(line))
+    return report
+
+
+def chunked(path, chunk_size, workers):
+    """
+    Load a file with ChunkedLoader.
+    """
+    report = ApartmentReport()
+    with ChunkedLoader(path, chunk_size=chunk_size, workers=workers) as loader:
+        for batch in loader:
+            report.update(batch)
+    return report
+
+
+def measure(load):
+    """
+    Returns:
+        tuple: (seconds, peak traced bytes) of load()
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    load()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--count', type=int, default=300000, help="number of rows")
+    parser.add_argument('--chunk-size', type=int, default=1 << 20, help="chunk size in bytes")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="worker processes of the parallel run")
+    args = parser.parse_args()
+
+    records = [apt_to_record(apt) for apt in random_apts(args.count, seed=1)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'listings.csv')
+        with open(csv_path, 'w', newline='') as file:
+            writer = csv.DictWriter(file, FIELDS)
+            writer.writeheader()
+            writer.writerows(records)
+
+        jsonl_path = os.path.join(tmp, 'listings.jsonl')
+        with open(jsonl_path, 'w') as file:
+            file.writelines(json.dumps(record) + '\n' for record in records)
+
+        print(f"{args.count} rows, chunks of {args.chunk_size} bytes")
+        print(f"{'format':>8}{'loader':>24}{'rows/s':>14}{'peak MB':>10}{'file MB':>10}")
+        for path in (csv_path, jsonl_path):
+            runs = (
+                ('line by line', lambda: line_by_line(path)),
+                ('chunked, in process', lambda: chunked(path, args.chunk_size, 0)),
+                (f'chunked, {args.workers} workers',
+                 lambda: chunked(path, args.chunk_size, args.workers)),
+            )
+            for name, load in runs:
+                seconds, peak = measure(load)
+                print(f"{os.path.splitext(path)[1][1:]:>8}{name:>24}"
+                      f"{args.count / seconds:14,.0f}{peak / 1e6:10.1f}"
+                      f"{os.path.getsize(path) / 1e6:10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""
+Performance suite for the apartment classes and the mmn15 functions.
+
+Times apartment construction, get_price, __eq__, __str__ and every mmn15
+function over synthetic inventories with a realistic mix of the four
+apartment types, and reports throughput in apartments per second.
+
+Usage:
+    python bench_mmn15.py run [--sizes 1000 100000] [--save baseline.json]
+    python bench_mmn15.py compare baseline.json [--current current.json]
+                                                [--tolerance 0.2]
+
+compare runs the suite at the baseline sizes (unless --current is given)
+and exits with status 1 if any benchmark is slower than the baseline by
+more than the tolerance, or is missing from the current results.
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import argparse
+import json
+import platform
+import sys
+import time
+
+import mmn15
+from synthetic import random_specs, REALISTIC_MIX
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_TOLERANCE = 0.2
+
+
+def _construct(specs):
+    return [cls(*args) for cls, args in specs]
+
+
+def _get_price(apts):
+    for apt in apts:
+        apt.get_price()
+
+
+def _eq(apts):
+    # neighbours of mixed types exercise the NotImplemented fallbacks too
+    for first, second in zip(apts, apts[1:]):
+        first == second
+
+
+def _str(apts):
+    for apt in apts:
+        str(apt)
+
+
+BENCHMARKS = {
+    'construct': _construct,
+    'get_price': _get_price,
+    '__eq__': _eq,
+    '__str__': _str,
+    'average_price': mmn15.average_price,
+    'how_many_rooftop': mmn15.how_many_rooftop,
+    'how_many_apt_type': mmn15.how_many_apt_type,
+    'top_price': mmn15.top_price,
+    'only_valid_apts': mmn15.only_valid_apts,
+}
+
+
+def measure(size, repeat):
+    """
+    Run every benchmark on an inventory of the given size.
+
+    Args:
+        size (int): Number of apartments
+        repeat (int): Runs per benchmark, the fastest one counts
+
+    Returns:
+        dict: Benchmark name -> throughput in apartments per second
+    """
+    specs = random_specs(size, seed=size, mix=REALISTIC_MIX)
+    apts = _construct(specs)
+    results = {}
+
+    for name, func in BENCHMARKS.items():
+        arg = specs if name == 'construct' else apts
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func(arg)
+            best = min(best, time.perf_counter() - start)
+        results[name] = size / best if best else float('inf')
+
+    return results
+
+
+def run_suite(sizes, repeat):
+    """
+    Run the suite at several sizes.
+
+    Returns:
+        dict: Machine-readable results with the environment they ran in
+    """
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'repeat': repeat,
+        'results': {str(size): measure(size, repeat) for size in sizes},
+    }
+
+
+def compare(baseline, current, tolerance):
+    """
+    Compare two suite results.
+
+    Args:
+        baseline (dict): Results of run_suite to compare against
+        current (dict): Results of run_suite to check
+        tolerance (float): Allowed relative throughput loss, 0.2 is 20%
+
+    Returns:
+        list: (size, benchmark, baseline, current) for every regression;
+              current is None for a benchmark or size of the baseline
+              that is missing from the current results
+    """
+    regressions = []
+    for size, base_results in baseline['results'].items():
+        for name, base_rate in base_results.items():
+            rate = current['results'].get(size, {}).get(name)
+            if rate is None or rate < base_rate * (1 - tolerance):
+                regressions.append((size, name, base_rate, rate))
+    return regressions
+
+
+def print_results(suite):
+    for size, results in suite['results'].items():
+        print(f"{size} apartments")
+        for name, rate in results.items():
+            print(f"  {name:20}{rate:16,.0f} apts/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="run the suite")
+    run_parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--save', help="write the results to this JSON file")
+
+    compare_parser = commands.add_parser('compare', help="check for regressions")
+    compare_parser.add_argument('baseline', help="JSON file written by run --save")
+    compare_parser.add_argument('--current', help="JSON file to check instead of a fresh run")
+    compare_parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        suite = run_suite(args.sizes, args.repeat)
+        print_results(suite)
+        if args.save:
+            with open(args.save, 'w') as file:
+                json.dump(suite, file, indent=2)
+        return 0
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    if args.current:
+        with open(args.current) as file:
+            current = json.load(file)
+    else:
+        sizes = [int(size) for size in baseline['results']]
+        current = run_suite(sizes, baseline.get('repeat', 3))
+
+    regressions = compare(baseline, current, args.tolerance)
+    for size, name, base_rate, rate in regressions:
+        if rate is None:
+            print(f"MISSING {name} at {size}: not in the current results")
+        else:
+            print(f"REGRESSION {name} at {size}: {rate:,.0f} apts/s "
+                  f"< {base_rate:,.0f} apts/s baseline")
+    if not regressions:
+        print(f"no regressions beyond {args.tolerance:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""
+Scaling benchmark of the parallel mmn15 aggregates.
+
+Times every aggregate serially with mmn15 and with ParallelAggregator for
+1 to N worker processes, and reports the speedup over the serial run. The
+apartments are loaded into the workers once, before the aggregates are
+timed; the time to load and start the workers is reported separately.
+
+Usage:
+    python bench_parallel.py [--count N] [--max-workers W]
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import argparse
+import os
+import time
+
+import mmn15
+from parallel import ParallelAggregator
+from synthetic import random_apts
+
+FUNCTIONS = ('average_price', 'how_many_rooftop', 'how_many_apt_type',
+             'top_price', 'only_valid_apts')
+
+
+def time_call(func, *args):
+    """
+    Returns:
+        float: Seconds taken by func(*args)
+    """
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--count', type=int, default=1000000, help="number of apartments")
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1,
+                        help="largest worker count to try")
+    args = parser.parse_args()
+
+    apts = random_apts(args.count, seed=1)
+    serial = {name: time_call(getattr(mmn15, name), apts) for name in FUNCTIONS}
+
+    print(f"{args.count} apartments")
+    print(f"{'workers':>8}{'load':>10}" + "".join(f"{name:>20}" for name in FUNCTIONS))
+    print(f"{'serial':>8}{'':>10}" + "".join(f"{serial[name]:19.3f}s" for name in FUNCTIONS))
+
+    for workers in range(1, args.max_workers + 1):
+        start = time.perf_counter()
+        with ParallelAggregator(apts, workers=workers) as aggregator:
+            aggregator.how_many_rooftop()  # start the workers
+            load = time.perf_counter() - start
+            cells = []
+            for name in FUNCTIONS:
+                seconds = time_call(getattr(aggregator, name))
+                cells.append(f"{seconds:8.3f}s x{serial[name] / seconds:5.2f}   ")
+            print(f"{workers:>8}{load:9.3f}s  " + "".join(cells))
+
+
+if __name__ == '__main__':
+    main()
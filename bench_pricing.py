@@ -0,0 +1,70 @@
+"""
+Microbenchmark of the pricing engine.
+
+Reports the cost per apartment of pricing an inventory through the
+get_price methods of the apartment objects, through the scalar
+pricing.price fast path, and through the vectorized pricing.price_batch.
+
+Usage:
+    python bench_pricing.py [--count N] [--repeat R]
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import argparse
+import time
+
+from pricing import price, price_batch
+from apartment_table import ApartmentTable, ROOF_APT_CODE
+from synthetic import random_apts
+
+
+def best_time(func, repeat):
+    """
+    Run a function several times and return the fastest run.
+
+    Args:
+        func (callable): Function without arguments to time
+        repeat (int): Number of runs
+
+    Returns:
+        float: The fastest run time in seconds
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--count', type=int, default=200000, help="number of apartments")
+    parser.add_argument('--repeat', type=int, default=5, help="runs per measurement")
+    args = parser.parse_args()
+
+    apts = random_apts(args.count, seed=1)
+    table = ApartmentTable.from_apts(apts)
+    floor = table.get_floor()
+    area = table.get_area()
+    has_view = table.get_has_view()
+    is_roof = table.get_type_code() == ROOF_APT_CODE
+    has_pool = table.get_has_pool()
+    rows = list(zip(floor.tolist(), area.tolist(), has_view.tolist(),
+                    is_roof.tolist(), has_pool.tolist()))
+
+    cases = [
+        ("objects get_price", lambda: [apt.get_price() for apt in apts]),
+        ("scalar price()", lambda: [price(*row) for row in rows]),
+        ("price_batch", lambda: price_batch(floor, area, has_view, is_roof, has_pool)),
+    ]
+
+    print(f"{args.count} apartments, best of {args.repeat}")
+    for name, func in cases:
+        seconds = best_time(func, args.repeat)
+        print(f"{name:20} {seconds * 1e9 / args.count:10.1f} ns/apt")
+
+
+if __name__ == '__main__':
+    main()
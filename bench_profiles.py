@@ -0,0 +1,88 @@
+"""
+Benchmark of pricing one inventory under many pricing profiles.
+
+Prices an inventory under every profile serially, by reconfiguring the
+global constants and calling price_batch once per profile, and in one
+batched pass with pricing_profile.price_matrix, and checks that both give
+the same prices.
+
+Usage:
+    python bench_profiles.py [--count N] [--profiles P] [--first-floors F]
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import argparse
+import time
+
+import numpy as np
+
+import pricing
+from apartment_table import ApartmentTable
+from pricing_profile import PricingProfile, price_matrix
+from synthetic import random_specs
+
+
+def make_profiles(count, first_floors):
+    """
+    Returns:
+        list: count profiles with distinct constants and first_floors
+              distinct FIRST_FLOOR values
+    """
+    return [PricingProfile(f"market {i}", PRICE_PER_SQR_METER=15000 + 200 * i,
+                           ADDITIONAL_PRICE_PER_FLOOR=4000 + 50 * i,
+                           FIRST_FLOOR=1 + i % first_floors,
+                           ADDITIONAL_VIEW_FEE_PER_FLOOR=500 + 5 * i,
+                           ROOF_PRICE=35000 + 100 * i, POOL_PRICE=25000 + 100 * i)
+            for i in range(count)]
+
+
+def serial_matrix(table, profiles):
+    """
+    Returns:
+        ndarray: The price matrix built by reconfiguring the globals per profile
+    """
+    saved = {name: getattr(pricing, name) for name in pricing.CONSTANT_NAMES}
+    columns = []
+    try:
+        for profile in profiles:
+            constants = profile.as_dict()
+            del constants['MILLION']
+            pricing.configure(**constants)
+            columns.append(table.get_prices())
+    finally:
+        pricing.configure(**saved)
+    return np.stack(columns, axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--count', type=int, default=1000000, help="number of apartments")
+    parser.add_argument('--profiles', type=int, default=50, help="number of profiles")
+    parser.add_argument('--first-floors', type=int, default=1,
+                        help="number of distinct FIRST_FLOOR values among the profiles")
+    args = parser.parse_args()
+
+    table = ApartmentTable.from_apts(cls(*ctor_args)
+                                     for cls, ctor_args in random_specs(args.count, seed=1))
+    profiles = make_profiles(args.profiles, args.first_floors)
+
+    start = time.perf_counter()
+    serial = serial_matrix(table, profiles)
+    serial_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = price_matrix(table, profiles)
+    batched_seconds = time.perf_counter() - start
+
+    if not np.array_equal(serial, batched):
+        raise SystemExit("price matrices differ")
+
+    print(f"{args.count} apartments x {args.profiles} profiles "
+          f"({args.first_floors} distinct FIRST_FLOOR)")
+    print(f"{'serial configure':>20}{serial_seconds:10.3f}s")
+    print(f"{'price_matrix':>20}{batched_seconds:10.3f}s   x{serial_seconds / batched_seconds:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Latency and throughput benchmark of the HTTP query server.
+
+Starts a QueryServer in this process and drives it with client threads,
+each sending a mix of queries over one kept-alive connection. Reports the
+p50 and p99 latency and the number of queries per second with the answer
+cache on and off, and the latency of answering one query by starting a
+new Python process, as the query scripts do.
+
+Usage:
+    python bench_query_server.py [--count N] [--clients C] [--requests R] [--script-runs S]
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import argparse
+import http.client
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from inventory_file import write_inventory
+from query_server import QueryServer, QueryService
+from synthetic import random_apts
+
+# the mix each client cycles through; the distinct parameters exercise the cache
+PATHS = ('/average_price', '/how_many_rooftop', '/how_many_apt_type', '/top_price',
+         '/only_valid_apts?min_price=2000000',
+         '/only_valid_apts?min_floor=20&type=RoofApt')
+
+SCRIPT = ("import sys, mmn15; from inventory_file import InventoryReader; "
+          "print(mmn15.average_price(list(InventoryReader(sys.argv[1]))))")
+
+
+def percentile(latencies, q):
+    """
+    Returns:
+        float: The nearest-rank q percentile of sorted latencies
+    """
+    return latencies[min(len(latencies) - 1, int(q / 100 * len(latencies)))]
+
+
+def run_client(address, requests, offset, latencies):
+    """
+    Send requests over one connection, appending each latency to latencies.
+    """
+    connection = http.client.HTTPConnection(*address)
+    for i in range(requests):
+        start = time.perf_counter()
+        connection.request('GET', PATHS[(offset + i) % len(PATHS)])
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        if response.status != 200:
+            raise RuntimeError(f"query failed with status {response.status}")
+    connection.close()
+
+
+def load(apts, cache_size, clients, requests):
+    """
+    Returns:
+        tuple: (sorted latencies in seconds, queries per second)
+    """
+    service = QueryService(apts, cache_size=cache_size)
+    with QueryServer(service, ('127.0.0.1', 0)) as server:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        latencies = []
+        threads = [threading.Thread(target=run_client,
+                                    args=(server.server_address[:2], requests, i, latencies))
+                   for i in range(clients)]
+
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - start
+        server.shutdown()
+
+    latencies.sort()
+    return latencies, len(latencies) / seconds
+
+
+def script_latencies(path, runs):
+    """
+    Returns:
+        list: Sorted seconds taken by a new interpreter to answer one query
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', SCRIPT, path], cwd=here,
+                       check=True, stdout=subprocess.DEVNULL)
+        latencies.append(time.perf_counter() - start)
+    return sorted(latencies)
+
+
+def report(name, latencies, rate=None):
+    rate = f"{rate:12,.0f}" if rate is not None else f"{'-':>12}"
+    print(f"{name:>16}{percentile(latencies, 50) * 1000:12.3f}"
+          f"{percentile(latencies, 99) * 1000:12.3f}{rate}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--count', type=int, default=100000, help="number of apartments")
+    parser.add_argument('--clients', type=int, default=8, help="concurrent connections")
+    parser.add_argument('--requests', type=int, default=500, help="requests per client")
+    parser.add_argument('--script-runs', type=int, default=10,
+                        help="queries answered by a new process, 0 to skip")
+    args = parser.parse_args()
+
+    apts = random_apts(args.count, seed=1)
+
+    print(f"{args.count} apartments, {args.clients} clients")
+    print(f"{'':>16}{'p50 ms':>12}{'p99 ms':>12}{'queries/s':>12}")
+    latencies, rate = load(apts, 1024, args.clients, args.requests)
+    report('server, cached', latencies, rate)
+    # without the cache every query scans the inventory, so send fewer
+    latencies, rate = load(apts, 0, args.clients, max(1, args.requests // 50))
+    report('server, no cache', latencies, rate)
+
+    if args.script_runs:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'inventory.bin')
+            write_inventory(path, apts)
+            report('new process', script_latencies(path, args.script_runs))
+
+
+if __name__ == '__main__':
+    main()
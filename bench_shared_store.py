@@ -0,0 +1,113 @@
+"""
+Memory benchmark of the shared-memory apartment store.
+
+Starts worker processes that each run the mmn15 aggregates over the same
+inventory, once with their own copy of the apartment list and once
+attached to a SharedStoreWriter store. Reports the private memory each
+worker added to hold the inventory and the time of one round of
+aggregates.
+
+Usage:
+    python bench_shared_store.py [--count N] [--workers W]
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import argparse
+import multiprocessing
+import os
+import time
+
+import apartment_table
+import mmn15
+from shared_store import SharedStoreReader, SharedStoreWriter
+from synthetic import random_apts
+
+FUNCTIONS = ('average_price', 'how_many_rooftop', 'how_many_apt_type',
+             'top_price', 'only_valid_apts')
+
+
+def private_rss():
+    """
+    Returns:
+        int: Resident memory private to this process in bytes; shared
+             memory segments are not included (Linux only)
+    """
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('RssAnon:'):
+                return int(line.split()[1]) * 1024
+    raise OSError("RssAnon is not reported by this system")
+
+
+def copy_worker(count):
+    """
+    Build a private inventory and aggregate it.
+
+    Returns:
+        tuple: (bytes added to hold the inventory, seconds of one round)
+    """
+    before = private_rss()
+    apts = random_apts(count, seed=1)
+    added = private_rss() - before
+
+    start = time.perf_counter()
+    for name in FUNCTIONS:
+        getattr(mmn15, name)(apts)
+    return added, time.perf_counter() - start
+
+
+def shared_worker(name):
+    """
+    Attach to the store and aggregate it.
+
+    Returns:
+        tuple: (bytes added to hold the inventory, seconds of one round)
+    """
+    before = private_rss()
+    with SharedStoreReader(name) as reader:
+        table = reader.get_table()
+        # touch every column so its pages are mapped into this process
+        int(table.get_floor().sum() + table.get_area().sum())
+        added = private_rss() - before
+
+        start = time.perf_counter()
+        for function in FUNCTIONS:
+            getattr(apartment_table, function)(table)
+        seconds = time.perf_counter() - start
+        del table
+    return added, seconds
+
+
+def run(worker, argument, workers):
+    """
+    Returns:
+        tuple: (average bytes added per worker, average seconds per round)
+    """
+    # spawned workers start empty, unlike forked ones
+    with multiprocessing.get_context('spawn').Pool(workers) as pool:
+        results = pool.map(worker, [argument] * workers)
+    return (sum(added for added, _ in results) / workers,
+            sum(seconds for _, seconds in results) / workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--count', type=int, default=1000000, help="number of apartments")
+    parser.add_argument('--workers', type=int, default=4, help="number of worker processes")
+    args = parser.parse_args()
+
+    print(f"{args.count} apartments, {args.workers} workers")
+    print(f"{'':>8}{'MB per worker':>16}{'seconds per round':>20}")
+
+    added, seconds = run(copy_worker, args.count, args.workers)
+    print(f"{'copy':>8}{added / 1e6:16.1f}{seconds:20.3f}")
+
+    with SharedStoreWriter(f"aptstore_bench_{os.getpid()}") as writer:
+        writer.publish(random_apts(args.count, seed=1))
+        added, seconds = run(shared_worker, writer.get_name(), args.workers)
+    print(f"{'shared':>8}{added / 1e6:16.1f}{seconds:20.3f}")
+
+
+if __name__ == '__main__':
+    main()
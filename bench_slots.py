@@ -0,0 +1,119 @@
+"""
+Memory and construction benchmark of the apartment classes.
+
+Compares the slotted apartment classes with equivalent classes that keep
+their attributes in a per-instance __dict__ (the layout before __slots__
+was added). Reports bytes per instance and constructions per second for
+each apartment type.
+
+Usage:
+    python bench_slots.py [--count N]
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from apt import Apt
+from special_apt import SpecialApt
+from garden_apt import GardenApt
+from roof_apt import RoofApt
+
+
+# __dict__ based equivalents with the same constructors
+
+class DictApt:
+    def __init__(self, floor, area):
+        self._floor = floor
+        self._area = area
+
+
+class DictSpecialApt(DictApt):
+    def __init__(self, floor, area, has_view):
+        super().__init__(floor, area)
+        self._has_view = has_view
+
+
+class DictGardenApt(DictSpecialApt):
+    def __init__(self, area, garden_area):
+        super().__init__(0, area, has_view=False)
+        self._garden_area = garden_area
+
+
+class DictRoofApt(DictSpecialApt):
+    def __init__(self, floor, area, has_pool):
+        super().__init__(floor, area, has_view=True)
+        self._has_pool = has_pool
+
+
+CASES = [
+    ("Apt", DictApt, Apt, (3, 100)),
+    ("SpecialApt", DictSpecialApt, SpecialApt, (3, 100, True)),
+    ("GardenApt", DictGardenApt, GardenApt, (100, 50)),
+    ("RoofApt", DictRoofApt, RoofApt, (12, 100, True)),
+]
+
+
+def bytes_per_instance(cls, args, count):
+    """
+    Measure the memory held by each instance of a class.
+
+    Args:
+        cls (type): The class to instantiate
+        args (tuple): Constructor arguments
+        count (int): Number of instances to build
+
+    Returns:
+        float: Allocated bytes per instance
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    instances = [cls(*args) for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # the list holding the instances is not part of the instances
+    list_bytes = instances.__sizeof__()
+    return (after - before - list_bytes) / count
+
+
+def constructions_per_second(cls, args, count):
+    """
+    Measure how many instances of a class are built per second.
+
+    Args:
+        cls (type): The class to instantiate
+        args (tuple): Constructor arguments
+        count (int): Number of instances to build
+
+    Returns:
+        float: Constructions per second
+    """
+    start = time.perf_counter()
+    for _ in range(count):
+        cls(*args)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--count', type=int, default=200000, help="instances per measurement")
+    args = parser.parse_args()
+
+    print(f"{'type':12}{'dict B/obj':>12}{'slots B/obj':>13}"
+          f"{'dict obj/s':>14}{'slots obj/s':>14}")
+    for name, dict_cls, slots_cls, ctor_args in CASES:
+        dict_bytes = bytes_per_instance(dict_cls, ctor_args, args.count)
+        slots_bytes = bytes_per_instance(slots_cls, ctor_args, args.count)
+        dict_rate = constructions_per_second(dict_cls, ctor_args, args.count)
+        slots_rate = constructions_per_second(slots_cls, ctor_args, args.count)
+        print(f"{name:12}{dict_bytes:12.1f}{slots_bytes:13.1f}"
+              f"{dict_rate:14,.0f}{slots_rate:14,.0f}")
+
+
+if __name__ == '__main__':
+    main()
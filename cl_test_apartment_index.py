@@ -0,0 +1,146 @@
+import random
+import unittest
+from apt import Apt
+from special_apt import SpecialApt
+from roof_apt import RoofApt
+import mmn15
+import pricing
+from apartment_index import ApartmentIndex
+from synthetic import random_apts
+
+
+def brute_force_valid(apts, threshold):
+    """Reference only_valid_apts with a configurable threshold."""
+    valid = [apt for apt in apts
+             if type(apt).__name__ not in ('Apt', 'GardenApt')
+             and apt.get_has_view() and apt.get_price() > threshold]
+    return valid or None
+
+
+class TestApartmentIndex(unittest.TestCase):
+    """Test suite for the ApartmentIndex secondary indexes"""
+
+    def test_matches_mmn15(self):
+        """Test that a fresh index answers like the mmn15 functions"""
+        apts = random_apts(1000, seed=31)
+        index = ApartmentIndex(apts)
+        self.assertEqual(len(index), len(apts))
+        self.assertEqual(index.only_valid_apts(), mmn15.only_valid_apts(apts))
+        self.assertEqual(index.how_many_rooftop(), mmn15.how_many_rooftop(apts))
+        self.assertEqual(index.how_many_apt_type(), mmn15.how_many_apt_type(apts))
+
+    def test_thresholds(self):
+        """Test valid apartment queries with configurable thresholds"""
+        apts = random_apts(500, seed=32)
+        index = ApartmentIndex(apts)
+        for threshold in (0, 1000000, 2500000, 3000000, 10 ** 9):
+            with self.subTest(threshold=threshold):
+                expected = brute_force_valid(apts, threshold)
+                self.assertEqual(index.only_valid_apts(threshold), expected)
+                self.assertEqual(index.count_valid_apts(threshold), len(expected or []))
+
+    def test_rooftop_min_floor(self):
+        """Test rooftop counts restricted to high floors"""
+        apts = random_apts(500, seed=33)
+        index = ApartmentIndex(apts)
+        for min_floor in (0, 10, 25, 31):
+            with self.subTest(min_floor=min_floor):
+                expected = mmn15.how_many_rooftop([apt for apt in apts
+                                                   if apt.get_floor() >= min_floor])
+                self.assertEqual(index.how_many_rooftop(min_floor), expected)
+
+    def test_insert_and_delete(self):
+        """Test that random inserts and deletes keep the index consistent"""
+        rng = random.Random(34)
+        index = ApartmentIndex()
+        live = {}
+        for apt in random_apts(600, seed=35):
+            live[index.insert(apt)] = apt
+            if rng.random() < 0.3:
+                apt_id = rng.choice(list(live))
+                index.delete(apt_id)
+                del live[apt_id]
+
+        apts = [live[apt_id] for apt_id in sorted(live)]
+        self.assertEqual(index.only_valid_apts(2000000), brute_force_valid(apts, 2000000))
+        self.assertEqual(index.how_many_rooftop(12),
+                         mmn15.how_many_rooftop([apt for apt in apts if apt.get_floor() >= 12]))
+        self.assertEqual(index.how_many_apt_type(), mmn15.how_many_apt_type(apts))
+
+    def assert_selects(self, index, apts, **conditions):
+        """Check select and count against a plain loop over apts"""
+        def meets(apt):
+            price, floor = apt.get_price(), apt.get_floor()
+            has_view = apt.SUPPORTS_VIEW and apt.get_has_view()
+            has_pool = apt.SUPPORTS_POOL and apt.get_has_pool()
+            types = conditions.get('types')
+            return ((conditions.get('min_price') is None or price >= conditions['min_price'])
+                    and (conditions.get('max_price') is None or price <= conditions['max_price'])
+                    and (conditions.get('min_floor') is None or floor >= conditions['min_floor'])
+                    and (conditions.get('max_floor') is None or floor <= conditions['max_floor'])
+                    and (types is None or type(apt).__name__ in types)
+                    and conditions.get('has_view', has_view) == has_view
+                    and conditions.get('has_pool', has_pool) == has_pool)
+
+        expected = [apt for apt in apts if meets(apt)]
+        with self.subTest(**conditions):
+            self.assertEqual(index.select(**conditions), expected)
+            self.assertEqual(index.count(**conditions), len(expected))
+
+    def test_select(self):
+        """Test price-range, floor-range, type, view and pool queries"""
+        rng = random.Random(37)
+        index = ApartmentIndex()
+        live = {}
+        for apt in random_apts(800, seed=38):
+            live[index.insert(apt)] = apt
+            if rng.random() < 0.2:
+                apt_id = rng.choice(list(live))
+                index.delete(apt_id)
+                del live[apt_id]
+        apts = [live[apt_id] for apt_id in sorted(live)]
+
+        self.assert_selects(index, apts)
+        self.assert_selects(index, apts, min_price=2000000, max_price=2500000)
+        self.assert_selects(index, apts, max_price=1500000)
+        self.assert_selects(index, apts, min_floor=10, max_floor=12)
+        self.assert_selects(index, apts, min_floor=30)
+        self.assert_selects(index, apts, types=['GardenApt', 'RoofApt'])
+        self.assert_selects(index, apts, has_view=True, max_floor=5)
+        self.assert_selects(index, apts, has_view=False, min_price=3000000)
+        self.assert_selects(index, apts, has_pool=True, min_floor=20, min_price=2500000)
+        self.assert_selects(index, apts, has_pool=False, types=['RoofApt'])
+        self.assert_selects(index, apts, min_price=4000000, max_price=3000000)
+        with pricing.configured(PRICE_PER_SQR_METER=10000):
+            self.assert_selects(index, apts, min_price=1000000, max_price=1500000)
+
+    def test_duplicates_and_unknown_id(self):
+        """Test equal apartments get separate ids and unknown ids are rejected"""
+        index = ApartmentIndex()
+        first = index.insert(RoofApt(floor=10, area=130, has_pool=True))
+        second = index.insert(RoofApt(floor=10, area=130, has_pool=True))
+        index.insert(SpecialApt(floor=5, area=120, has_view=True))
+        index.insert(Apt(floor=3, area=200))
+
+        index.delete(first)
+        self.assertEqual(index.how_many_rooftop(), 1)
+        self.assertIs(index.only_valid_apts()[0], index.get(second))
+        with self.assertRaises(KeyError):
+            index.delete(first)
+
+    def test_follows_pricing_configure(self):
+        """Test that apartments are repriced after the constants change"""
+        apts = random_apts(500, seed=36)
+        index = ApartmentIndex(apts)
+        index.only_valid_apts()
+        with pricing.configured(PRICE_PER_SQR_METER=10000):
+            extra = SpecialApt(floor=40, area=200, has_view=True)
+            index.insert(extra)
+            apts.append(extra)
+            self.assertEqual(index.count_valid_apts(), len(mmn15.only_valid_apts(apts)))
+            self.assertEqual(index.only_valid_apts(), mmn15.only_valid_apts(apts))
+        self.assertEqual(index.only_valid_apts(), mmn15.only_valid_apts(apts))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
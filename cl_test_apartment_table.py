@@ -0,0 +1,94 @@
+import unittest
+from apt import Apt
+from special_apt import SpecialApt
+from garden_apt import GardenApt
+from roof_apt import RoofApt
+import mmn15
+import apartment_table
+from apartment_table import ApartmentTable
+from synthetic import random_apts
+
+
+class TestApartmentTable(unittest.TestCase):
+    """Test suite for the ApartmentTable columnar container"""
+
+    def setUp(self):
+        """Set up one apartment of each type"""
+        self.apts = [
+            Apt(floor=1, area=100),
+            SpecialApt(floor=5, area=120, has_view=True),
+            GardenApt(area=150, garden_area=50),
+            RoofApt(floor=10, area=130, has_pool=True)
+        ]
+        self.table = ApartmentTable.from_apts(self.apts)
+
+    def test_len(self):
+        """Test that the table has one row per apartment"""
+        self.assertEqual(len(self.table), 4)
+        self.assertEqual(len(ApartmentTable.from_apts([])), 0)
+
+    def test_rows_round_trip(self):
+        """Test that every row materializes back to an equal apartment"""
+        for index, apt in enumerate(self.apts):
+            with self.subTest(apt=type(apt).__name__):
+                row_apt = self.table.apt_at(index)
+                self.assertIs(type(row_apt), type(apt))
+                self.assertEqual(row_apt, apt)
+
+    def test_prices_match_get_price(self):
+        """Test that vectorized prices equal get_price for every type"""
+        apts = random_apts(500, seed=1)
+        prices = ApartmentTable.from_apts(apts).get_prices()
+        self.assertEqual(prices.tolist(), [apt.get_price() for apt in apts])
+
+    def test_mismatched_columns(self):
+        """Test that columns of different lengths are rejected"""
+        with self.assertRaises(ValueError):
+            ApartmentTable([0, 0], [1, 2], [10], [False, False], [False, False], [0, 0])
+
+    def test_unknown_type(self):
+        """Test that objects which are not apartments are rejected"""
+        with self.assertRaises(AttributeError):
+            ApartmentTable.from_apts([object()])
+
+
+class TestTableFunctions(unittest.TestCase):
+    """Test that the table-aware functions match the mmn15 functions"""
+
+    def assert_matches_mmn15(self, apts):
+        table = ApartmentTable.from_apts(apts)
+        self.assertEqual(apartment_table.average_price(table), mmn15.average_price(apts))
+        self.assertEqual(apartment_table.how_many_rooftop(table), mmn15.how_many_rooftop(apts))
+        self.assertEqual(apartment_table.how_many_apt_type(table), mmn15.how_many_apt_type(apts))
+        self.assertEqual(apartment_table.top_price(table), mmn15.top_price(apts))
+        self.assertEqual(apartment_table.only_valid_apts(table), mmn15.only_valid_apts(apts))
+
+    def test_empty_table(self):
+        """Test the functions on an empty table"""
+        table = ApartmentTable.from_apts([])
+        self.assertEqual(apartment_table.average_price(table), 0)
+        self.assertIsNone(apartment_table.top_price(table))
+        self.assertIsNone(apartment_table.only_valid_apts(table))
+        self.assert_matches_mmn15([])
+
+    def test_random_inventories(self):
+        """Test the functions on random inventories of all types"""
+        for seed in range(5):
+            with self.subTest(seed=seed):
+                self.assert_matches_mmn15(random_apts(300, seed))
+
+    def test_top_price_tie_returns_first(self):
+        """Test that top_price returns the first of several top apartments"""
+        apts = [Apt(floor=0, area=10), SpecialApt(floor=0, area=100, has_view=False),
+                Apt(floor=0, area=100)]
+        result = apartment_table.top_price(ApartmentTable.from_apts(apts))
+        self.assertIs(type(result), SpecialApt)
+
+    def test_only_valid_apts_none_valid(self):
+        """Test that only_valid_apts returns None when nothing qualifies"""
+        apts = [Apt(floor=3, area=100), GardenApt(area=200, garden_area=10)]
+        self.assertIsNone(apartment_table.only_valid_apts(ApartmentTable.from_apts(apts)))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,152 @@
+import unittest
+from apt import Apt
+import mmn15
+import pricing
+from apartment_table import ApartmentTable
+from approx_report import ApproximateReport
+from price_stats import price_percentile
+from synthetic import random_apts, REALISTIC_MIX
+
+
+class CountingApt(Apt):
+    """Apt that counts the get_price calls of all its instances"""
+
+    __slots__ = ()
+    calls = 0
+
+    def get_price(self):
+        CountingApt.calls += 1
+        return super().get_price()
+
+
+class TestApproximateReport(unittest.TestCase):
+    """Test suite for the sampled ApproximateReport"""
+
+    def assert_contains(self, estimate, value):
+        self.assertLessEqual(estimate['low'], value)
+        self.assertGreaterEqual(estimate['high'], value)
+
+    def test_empty_report(self):
+        """Test a report with no apartments"""
+        report = ApproximateReport()
+        self.assertEqual(report.average_price()['value'], 0)
+        self.assertEqual(report.how_many_rooftop()['value'], 0)
+        self.assertEqual(report.how_many_apt_type(), mmn15.how_many_apt_type([]))
+        self.assertIsNone(report.price_percentile(50))
+
+    def test_exact_when_fully_sampled(self):
+        """Test that a sample holding every apartment gives exact answers"""
+        apts = random_apts(1000, seed=51)
+        report = ApproximateReport(apts, sample_size=1000, seed=1)
+
+        average = report.average_price()
+        self.assertAlmostEqual(average['value'], mmn15.average_price(apts))
+        self.assertAlmostEqual(average['low'], average['high'])
+        self.assertEqual(report.how_many_rooftop(),
+                         {'value': mmn15.how_many_rooftop(apts),
+                          'low': mmn15.how_many_rooftop(apts),
+                          'high': mmn15.how_many_rooftop(apts)})
+        for q in (0, 1, 25, 50, 90, 99, 100):
+            with self.subTest(q=q):
+                expected = price_percentile(apts, q)
+                self.assertEqual(report.price_percentile(q),
+                                 {'value': expected, 'low': expected, 'high': expected})
+
+    def test_exact_percentile_ranks(self):
+        """Test percentiles whose rank q / 100 * n is inexact in floats"""
+        # 100 apartments on the ground floor, the one of rank r costs r * 20000
+        apts = [Apt(floor=0, area=area) for area in range(100, 0, -1)]
+        report = ApproximateReport(apts, sample_size=100, seed=7)
+        table_report = ApproximateReport(sample_size=100, seed=7)
+        table_report.update_table(ApartmentTable.from_apts(apts))
+        for q in (7, 14, 28, 55, 56):
+            with self.subTest(q=q):
+                self.assertEqual(report.price_percentile(q)['value'], q * 20000)
+                self.assertEqual(table_report.price_percentile(q)['value'], q * 20000)
+
+    def test_follows_pricing_configure(self):
+        """Test that sampled prices are recomputed after configure()"""
+        apts = random_apts(500, seed=57)
+        report = ApproximateReport(sample_size=500, seed=8)
+        report.update_table(ApartmentTable.from_apts(apts[:250]))
+        report.update(apts[250:])
+        report.price_percentile(50)
+
+        with pricing.configured(PRICE_PER_SQR_METER=1):
+            self.assertAlmostEqual(report.average_price()['value'], mmn15.average_price(apts))
+            self.assertEqual(report.price_percentile(50)['value'], price_percentile(apts, 50))
+        self.assertAlmostEqual(report.average_price()['value'], mmn15.average_price(apts))
+
+    def test_type_counts_are_exact(self):
+        """Test that type counts and proportions are counted, not sampled"""
+        apts = random_apts(5000, seed=52, mix=REALISTIC_MIX)
+        report = ApproximateReport(apts, sample_size=50, seed=2)
+        counts = mmn15.how_many_apt_type(apts)
+        self.assertEqual(report.how_many_apt_type(), counts)
+        for name, proportion in report.type_proportions().items():
+            self.assertEqual(proportion['value'], counts[name] / len(apts))
+            self.assertEqual(proportion['low'], proportion['high'])
+
+    def test_estimates_within_intervals(self):
+        """Test that the sampled estimates fall near the exact answers"""
+        apts = random_apts(20000, seed=53)
+        report = ApproximateReport(apts, sample_size=500, seed=3)
+        self.assertEqual(len(report), len(apts))
+        self.assertEqual(report.get_sample_size(), 500)
+
+        # 99.9% intervals, so a fixed seed should never fall outside
+        summary = report.summary(percentiles=(10, 50, 90), confidence=0.999)
+        self.assertEqual(summary['count'], len(apts))
+        self.assert_contains(summary['average_price'], mmn15.average_price(apts))
+        self.assert_contains(summary['how_many_rooftop'], mmn15.how_many_rooftop(apts))
+        for q, estimate in summary['price_percentiles'].items():
+            self.assert_contains(estimate, price_percentile(apts, q))
+
+        # wider confidence gives wider intervals
+        narrow = report.average_price(confidence=0.5)
+        self.assertLess(narrow['high'] - narrow['low'],
+                        summary['average_price']['high'] - summary['average_price']['low'])
+
+    def test_only_sampled_apartments_are_priced(self):
+        """Test that most added apartments are never priced"""
+        CountingApt.calls = 0
+        report = ApproximateReport(sample_size=10, seed=4)
+        for floor in range(4000):
+            report.add(CountingApt(floor, 100))
+        # 10 to fill the sample, then about 10 * ln(4000 / 10) replacements
+        self.assertGreaterEqual(CountingApt.calls, 10)
+        self.assertLess(CountingApt.calls, 200)
+
+    def test_table_matches_objects(self):
+        """Test sampling an ApartmentTable"""
+        apts = random_apts(3000, seed=55)
+        table = ApartmentTable.from_apts(apts)
+
+        report = ApproximateReport(sample_size=3000, seed=5)
+        report.update_table(table)
+        self.assertEqual(report.how_many_apt_type(), mmn15.how_many_apt_type(apts))
+        self.assertAlmostEqual(report.average_price()['value'], mmn15.average_price(apts))
+        self.assertEqual(report.how_many_rooftop()['value'], mmn15.how_many_rooftop(apts))
+        self.assertEqual(report.price_percentile(50)['value'], price_percentile(apts, 50))
+
+        # batches of rows and of objects feed the same samples
+        sampled = ApproximateReport(sample_size=200, seed=6)
+        sampled.update_table(table)
+        sampled.update(apts)
+        self.assertEqual(len(sampled), 2 * len(apts))
+        self.assertTrue(all(len(sample) == 200 for sample in sampled._samples.values()))
+        self.assert_contains(sampled.average_price(confidence=0.999), mmn15.average_price(apts))
+
+    def test_invalid_arguments(self):
+        """Test invalid sample sizes, percentiles and confidence levels"""
+        with self.assertRaises(ValueError):
+            ApproximateReport(sample_size=0)
+        report = ApproximateReport(random_apts(10, seed=56))
+        with self.assertRaises(ValueError):
+            report.price_percentile(101)
+        with self.assertRaises(ValueError):
+            report.average_price(confidence=1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
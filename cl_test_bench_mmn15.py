@@ -0,0 +1,54 @@
+import unittest
+from bench_mmn15 import BENCHMARKS, compare, run_suite
+
+
+def suite(results):
+    """Wrap benchmark results like run_suite does."""
+    return {'python': '3', 'machine': 'x86_64', 'repeat': 1, 'results': results}
+
+
+class TestBenchMmn15(unittest.TestCase):
+    """Test suite for the mmn15 performance suite and its regression check"""
+
+    def setUp(self):
+        """Set up a baseline with two sizes"""
+        self.baseline = suite({'1000': {'get_price': 100.0, 'top_price': 50.0},
+                               '10000': {'get_price': 90.0}})
+
+    def test_no_regressions(self):
+        """Test results within the tolerance, or faster"""
+        current = suite({'1000': {'get_price': 81.0, 'top_price': 500.0},
+                         '10000': {'get_price': 90.0}})
+        self.assertEqual(compare(self.baseline, current, 0.2), [])
+
+    def test_regression(self):
+        """Test that a slowdown beyond the tolerance is reported"""
+        current = suite({'1000': {'get_price': 79.0, 'top_price': 50.0},
+                         '10000': {'get_price': 90.0}})
+        self.assertEqual(compare(self.baseline, current, 0.2),
+                         [('1000', 'get_price', 100.0, 79.0)])
+
+    def test_missing_results_fail(self):
+        """Test that benchmarks or sizes missing from the current run are reported"""
+        current = suite({'1000': {'get_price': 100.0, 'top_price_renamed': 50.0}})
+        self.assertEqual(compare(self.baseline, current, 0.2),
+                         [('1000', 'top_price', 50.0, None),
+                          ('10000', 'get_price', 90.0, None)])
+
+    def test_extra_results_ignored(self):
+        """Test that benchmarks new since the baseline do not fail"""
+        current = suite({'1000': {'get_price': 100.0, 'top_price': 50.0, 'new': 1.0},
+                         '10000': {'get_price': 90.0}, '100': {'get_price': 1.0}})
+        self.assertEqual(compare(self.baseline, current, 0.2), [])
+
+    def test_run_suite(self):
+        """Test that a small run measures every benchmark and compares clean"""
+        results = run_suite([50], repeat=1)
+        self.assertEqual(list(results['results']), ['50'])
+        self.assertEqual(set(results['results']['50']), set(BENCHMARKS))
+        self.assertTrue(all(rate > 0 for rate in results['results']['50'].values()))
+        self.assertEqual(compare(results, results, 0), [])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
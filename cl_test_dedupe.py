@@ -0,0 +1,98 @@
+import copy
+import itertools
+import unittest
+from apt import Apt
+from special_apt import SpecialApt
+from garden_apt import GardenApt
+from roof_apt import RoofApt
+from dedupe import dedupe, group_duplicates
+from synthetic import random_apts
+
+
+def small_pool():
+    """Apartments of every type sharing a few floors and areas."""
+    pool = []
+    for floor, area in itertools.product((0, 1), (50, 60)):
+        pool.append(Apt(floor, area))
+        pool.append(SpecialApt(floor, area, True))
+        pool.append(SpecialApt(floor, area, False))
+        pool.append(RoofApt(floor, area, True))
+        pool.append(RoofApt(floor, area, False))
+    for area, garden_area in itertools.product((50, 60), (0, 10)):
+        pool.append(GardenApt(area, garden_area))
+    return pool
+
+
+class TestHashAgreesWithEq(unittest.TestCase):
+    """Test that __hash__ agrees with __eq__ for every pair of types"""
+
+    def test_all_apartments_hashable(self):
+        """Test that every apartment type can be hashed"""
+        for apt in small_pool():
+            with self.subTest(apt=type(apt).__name__):
+                self.assertIsInstance(hash(apt), int)
+
+    def test_equal_implies_same_hash(self):
+        """Test every ordered pair, including copies of each apartment"""
+        pool = small_pool()
+        copies = [copy.copy(apt) for apt in pool]
+        for first, second in itertools.product(pool, pool + copies):
+            if first == second:
+                with self.subTest(first=str(first), second=str(second)):
+                    self.assertEqual(hash(first), hash(second))
+
+    def test_special_apt_vs_apt(self):
+        """Test the cross-type rule between SpecialApt and a basic Apt"""
+        basic = Apt(floor=1, area=100)
+        special = SpecialApt(floor=1, area=100, has_view=False)
+        # equal base attributes share a hash bucket whatever the comparison says
+        self.assertEqual(hash(basic), hash(special))
+        self.assertEqual(basic == special, special == basic)
+
+    def test_set_membership_follows_eq(self):
+        """Test that sets treat apartments like == does"""
+        pool = small_pool()
+        seen = set(pool)
+        for apt in pool:
+            self.assertIn(copy.copy(apt), seen)
+        self.assertEqual(len(seen), len(pool))
+
+
+class TestDedupe(unittest.TestCase):
+    """Test suite for dedupe and group_duplicates"""
+
+    def setUp(self):
+        """Set up an inventory with heavy duplication"""
+        self.apts = random_apts(300, seed=51) * 3 + random_apts(100, seed=52)
+
+    def brute_force_unique(self, apts):
+        unique = []
+        for apt in apts:
+            if not any(apt == other for other in unique):
+                unique.append(apt)
+        return unique
+
+    def test_dedupe_matches_pairwise(self):
+        """Test dedupe against the quadratic pairwise definition"""
+        result = dedupe(self.apts)
+        expected = self.brute_force_unique(self.apts)
+        self.assertEqual(len(result), len(expected))
+        for apt, expected_apt in zip(result, expected):
+            self.assertIs(apt, expected_apt)
+
+    def test_group_duplicates(self):
+        """Test that groups hold exactly the equal apartments in order"""
+        groups = group_duplicates(self.apts)
+        self.assertEqual([group[0] for group in groups], dedupe(self.apts))
+        self.assertEqual(sum(len(group) for group in groups), len(self.apts))
+        for group in groups:
+            self.assertTrue(all(apt == group[0] for apt in group))
+
+    def test_empty(self):
+        """Test both functions on empty input"""
+        self.assertEqual(dedupe([]), [])
+        self.assertEqual(group_duplicates(iter([])), [])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,123 @@
+import csv
+import io
+import json
+import os
+import tempfile
+import unittest
+from apt import Apt
+from special_apt import SpecialApt
+from garden_apt import GardenApt
+from roof_apt import RoofApt
+from export import (CSV, JSONL, STR, ExportWriter, export_apts, format_apts,
+                    parse_str_line, parse_str_lines, read_str_file)
+from loader import load_apts
+from records import FIELDS, apt_to_record
+from synthetic import random_apts
+
+
+class TestExport(unittest.TestCase):
+    """Test suite for the bulk exporters and the str format parser"""
+
+    def setUp(self):
+        """Set up a random inventory and a temporary directory"""
+        self.apts = random_apts(1000, seed=71)
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Remove the temporary files"""
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def test_formats_match_per_object_output(self):
+        """Test that every format equals the per-apartment conversions"""
+        self.assertEqual(format_apts(self.apts, STR), [str(apt) for apt in self.apts])
+        self.assertEqual(format_apts(self.apts, JSONL),
+                         [json.dumps(apt_to_record(apt)) for apt in self.apts])
+
+        rows = io.StringIO()
+        writer = csv.DictWriter(rows, FIELDS, lineterminator='\n')
+        writer.writerows(apt_to_record(apt) for apt in self.apts)
+        self.assertEqual(format_apts(self.apts, CSV), rows.getvalue().splitlines())
+
+    def test_unregistered_subclass(self):
+        """Test that an unregistered subclass is exported as its ancestor"""
+        class PenthouseApt(RoofApt):
+            __slots__ = ()
+
+        penthouse = PenthouseApt(floor=30, area=200, has_pool=True)
+        self.assertEqual(format_apts([penthouse]), [str(penthouse)])
+        self.assertEqual(json.loads(format_apts([penthouse], JSONL)[0])['type'], 'RoofApt')
+
+    def test_files_round_trip(self):
+        """Test writing every format in batches and reading it back"""
+        for name in ('apts.txt', 'apts.csv', 'apts.jsonl'):
+            with self.subTest(name=name):
+                path = self.path(name)
+                self.assertEqual(export_apts(path, iter(self.apts), batch_size=64), len(self.apts))
+                if name.endswith('.txt'):
+                    self.assertEqual(read_str_file(path), self.apts)
+                else:
+                    apts, errors = load_apts(path, workers=0)
+                    self.assertEqual(errors, [])
+                    self.assertEqual(apts, self.apts)
+
+    def test_csv_file_matches_dict_writer(self):
+        """Test that a CSV file equals the output of csv.DictWriter"""
+        rows = io.StringIO()
+        writer = csv.DictWriter(rows, FIELDS)
+        writer.writeheader()
+        writer.writerows(apt_to_record(apt) for apt in self.apts)
+
+        path = self.path('apts.csv')
+        export_apts(path, self.apts, batch_size=64)
+        with open(path, newline='') as file:
+            self.assertEqual(file.read(), rows.getvalue())
+
+    def test_writer_appends_batches(self):
+        """Test several writes to one file"""
+        path = self.path('apts.txt')
+        with ExportWriter(path) as writer:
+            writer.write(self.apts[:10])
+            writer.write([])
+            writer.write(self.apts[10:])
+            self.assertEqual(writer.get_count(), len(self.apts))
+        with open(path) as file:
+            self.assertEqual(file.read().splitlines(), [str(apt) for apt in self.apts])
+
+    def test_parse_str_classes(self):
+        """Test that each str text is parsed into the right class"""
+        apts = [Apt(floor=3, area=80), SpecialApt(floor=4, area=90, has_view=False),
+                GardenApt(area=120, garden_area=40), RoofApt(floor=12, area=150, has_pool=True)]
+        parsed = parse_str_lines(str(apt) + '\n' for apt in apts)
+        self.assertEqual([type(apt) for apt in parsed], [type(apt) for apt in apts])
+        self.assertEqual(parsed, apts)
+        self.assertEqual(parse_str_line(str(apts[2])), apts[2])
+
+    def test_parse_str_errors(self):
+        """Test that text that is not an apartment is rejected"""
+        bad_lines = [
+            "floor: 3",
+            "floor: 3, area: big",
+            "floor: 3, area: 80, has_view: yes",
+            "floor: 3, area: 80, garden_area: 5",
+            "floor: 2, area: 80, has_view: False, garden_area: 5",  # gardens are on floor 0
+            "floor: 9, area: 80, has_view: False, has_pool: True",  # roofs always have a view
+            "not an apartment",
+        ]
+        for line in bad_lines:
+            with self.subTest(line=line):
+                with self.assertRaises(ValueError):
+                    parse_str_line(line)
+
+    def test_unknown_format(self):
+        """Test that unknown formats are rejected"""
+        with self.assertRaises(ValueError):
+            format_apts(self.apts, 'xml')
+        with self.assertRaises(ValueError):
+            ExportWriter(self.path('apts.xml'))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
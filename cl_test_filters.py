@@ -0,0 +1,118 @@
+import unittest
+from unittest import mock
+import mmn15
+from apartment_table import ApartmentTable
+from apt import Apt
+from filters import TYPE, FLOOR, AREA, GARDEN_AREA, PRICE, HAS_VIEW, HAS_POOL
+from garden_apt import GardenApt
+from roof_apt import RoofApt
+from special_apt import SpecialApt
+from synthetic import random_apts
+
+
+class TestFilters(unittest.TestCase):
+    """Test suite for compiled filter expressions"""
+
+    def setUp(self):
+        self.apts = random_apts(1500, seed=121)
+        self.table = ApartmentTable.from_apts(self.apts)
+
+    def assert_filters(self, predicate, reference):
+        """Check a predicate on objects and on the table against a plain loop"""
+        expected = [apt for apt in self.apts if reference(apt)]
+        self.assertEqual(predicate.filter(self.apts), expected)
+        self.assertEqual([self.table.apt_at(row) for row in predicate.select(self.table)],
+                         expected)
+        self.assertEqual([predicate.matches(apt) for apt in self.apts],
+                         [bool(reference(apt)) for apt in self.apts])
+        self.assertEqual([predicate.matches_priced(apt, apt.get_price()) for apt in self.apts],
+                         [bool(reference(apt)) for apt in self.apts])
+
+    def test_fields_and_flags(self):
+        """Test every field and flag"""
+        self.assert_filters(FLOOR >= 20, lambda apt: apt.get_floor() >= 20)
+        self.assert_filters(AREA < 50, lambda apt: apt.get_area() < 50)
+        self.assert_filters(GARDEN_AREA > 100,
+                            lambda apt: isinstance(apt, GardenApt) and apt.get_garden_area() > 100)
+        self.assert_filters(PRICE <= 1000000, lambda apt: apt.get_price() <= 1000000)
+        self.assert_filters(HAS_POOL, lambda apt: isinstance(apt, RoofApt) and apt.get_has_pool())
+        self.assert_filters(TYPE == 'GardenApt', lambda apt: type(apt) is GardenApt)
+        self.assert_filters(TYPE != Apt, lambda apt: type(apt) is not Apt)
+
+    def test_combinations(self):
+        """Test &, | and ~"""
+        def with_view(apt):
+            return isinstance(apt, SpecialApt) and not isinstance(apt, GardenApt) \
+                and apt.get_has_view()
+
+        self.assert_filters(TYPE.isin({SpecialApt, RoofApt}) & HAS_VIEW & (PRICE > 2000000)
+                            & (FLOOR >= 3),
+                            lambda apt: with_view(apt) and apt.get_price() > 2000000
+                            and apt.get_floor() >= 3)
+        self.assert_filters((FLOOR < 2) | HAS_POOL | (AREA == 100),
+                            lambda apt: apt.get_floor() < 2 or apt.get_area() == 100
+                            or (isinstance(apt, RoofApt) and apt.get_has_pool()))
+        self.assert_filters(~HAS_VIEW & ~(TYPE == 0), lambda apt: not with_view(apt)
+                            and type(apt) is not Apt)
+
+    def test_cheap_terms_first(self):
+        """Test that prices are only computed when the cheap terms pass"""
+        priced = []
+
+        class CountingApt(SpecialApt):
+            def get_price(self):
+                priced.append(self)
+                return super().get_price()
+
+        apts = [CountingApt(5, 100, view) for view in (True, False, False, True)]
+        predicate = (PRICE > 0) & HAS_VIEW
+        self.assertEqual(predicate.filter(apts), [apts[0], apts[3]])
+        self.assertEqual(priced, [apts[0], apts[3]])
+
+    def test_only_valid_apts(self):
+        """Test that only_valid_apts gives the same results through the filter"""
+        def only_valid_loop(apts):
+            valid = [apt for apt in apts if apt.SUPPORTS_VIEW and apt.get_has_view()
+                     and apt.get_price() > mmn15.MILLION]
+            return valid or None
+
+        self.assertEqual(mmn15.only_valid_apts(self.apts), only_valid_loop(self.apts))
+        self.assertIsNone(mmn15.only_valid_apts([Apt(50, 200), GardenApt(200, 10)]))
+        self.assertIsNone(mmn15.only_valid_apts([]))
+
+    def test_million_read_at_call_time(self):
+        """Test that changing mmn15.MILLION changes only_valid_apts everywhere"""
+        from apartment_index import ApartmentIndex
+        from apartment_table import only_valid_apts
+        from report import ApartmentReport
+
+        index = ApartmentIndex(self.apts)
+        with_view = [apt for apt in self.apts if apt.SUPPORTS_VIEW and apt.get_has_view()]
+        with mock.patch.object(mmn15, 'MILLION', 0):
+            self.assertEqual(mmn15.only_valid_apts(self.apts), with_view)
+            self.assertEqual(only_valid_apts(self.table), with_view)
+            self.assertEqual(ApartmentReport(self.apts).only_valid_apts(), with_view)
+            self.assertEqual(index.only_valid_apts(), with_view)
+        self.assertEqual(index.only_valid_apts(), mmn15.only_valid_apts(self.apts))
+        self.assertNotEqual(mmn15.only_valid_apts(self.apts), with_view)
+
+    def test_no_truth_value(self):
+        """Test that and, or, not and chained comparisons are rejected"""
+        with self.assertRaises(TypeError):
+            3 <= FLOOR <= 5
+        with self.assertRaises(TypeError):
+            (FLOOR >= 5) and (PRICE > 0)
+        with self.assertRaises(TypeError):
+            (FLOOR >= 5) or (PRICE > 0)
+        with self.assertRaises(TypeError):
+            not HAS_VIEW
+        self.assert_filters((FLOOR >= 3) & (FLOOR <= 5), lambda apt: 3 <= apt.get_floor() <= 5)
+
+    def test_unknown_type_name(self):
+        """Test that type names must be registered"""
+        with self.assertRaises(ValueError):
+            TYPE == 'Castle'
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,103 @@
+import unittest
+from apt import Apt
+from special_apt import SpecialApt
+from garden_apt import GardenApt
+from roof_apt import RoofApt
+import mmn15
+import apartment_table
+from apartment_table import ApartmentTable
+from group_by import AGGREGATES, GroupKey, area_bucket, floor_band, group_by, group_by_table
+from synthetic import random_apts
+
+
+class TestGroupBy(unittest.TestCase):
+    """Test suite for the group_by aggregation engine"""
+
+    def setUp(self):
+        """Set up a random inventory"""
+        self.apts = random_apts(2000, seed=61)
+
+    def test_matches_manual_grouping(self):
+        """Test every aggregate against grouping by hand with the mmn15 functions"""
+        groups = group_by(self.apts, keys=('type', 'has_pool'), aggs=AGGREGATES)
+
+        manual = {}
+        for apt in self.apts:
+            has_pool = isinstance(apt, RoofApt) and apt.get_has_pool()
+            manual.setdefault((type(apt).__name__, has_pool), []).append(apt)
+
+        self.assertEqual(list(groups), list(manual))
+        for key, apts in manual.items():
+            with self.subTest(key=key):
+                prices = [apt.get_price() for apt in apts]
+                self.assertEqual(groups[key]['count'], len(apts))
+                self.assertEqual(groups[key]['sum_price'], sum(prices))
+                self.assertEqual(groups[key]['avg_price'], mmn15.average_price(apts))
+                self.assertEqual(groups[key]['min_price'], min(prices))
+                self.assertEqual(groups[key]['max_price'], max(prices))
+                self.assertIs(groups[key]['top_price'], mmn15.top_price(apts))
+
+    def test_bands_and_buckets(self):
+        """Test floor bands and area buckets reported by their lower bound"""
+        apts = [Apt(floor=0, area=49), Apt(floor=4, area=50),
+                Apt(floor=5, area=99), GardenApt(area=60, garden_area=10)]
+        self.assertEqual(group_by(apts, keys=(floor_band(5), area_bucket(50))),
+                         {(0, 0): {'count': 1}, (0, 50): {'count': 2}, (5, 50): {'count': 1}})
+        self.assertEqual(group_by(apts, keys='floor_band'), {(0,): {'count': 3}, (5,): {'count': 1}})
+
+    def test_view_flag(self):
+        """Test that types without a view group with apartments without one"""
+        apts = [Apt(floor=1, area=100), SpecialApt(floor=1, area=100, has_view=False),
+                SpecialApt(floor=1, area=100, has_view=True), RoofApt(floor=9, area=80, has_pool=False)]
+        self.assertEqual(group_by(apts, keys='has_view'), {(False,): {'count': 2}, (True,): {'count': 2}})
+
+    def test_count_does_not_price(self):
+        """Test that counting groups never calls get_price"""
+        class UnpricedApt(Apt):
+            __slots__ = ()
+
+            def get_price(self):
+                raise AssertionError("get_price called")
+
+        apts = [UnpricedApt(floor=1, area=100)] * 3
+        self.assertEqual(group_by(apts), {('Apt',): {'count': 3}})
+
+    def test_generator_and_custom_key(self):
+        """Test a one-shot generator and a user defined GroupKey"""
+        big = GroupKey('big', "apt._area >= 100", lambda table: table.get_area() >= 100)
+        groups = group_by((apt for apt in self.apts), keys=(big,), aggs=('count',))
+        expected = sum(1 for apt in self.apts if apt.get_area() >= 100)
+        self.assertEqual(groups[(True,)]['count'], expected)
+        self.assertEqual(groups[(False,)]['count'], len(self.apts) - expected)
+
+    def test_table_matches_objects(self):
+        """Test that grouping a table gives the same groups in the same order"""
+        table = ApartmentTable.from_apts(self.apts)
+        for keys in (('type',), ('has_view', 'has_pool'),
+                     ('type', 'floor_band', 'area_bucket', 'has_view', 'has_pool')):
+            with self.subTest(keys=keys):
+                expected = group_by(self.apts, keys=keys, aggs=AGGREGATES)
+                result = group_by_table(table, keys=keys, aggs=AGGREGATES)
+                self.assertEqual(list(result.items()), list(expected.items()))
+        self.assertEqual(group_by_table(ApartmentTable.from_apts([])), {})
+
+    def test_how_many_apt_type_is_grouping(self):
+        """Test how_many_apt_type as a group by type with a count"""
+        counts = {key[0]: results['count'] for key, results in group_by(self.apts).items()}
+        self.assertEqual(mmn15.how_many_apt_type(self.apts),
+                         {name: counts.get(name, 0) for name in ('Apt', 'SpecialApt', 'GardenApt', 'RoofApt')})
+        self.assertEqual(apartment_table.how_many_apt_type(ApartmentTable.from_apts(self.apts)),
+                         mmn15.how_many_apt_type(self.apts))
+
+    def test_invalid_arguments(self):
+        """Test unknown keys and aggregates"""
+        with self.assertRaises(ValueError):
+            group_by(self.apts, keys=('color',))
+        with self.assertRaises(ValueError):
+            group_by(self.apts, aggs=('median_price',))
+        with self.assertRaises(ValueError):
+            group_by(self.apts, keys=())
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
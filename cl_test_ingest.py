@@ -0,0 +1,158 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+import mmn15
+from ingest import IngestPipeline, file_lines, stream_lines
+from records import apt_to_record
+from synthetic import random_apts
+
+
+def json_lines(apts):
+    return [json.dumps(apt_to_record(apt)) + '\n' for apt in apts]
+
+
+async def list_lines(lines):
+    for line in lines:
+        yield line
+
+
+class TestIngestPipeline(unittest.IsolatedAsyncioTestCase):
+    """Test suite for the asyncio ingestion pipeline"""
+
+    def assert_matches_mmn15(self, snapshot, apts):
+        self.assertEqual(snapshot['count'], len(apts))
+        self.assertEqual(snapshot['average_price'], mmn15.average_price(apts))
+        self.assertEqual(snapshot['how_many_rooftop'], mmn15.how_many_rooftop(apts))
+        self.assertEqual(snapshot['how_many_apt_type'], mmn15.how_many_apt_type(apts))
+
+    async def test_socket_pipe_and_file_producers(self):
+        """Test three kinds of local producers feeding one pipeline"""
+        socket_apts = random_apts(300, seed=81)
+        pipe_apts = random_apts(200, seed=82)
+        file_apts = random_apts(100, seed=83)
+
+        async def serve(reader, writer):
+            writer.writelines(line.encode() for line in json_lines(socket_apts))
+            await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(serve, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        socket_reader, socket_writer = await asyncio.open_connection('127.0.0.1', port)
+
+        read_fd, write_fd = os.pipe()
+        loop = asyncio.get_running_loop()
+        pipe_reader = asyncio.StreamReader()
+        transport, _ = await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(pipe_reader), os.fdopen(read_fd, 'rb'))
+
+        async def write_pipe():
+            with os.fdopen(write_fd, 'wb') as pipe:
+                for line in json_lines(pipe_apts):
+                    await asyncio.to_thread(pipe.write, line.encode())
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'apts.jsonl')
+            with open(path, 'w') as file:
+                file.writelines(json_lines(file_apts))
+
+            pipeline = IngestPipeline(queue_size=2, batch_size=16)
+            writer_task = asyncio.create_task(write_pipe())
+            await pipeline.run(pipeline.feed(stream_lines(socket_reader), 'socket'),
+                               pipeline.feed(stream_lines(pipe_reader), 'pipe'),
+                               pipeline.feed(file_lines(path), 'file'))
+            await writer_task
+
+        transport.close()
+        socket_writer.close()
+        server.close()
+        await server.wait_closed()
+
+        self.assert_matches_mmn15(pipeline.snapshot(), socket_apts + pipe_apts + file_apts)
+
+    async def test_snapshots_during_ingestion(self):
+        """Test that snapshots grow while producers are still running"""
+        apts = random_apts(400, seed=84)
+        pipeline = IngestPipeline(queue_size=1, batch_size=10)
+        counts = []
+
+        async def watch():
+            while True:
+                counts.append(pipeline.snapshot()['count'])
+                await asyncio.sleep(0)
+
+        watcher = asyncio.create_task(watch())
+        report = await pipeline.run(pipeline.feed(list_lines(json_lines(apts))))
+        watcher.cancel()
+
+        self.assertTrue(any(0 < count < len(apts) for count in counts))
+        self.assertIs(report.top_price(), report.top_price())
+        self.assert_matches_mmn15(pipeline.snapshot(), apts)
+        self.assertEqual(report.top_price(), mmn15.top_price(apts))
+        self.assertEqual(report.only_valid_apts(), mmn15.only_valid_apts(apts))
+
+    async def test_bad_lines_reported(self):
+        """Test that bad lines are skipped and reported with line numbers"""
+        lines = json_lines(random_apts(3, seed=85))
+        lines.insert(1, '{"type": "Castle"}\n')
+        lines.insert(3, '\n')
+        lines.append('not json\n')
+        lines.append('{"type": "Apt", "floor": 2.9, "area": 100}\n')
+        lines.append('{"type": "Apt", "floor": 1e400, "area": 100}\n')
+        pipeline = IngestPipeline()
+        await pipeline.run(pipeline.feed(list_lines(lines), 'test'))
+
+        self.assertEqual(pipeline.snapshot()['count'], 3)
+        self.assertEqual([(source, number) for source, number, _ in pipeline.get_errors()],
+                         [('test', 2), ('test', 6), ('test', 7), ('test', 8)])
+
+    def assert_no_pending_tasks(self):
+        current = asyncio.current_task()
+        self.assertEqual([task for task in asyncio.all_tasks() if task is not current], [])
+
+    async def test_consumer_failure(self):
+        """Test that a failing consumer stops producers blocked on the queue"""
+        def parse(line):
+            return object()  # the report cannot price it
+
+        pipeline = IngestPipeline(queue_size=1, batch_size=1, parse=parse)
+        endless = list_lines(json_lines(random_apts(1, seed=86)) * 10000)
+        with self.assertRaises(AttributeError):
+            await asyncio.wait_for(pipeline.run(pipeline.feed(endless),
+                                                pipeline.feed(list_lines(['x'] * 100))), 3)
+        self.assert_no_pending_tasks()
+
+    async def test_producer_failure(self):
+        """Test that a failing producer cancels the other producers"""
+        async def broken_lines():
+            yield json_lines(random_apts(1, seed=87))[0]
+            raise OSError("connection reset")
+
+        async def endless_lines():
+            line = json_lines(random_apts(1, seed=88))[0]
+            while True:
+                yield line
+                await asyncio.sleep(0)
+
+        pipeline = IngestPipeline(queue_size=1, batch_size=1)
+        with self.assertRaises(OSError):
+            await asyncio.wait_for(pipeline.run(pipeline.feed(broken_lines()),
+                                                pipeline.feed(endless_lines())), 3)
+        self.assert_no_pending_tasks()
+
+    async def test_cancelled_run(self):
+        """Test that cancelling run cancels its producers and consumer"""
+        async def stalled_lines():
+            await asyncio.Event().wait()
+            yield ''
+
+        pipeline = IngestPipeline()
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(pipeline.run(pipeline.feed(stalled_lines())), 0.1)
+        self.assert_no_pending_tasks()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
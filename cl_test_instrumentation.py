@@ -0,0 +1,113 @@
+import json
+import os
+import tempfile
+import unittest
+import instrumentation
+import mmn15
+import price_cache
+from apt import Apt
+from garden_apt import GardenApt
+from roof_apt import RoofApt
+from special_apt import SpecialApt
+
+
+class TestInstrumentation(unittest.TestCase):
+    """Test suite for get_price and mmn15 instrumentation"""
+
+    def setUp(self):
+        self.originals = {cls: cls.__dict__.get('get_price')
+                          for cls in (Apt, SpecialApt, GardenApt, RoofApt)}
+        self.original_functions = {name: getattr(mmn15, name)
+                                   for name in instrumentation.INSTRUMENTED_FUNCTIONS}
+        self.apts = [Apt(1, 100), SpecialApt(3, 90, True), GardenApt(80, 20),
+                     RoofApt(10, 150, True)]
+        instrumentation.reset()
+
+    def tearDown(self):
+        instrumentation.disable()
+        price_cache.disable()
+        instrumentation.reset()
+
+    def assert_restored(self):
+        for cls, method in self.originals.items():
+            self.assertIs(cls.__dict__.get('get_price'), method)
+        for name, function in self.original_functions.items():
+            self.assertIs(getattr(mmn15, name), function)
+
+    def test_disabled_by_default(self):
+        """Test that nothing is wrapped or recorded while disabled"""
+        self.assertFalse(instrumentation.is_enabled())
+        mmn15.average_price(self.apts)
+        data = instrumentation.snapshot()
+        self.assertEqual(data['get_price']['Apt'], {'calls': 0, 'seconds': 0})
+        self.assertEqual(data['functions']['average_price']['calls'], 0)
+        self.assert_restored()
+
+    def test_counts_per_type_and_function(self):
+        """Test call counts by apartment type and by mmn15 function"""
+        instrumentation.enable()
+        mmn15.average_price(self.apts)
+        mmn15.top_price(self.apts)
+        mmn15.how_many_apt_type(self.apts)
+        data = instrumentation.snapshot()
+
+        self.assertEqual({name: stats['calls'] for name, stats in data['get_price'].items()},
+                         {'Apt': 2, 'SpecialApt': 2, 'GardenApt': 2, 'RoofApt': 2})
+        self.assertEqual(data['functions']['average_price']['calls'], 1)
+        self.assertEqual(data['functions']['only_valid_apts']['calls'], 0)
+        self.assertGreater(data['functions']['top_price']['seconds'], 0)
+
+        instrumentation.disable()
+        self.assert_restored()
+        self.assertEqual(instrumentation.snapshot(), data)
+
+    def test_combines_with_price_cache(self):
+        """Test enabling and disabling together with price_cache in any order"""
+        # instrumentation inside the cache only sees misses
+        for first, second, timed_calls in ((instrumentation, price_cache, 4),
+                                           (price_cache, instrumentation, 8)):
+            with self.subTest(first=first.__name__):
+                self.apts = [Apt(1, 100), SpecialApt(3, 90, True), GardenApt(80, 20),
+                             RoofApt(10, 150, True)]
+                instrumentation.reset()
+                price_cache.reset_stats()
+                first.enable()
+                second.enable()
+
+                prices = [apt.get_price() for apt in self.apts]
+                self.assertEqual(prices, [apt.get_price() for apt in self.apts])
+                calls = sum(stats['calls'] for stats
+                            in instrumentation.snapshot()['get_price'].values())
+                self.assertEqual(calls, timed_calls)
+                self.assertEqual(price_cache.stats()['misses'], 4)
+
+                first.disable()
+                self.assertTrue(second.is_enabled())
+                self.apts[0].get_price()
+                second.disable()
+                self.assert_restored()
+
+    def test_dumps(self):
+        """Test the JSON and Prometheus files"""
+        instrumentation.enable()
+        mmn15.how_many_rooftop(self.apts)
+        self.apts[3].get_price()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path = os.path.join(tmp, 'stats.json')
+            prom_path = os.path.join(tmp, 'stats.prom')
+            instrumentation.dump_json(json_path)
+            instrumentation.dump_prometheus(prom_path)
+
+            with open(json_path) as file:
+                self.assertEqual(json.load(file), instrumentation.snapshot())
+            with open(prom_path) as file:
+                text = file.read()
+
+        self.assertIn('# TYPE apt_get_price_calls_total counter\n', text)
+        self.assertIn('apt_get_price_calls_total{type="RoofApt"} 1\n', text)
+        self.assertIn('mmn15_function_calls_total{function="how_many_rooftop"} 1\n', text)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import mmn15
+from apt import Apt
+from garden_apt import GardenApt
+import apartment_table
+from inventory_file import InventoryReader, InventoryWriter, write_inventory
+from synthetic import random_apts
+
+
+class TestInventoryFile(unittest.TestCase):
+    """Test suite for the binary inventory file format"""
+
+    def setUp(self):
+        """Create a temporary directory for the files"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'inventory.bin')
+
+    def tearDown(self):
+        """Remove the temporary files"""
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        """Test that every apartment is read back as an equal object"""
+        apts = random_apts(500, seed=21)
+        write_inventory(self.path, apts)
+        reader = InventoryReader(self.path)
+
+        self.assertEqual(len(reader), len(apts))
+        self.assertEqual(list(reader), apts)
+        self.assertEqual(reader[-1], apts[-1])
+        with self.assertRaises(IndexError):
+            reader[len(apts)]
+
+    def test_file_size(self):
+        """Test that every record takes 16 bytes after a 16 byte header"""
+        write_inventory(self.path, random_apts(100, seed=22))
+        self.assertEqual(os.path.getsize(self.path), 16 + 100 * 16)
+
+    def test_batched_writes(self):
+        """Test that several batches are appended in order"""
+        apts = random_apts(300, seed=23)
+        with InventoryWriter(self.path) as writer:
+            writer.write(apts[:100])
+            writer.write(apts[100:])
+        self.assertEqual(list(InventoryReader(self.path)), apts)
+
+    def test_aggregates_over_mapped_file(self):
+        """Test the mmn15 aggregates directly over the mapped columns"""
+        apts = random_apts(1000, seed=24)
+        write_inventory(self.path, apts)
+        reader = InventoryReader(self.path)
+        table = reader.get_table()
+
+        # the columns are views into the mapping, not copies
+        self.assertTrue(np.shares_memory(table.get_floor(), reader.get_records()))
+        self.assertEqual(apartment_table.average_price(table), mmn15.average_price(apts))
+        self.assertEqual(apartment_table.how_many_rooftop(table), mmn15.how_many_rooftop(apts))
+        self.assertEqual(apartment_table.how_many_apt_type(table), mmn15.how_many_apt_type(apts))
+        self.assertEqual(apartment_table.top_price(table), mmn15.top_price(apts))
+        self.assertEqual(apartment_table.only_valid_apts(table), mmn15.only_valid_apts(apts))
+
+    def test_empty_inventory(self):
+        """Test a file without records"""
+        write_inventory(self.path, [])
+        reader = InventoryReader(self.path)
+        self.assertEqual(len(reader), 0)
+        self.assertIsNone(apartment_table.top_price(reader.get_table()))
+
+    def test_invalid_file(self):
+        """Test that other files are rejected"""
+        with open(self.path, 'wb') as file:
+            file.write(b'not an inventory')
+        with self.assertRaises(ValueError):
+            InventoryReader(self.path)
+
+    def test_values_out_of_range(self):
+        """Test that values the 32-bit fields cannot hold are rejected"""
+        for apt in (Apt(1, 2 ** 31 + 5), Apt(-2 ** 31 - 1, 80),
+                    GardenApt(area=80, garden_area=2 ** 32)):
+            with self.subTest(apt=str(apt)):
+                with self.assertRaises(ValueError):
+                    write_inventory(self.path, [apt])
+        write_inventory(self.path, [Apt(2 ** 31 - 1, -2 ** 31)])
+        self.assertEqual(list(InventoryReader(self.path)), [Apt(2 ** 31 - 1, -2 ** 31)])
+
+    def test_unknown_type_code(self):
+        """Test that records of unknown types are not read as roof apartments"""
+        write_inventory(self.path, [Apt(3, 80), Apt(4, 90)])
+        with open(self.path, 'r+b') as file:
+            file.seek(16 + 16)
+            file.write(bytes([9]))
+        reader = InventoryReader(self.path)
+        self.assertEqual(reader[0], Apt(3, 80))
+        with self.assertRaises(ValueError):
+            reader[1]
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
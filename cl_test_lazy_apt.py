@@ -0,0 +1,63 @@
+import pickle
+import unittest
+import mmn15
+from roof_apt import RoofApt
+from special_apt import SpecialApt
+from lazy_apt import LazyInventory, LazyRoofApt
+from synthetic import random_apts
+
+
+class TestLazyInventory(unittest.TestCase):
+    """Test suite for proxy apartments over an ApartmentTable"""
+
+    def setUp(self):
+        self.apts = random_apts(2000, seed=91)
+        self.inventory = LazyInventory.from_apts(self.apts)
+
+    def test_rows_behave_like_apartments(self):
+        """Test getters, price, equality, hash and str of every proxy"""
+        self.assertEqual(len(self.inventory), len(self.apts))
+        for apt, proxy in zip(self.apts, self.inventory):
+            self.assertIsInstance(proxy, type(apt))
+            self.assertEqual(proxy, apt)
+            self.assertEqual(apt, proxy)
+            self.assertEqual(hash(proxy), hash(apt))
+            self.assertEqual(str(proxy), str(apt))
+            self.assertEqual(proxy.get_price(), apt.get_price())
+            self.assertEqual(proxy.get_floor(), apt.get_floor())
+            self.assertEqual(proxy.get_area(), apt.get_area())
+
+    def test_mmn15_functions(self):
+        """Test that the mmn15 functions accept the inventory unchanged"""
+        for name in ('average_price', 'how_many_rooftop', 'how_many_apt_type',
+                     'top_price', 'only_valid_apts'):
+            with self.subTest(function=name):
+                function = getattr(mmn15, name)
+                self.assertEqual(function(self.inventory), function(self.apts))
+
+    def test_indexing(self):
+        """Test negative indexes, slices and out of range rows"""
+        self.assertEqual(self.inventory[-1], self.apts[-1])
+        self.assertEqual(list(self.inventory[10:20]), self.apts[10:20])
+        self.assertEqual(list(self.inventory[::-7]), self.apts[::-7])
+        with self.assertRaises(IndexError):
+            self.inventory[len(self.apts)]
+
+    def test_proxies_compare_with_each_other(self):
+        """Test that two proxies of equal rows are equal"""
+        inventory = LazyInventory.from_apts([SpecialApt(3, 90, True), SpecialApt(3, 90, True),
+                                             SpecialApt(3, 90, False)])
+        self.assertEqual(inventory[0], inventory[1])
+        self.assertNotEqual(inventory[0], inventory[2])
+
+    def test_pickle_as_real_apartment(self):
+        """Test that a pickled proxy loads as the real apartment"""
+        proxy = LazyInventory.from_apts([RoofApt(10, 150, True)])[0]
+        self.assertIsInstance(proxy, LazyRoofApt)
+        copy = pickle.loads(pickle.dumps(proxy))
+        self.assertIs(type(copy), RoofApt)
+        self.assertEqual(copy, RoofApt(10, 150, True))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,94 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+from loader import ChunkedLoader, load_apts
+from records import FIELDS, apt_to_record
+from synthetic import random_apts
+
+
+class TestChunkedLoader(unittest.TestCase):
+    """Test suite for the chunked CSV and JSON Lines loader"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.apts = random_apts(500, seed=111)
+
+        self.csv_path = os.path.join(self.tmp.name, 'apts.csv')
+        with open(self.csv_path, 'w', newline='') as file:
+            writer = csv.DictWriter(file, FIELDS)
+            writer.writeheader()
+            writer.writerows(apt_to_record(apt) for apt in self.apts)
+
+        self.jsonl_path = os.path.join(self.tmp.name, 'apts.jsonl')
+        with open(self.jsonl_path, 'w') as file:
+            file.writelines(json.dumps(apt_to_record(apt)) + '\n' for apt in self.apts)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_formats_and_workers(self):
+        """Test that small chunks load in file order with and without workers"""
+        for path in (self.csv_path, self.jsonl_path):
+            for workers in (0, 2):
+                with self.subTest(path=os.path.basename(path), workers=workers):
+                    with ChunkedLoader(path, chunk_size=1000, workers=workers) as loader:
+                        batches = list(loader)
+                        self.assertGreater(len(batches), 10)
+                        self.assertEqual([apt for batch in batches for apt in batch], self.apts)
+                        self.assertEqual(loader.get_errors(), [])
+
+    def test_columnar_batches(self):
+        """Test ApartmentTable batches"""
+        with ChunkedLoader(self.jsonl_path, chunk_size=4000, workers=0, columnar=True) as loader:
+            apts = [table.apt_at(i) for table in loader for i in range(len(table))]
+        self.assertEqual(apts, self.apts)
+
+    def test_bad_rows_reported_with_line_numbers(self):
+        """Test that bad rows are skipped and reported with file line numbers"""
+        with open(self.csv_path) as file:
+            lines = file.readlines()
+        lines[3] = 'Castle,1,2,False,False,0\n'
+        lines[10] = 'Apt,1\n'
+        lines.insert(20, '\n')
+        with open(self.csv_path, 'w') as file:
+            file.writelines(lines)
+
+        apts, errors = load_apts(self.csv_path, chunk_size=300, workers=2)
+        self.assertEqual([line for line, _ in errors], [4, 11])
+        self.assertEqual(len(apts), len(self.apts) - 2)
+
+        with open(self.jsonl_path, 'a') as file:
+            file.write('{"type": "Apt", "floor": 1}\n')
+            file.write('{"type": "Apt", "floor": 1e400, "area": 1}\n')
+        _, errors = load_apts(self.jsonl_path, workers=0)
+        self.assertEqual([line for line, _ in errors], [len(self.apts) + 1, len(self.apts) + 2])
+
+    def test_unknown_format(self):
+        """Test that the format must be known"""
+        with self.assertRaises(ValueError):
+            ChunkedLoader(os.path.join(self.tmp.name, 'apts.txt'), workers=0)
+
+    def test_byte_order_mark(self):
+        """Test files starting with a UTF-8 byte order mark"""
+        for path in (self.csv_path, self.jsonl_path):
+            with self.subTest(path=os.path.basename(path)):
+                with open(path, 'rb') as file:
+                    data = file.read()
+                with open(path, 'wb') as file:
+                    file.write(b'\xef\xbb\xbf' + data)
+                apts, errors = load_apts(path, workers=0)
+                self.assertEqual(errors, [])
+                self.assertEqual(apts, self.apts)
+
+    def test_missing_columns(self):
+        """Test that a CSV header without the required columns is rejected"""
+        with open(self.csv_path, 'w') as file:
+            file.write('kind,floor,size\nApt,1,80\n')
+        with self.assertRaisesRegex(ValueError, 'type, area'):
+            load_apts(self.csv_path, workers=0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
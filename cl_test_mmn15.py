@@ -3,6 +3,7 @@ from apt import Apt
 from special_apt import SpecialApt
 from garden_apt import GardenApt
 from roof_apt import RoofApt
+from apt import APT_TYPES
 from mmn15 import (
     average_price,
     how_many_rooftop,
@@ -468,6 +469,113 @@ class TestEdgeCases(unittest.TestCase):
         self.assertEqual(apt_both_zero, Apt(floor=0, area=0))
 
 
+class TestApartmentSlots(unittest.TestCase):
+    """Test that apartments are compact slotted objects"""
+
+    def test_no_instance_dict(self):
+        """Test that no apartment type carries a per-instance __dict__"""
+        apartments = [
+            Apt(floor=1, area=100),
+            SpecialApt(floor=1, area=100, has_view=True),
+            GardenApt(area=100, garden_area=50),
+            RoofApt(floor=10, area=100, has_pool=True)
+        ]
+
+        for apt in apartments:
+            with self.subTest(apt=type(apt).__name__):
+                self.assertFalse(hasattr(apt, '__dict__'))
+                with self.assertRaises(AttributeError):
+                    apt.unknown_attribute = 1
+
+    def test_slotted_attributes_still_work(self):
+        """Test getters, equality and str on slotted apartments"""
+        roof = RoofApt(floor=10, area=100, has_pool=True)
+        self.assertEqual(roof.get_floor(), 10)
+        self.assertEqual(roof.get_has_view(), True)
+        self.assertEqual(roof, RoofApt(floor=10, area=100, has_pool=True))
+        self.assertEqual(str(roof), "floor: 10, area: 100, has_view: True, has_pool: True")
+
+
+class TestTypeRegistry(unittest.TestCase):
+    """Test the type code registry the mmn15 functions dispatch on"""
+
+    def test_registered_types(self):
+        """Test the codes and capability flags of the four apartment types"""
+        self.assertEqual(APT_TYPES, {0: Apt, 1: SpecialApt, 2: GardenApt, 3: RoofApt})
+        self.assertEqual([cls.SUPPORTS_VIEW for cls in (Apt, SpecialApt, GardenApt, RoofApt)],
+                         [False, True, False, True])
+        self.assertEqual([cls.SUPPORTS_POOL for cls in (Apt, SpecialApt, GardenApt, RoofApt)],
+                         [False, False, False, True])
+
+    def test_unregistered_subclass_counts_as_ancestor(self):
+        """Test that a fifth, unregistered subclass does not crash the functions"""
+        class PenthouseApt(RoofApt):
+            pass
+
+        penthouse = PenthouseApt(floor=30, area=200, has_pool=True)
+        apts = [Apt(floor=1, area=100), penthouse]
+
+        self.assertEqual(how_many_apt_type(apts),
+                         {'Apt': 1, 'SpecialApt': 0, 'GardenApt': 0, 'RoofApt': 1})
+        self.assertEqual(how_many_rooftop(apts), 1)
+        self.assertEqual(only_valid_apts(apts), [penthouse])
+        self.assertNotIn(PenthouseApt, APT_TYPES.values())
+
+    def test_duplicate_type_code(self):
+        """Test that two classes cannot share a type code"""
+        with self.assertRaises(ValueError):
+            class ClashingApt(Apt):
+                TYPE_CODE = RoofApt.TYPE_CODE
+        self.assertIs(APT_TYPES[RoofApt.TYPE_CODE], RoofApt)
+
+
+class TestBulkFactories(unittest.TestCase):
+    """Test the from_arrays and from_records bulk factories"""
+
+    def test_from_records_matches_constructor(self):
+        """Test that bulk-built apartments equal constructed ones"""
+        cases = [
+            (Apt, [(1, 100), (5, 80)]),
+            (SpecialApt, [(3, 90, True), (4, 70, False)]),
+            (GardenApt, [(120, 40), (60, 10)]),
+            (RoofApt, [(10, 150, True), (12, 110, False)]),
+        ]
+        for cls, records in cases:
+            with self.subTest(cls=cls.__name__):
+                apts = cls.from_records(records)
+                expected = [cls(*record) for record in records]
+                self.assertEqual(apts, expected)
+                self.assertEqual([str(apt) for apt in apts], [str(apt) for apt in expected])
+                self.assertEqual([apt.get_price() for apt in apts],
+                                 [apt.get_price() for apt in expected])
+                self.assertTrue(all(type(apt) is cls for apt in apts))
+
+    def test_from_arrays_fixed_slots(self):
+        """Test that slots set by the constructors get their fixed values"""
+        roof, = RoofApt.from_arrays([10], [150], [False])
+        garden, = GardenApt.from_arrays([120], [40])
+        self.assertEqual(roof.get_has_view(), True)
+        self.assertEqual(garden.get_floor(), 0)
+        self.assertEqual(garden.get_has_view(), False)
+
+    def test_from_arrays_numpy_columns(self):
+        """Test that NumPy columns give plain Python values"""
+        import numpy as np
+        roof, = RoofApt.from_arrays(np.array([10]), np.array([150]), np.array([True]))
+        self.assertIs(type(roof.get_floor()), int)
+        self.assertIs(roof.get_has_pool(), True)
+
+    def test_bad_columns(self):
+        """Test that mismatched columns and records raise ValueError"""
+        with self.assertRaises(ValueError):
+            Apt.from_arrays([1, 2], [100])
+        with self.assertRaises(ValueError):
+            RoofApt.from_arrays([1], [100])
+        with self.assertRaises(ValueError):
+            SpecialApt.from_records([(1, 100)])
+        self.assertEqual(Apt.from_records([]), [])
+
+
 if __name__ == '__main__':
     # Run the tests
     unittest.main(verbosity=2)
\ No newline at end of file
@@ -0,0 +1,92 @@
+import pickle
+import unittest
+from unittest import mock
+from apt import Apt
+import mmn15
+import pricing
+from parallel import ParallelAggregator
+from synthetic import random_apts
+
+
+class TestParallelAggregator(unittest.TestCase):
+    """Test that the parallel aggregates equal the serial mmn15 results"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Load a random inventory into one worker pool for the whole suite"""
+        cls.apts = random_apts(2000, seed=11)
+        cls.aggregator = ParallelAggregator(cls.apts, workers=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Shut the worker pool down"""
+        cls.aggregator.close()
+
+    def assert_matches_serial(self, agg, apts):
+        self.assertEqual(agg.average_price(), mmn15.average_price(apts))
+        self.assertEqual(agg.how_many_rooftop(), mmn15.how_many_rooftop(apts))
+        self.assertEqual(agg.how_many_apt_type(), mmn15.how_many_apt_type(apts))
+        self.assertIs(agg.top_price(), mmn15.top_price(apts))
+
+        valid = agg.only_valid_apts()
+        expected = mmn15.only_valid_apts(apts)
+        if expected is None:
+            self.assertIsNone(valid)
+            return
+        self.assertEqual(len(valid), len(expected))
+        for apt, expected_apt in zip(valid, expected):
+            self.assertIs(apt, expected_apt)
+
+    def test_matches_serial(self):
+        """Test every aggregate on a random inventory"""
+        self.assertEqual(len(self.aggregator), len(self.apts))
+        self.assert_matches_serial(self.aggregator, self.apts)
+
+    def test_follows_pricing_configure(self):
+        """Test that workers take over constants configured after they started"""
+        self.aggregator.average_price()  # start the workers
+        with pricing.configured(PRICE_PER_SQR_METER=1, ADDITIONAL_PRICE_PER_FLOOR=200000):
+            self.assert_matches_serial(self.aggregator, self.apts)
+        self.assert_matches_serial(self.aggregator, self.apts)
+
+    def test_follows_million(self):
+        """Test that workers use the MILLION of the parent at query time"""
+        self.aggregator.average_price()  # start the workers
+        with mock.patch.object(mmn15, 'MILLION', 0):
+            self.assert_matches_serial(self.aggregator, self.apts)
+            self.assertEqual(len(self.aggregator.only_valid_apts()),
+                             sum(1 for apt in self.apts if apt.SUPPORTS_VIEW and apt.get_has_view()))
+
+    def test_empty_list(self):
+        """Test every aggregate on an empty list"""
+        with ParallelAggregator([], workers=2) as agg:
+            self.assertEqual(agg.average_price(), 0)
+            self.assertEqual(agg.how_many_rooftop(), 0)
+            self.assertEqual(agg.how_many_apt_type(),
+                             {'Apt': 0, 'SpecialApt': 0, 'GardenApt': 0, 'RoofApt': 0})
+            self.assertIsNone(agg.top_price())
+            self.assertIsNone(agg.only_valid_apts())
+
+    def test_load_replaces_inventory(self):
+        """Test that load switches the workers to a new list"""
+        apts = [Apt(floor=0, area=100) for _ in range(50)]
+        with ParallelAggregator(random_apts(100, seed=13), workers=2) as agg:
+            agg.average_price()
+            agg.load(apts)
+            self.assertEqual(len(agg), 50)
+            # a tie between shards returns the first apartment
+            self.assertIs(agg.top_price(), apts[0])
+            self.assertEqual(agg.average_price(), mmn15.average_price(apts))
+
+    def test_apartments_pickle_round_trip(self):
+        """Test that every apartment type survives the trip to a worker"""
+        for apt in random_apts(40, seed=12):
+            with self.subTest(apt=str(apt)):
+                copy = pickle.loads(pickle.dumps(apt))
+                self.assertIs(type(copy), type(apt))
+                self.assertEqual(copy, apt)
+                self.assertEqual(str(copy), str(apt))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,83 @@
+import random
+import unittest
+from apt import Apt
+import mmn15
+import pricing
+from portfolio import Portfolio
+from synthetic import random_apts
+
+
+class TestPortfolio(unittest.TestCase):
+    """Test suite for the incrementally aggregated Portfolio"""
+
+    def assert_matches_mmn15(self, portfolio):
+        apts = list(portfolio)
+        self.assertEqual(len(portfolio), len(apts))
+        self.assertEqual(portfolio.average_price(), mmn15.average_price(apts))
+        self.assertEqual(portfolio.how_many_rooftop(), mmn15.how_many_rooftop(apts))
+        self.assertEqual(portfolio.how_many_apt_type(), mmn15.how_many_apt_type(apts))
+        self.assertIs(portfolio.top_price(), mmn15.top_price(apts))
+
+    def test_empty_portfolio(self):
+        """Test the aggregates of an empty portfolio"""
+        portfolio = Portfolio()
+        self.assertEqual(portfolio.average_price(), 0)
+        self.assertIsNone(portfolio.top_price())
+        self.assert_matches_mmn15(portfolio)
+
+    def test_randomized_mutations(self):
+        """Test random adds, removes and replaces against the batch functions"""
+        rng = random.Random(61)
+        pool = random_apts(400, seed=62)
+        portfolio = Portfolio(pool[:50])
+        handles = list(range(50))
+
+        for step in range(1500):
+            action = rng.random()
+            if action < 0.4 or not handles:
+                handles.append(portfolio.add(rng.choice(pool)))
+            elif action < 0.7:
+                portfolio.remove(handles.pop(rng.randrange(len(handles))))
+            else:
+                portfolio.replace(rng.choice(handles), rng.choice(pool))
+
+            if step % 50 == 0:
+                self.assert_matches_mmn15(portfolio)
+
+        self.assert_matches_mmn15(portfolio)
+
+    def test_replace_keeps_position(self):
+        """Test that a replaced apartment keeps its place for tie-breaking"""
+        first = Apt(floor=0, area=10)
+        second = Apt(floor=0, area=100)
+        portfolio = Portfolio([first, second])
+        replacement = Apt(floor=0, area=100)
+        portfolio.replace(0, replacement)
+        self.assertIs(portfolio.top_price(), replacement)
+        self.assertEqual(list(portfolio), [replacement, second])
+
+    def test_remove_unknown_handle(self):
+        """Test that removing an unknown handle raises KeyError"""
+        portfolio = Portfolio([Apt(floor=1, area=100)])
+        portfolio.remove(0)
+        with self.assertRaises(KeyError):
+            portfolio.remove(0)
+        with self.assertRaises(KeyError):
+            portfolio.replace(0, Apt(floor=1, area=100))
+
+    def test_follows_pricing_configure(self):
+        """Test that apartments are repriced after the constants change"""
+        apts = random_apts(300, seed=45)
+        portfolio = Portfolio(apts)
+        portfolio.average_price()
+        with pricing.configured(PRICE_PER_SQR_METER=1, ADDITIONAL_PRICE_PER_FLOOR=200000):
+            handle = portfolio.add(Apt(floor=2, area=500))
+            portfolio.remove(handle)
+            self.assertEqual(portfolio.average_price(), mmn15.average_price(apts))
+            self.assertIs(portfolio.top_price(), mmn15.top_price(apts))
+        self.assertEqual(portfolio.average_price(), mmn15.average_price(apts))
+        self.assertIs(portfolio.top_price(), mmn15.top_price(apts))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
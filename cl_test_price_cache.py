@@ -0,0 +1,114 @@
+import sys
+import unittest
+from apt import Apt
+from special_apt import SpecialApt
+from garden_apt import GardenApt
+from roof_apt import RoofApt
+import mmn15
+import pricing
+import price_cache
+from lazy_apt import LazyInventory
+from synthetic import random_apts
+
+
+class TestPriceCache(unittest.TestCase):
+    """Test suite for the opt-in price cache"""
+
+    def setUp(self):
+        """Enable the cache with clean counters"""
+        price_cache.enable()
+        price_cache.reset_stats()
+
+    def tearDown(self):
+        """Disable the cache"""
+        price_cache.disable()
+        price_cache.reset_stats()
+
+    def test_disabled_by_default_after_disable(self):
+        """Test that disable restores the original get_price methods"""
+        price_cache.disable()
+        self.assertFalse(price_cache.is_enabled())
+        apt = Apt(floor=3, area=100)
+        apt.get_price()
+        apt.get_price()
+        self.assertEqual(price_cache.stats(), {'hits': 0, 'misses': 0})
+
+    def test_hits_and_misses(self):
+        """Test that each apartment is priced once and then served from cache"""
+        apts = [Apt(floor=1, area=100), SpecialApt(floor=5, area=120, has_view=True),
+                GardenApt(area=150, garden_area=50), RoofApt(floor=10, area=130, has_pool=True)]
+        first = [apt.get_price() for apt in apts]
+        second = [apt.get_price() for apt in apts]
+
+        self.assertEqual(first, second)
+        self.assertEqual(first, [2000000, 2428000, 3000000, 2726000])
+        self.assertEqual(price_cache.stats(), {'hits': 4, 'misses': 4})
+
+    def test_configure_invalidates(self):
+        """Test that reconfiguring pricing constants recomputes cached prices"""
+        roof = RoofApt(floor=10, area=130, has_pool=True)
+        self.assertEqual(roof.get_price(), 2726000)
+
+        with pricing.configured(POOL_PRICE=0):
+            self.assertEqual(roof.get_price(), 2696000)
+        self.assertEqual(roof.get_price(), 2726000)
+        self.assertEqual(price_cache.stats(), {'hits': 0, 'misses': 3})
+
+    def test_no_cache_slots(self):
+        """Test that cached prices are not stored on the apartments"""
+        class PlainApt:
+            __slots__ = ('_floor', '_area')
+
+        apt = Apt(floor=3, area=100)
+        apt.get_price()
+        self.assertEqual(sys.getsizeof(apt), sys.getsizeof(PlainApt()))
+
+    def test_clear(self):
+        """Test that clear drops the cached prices"""
+        apt = Apt(floor=3, area=100)
+        apt.get_price()
+        price_cache.clear()
+        apt.get_price()
+        self.assertEqual(price_cache.stats(), {'hits': 0, 'misses': 2})
+
+    def test_apartments_not_retained(self):
+        """Test that the cache holds no references to priced apartments"""
+        apt = RoofApt(floor=10, area=130, has_pool=True)
+        references = sys.getrefcount(apt)
+        apt.get_price()
+        self.assertEqual(sys.getrefcount(apt), references)
+
+    def test_equal_apartments_and_proxies_share_entries(self):
+        """Test that repeated passes over lazy proxies hit the cache"""
+        inventory = LazyInventory.from_apts(random_apts(1000, seed=3))
+        for _ in range(3):
+            mmn15.average_price(inventory)
+        stats = price_cache.stats()
+        self.assertLessEqual(stats['misses'], 1000)
+        self.assertEqual(stats['hits'] + stats['misses'], 3000)
+
+    def test_max_entries(self):
+        """Test that the oldest prices are dropped first"""
+        price_cache.enable(max_entries=2)
+        first, second, third = Apt(1, 100), Apt(1, 101), Apt(1, 102)
+        for apt in (first, second, first, third, second, first):
+            apt.get_price()
+        # third pushed out first, then first pushed out second
+        self.assertEqual(price_cache.stats(), {'hits': 2, 'misses': 4})
+
+    def test_configure_rejects_unknown_constant(self):
+        """Test that only pricing constants can be configured"""
+        with self.assertRaises(TypeError):
+            pricing.configure(MILLION=5)
+
+    def test_mmn15_results_unchanged(self):
+        """Test that the mmn15 functions give the same results with the cache"""
+        apts = random_apts(300, seed=2)
+        cached = (mmn15.average_price(apts), mmn15.top_price(apts), mmn15.only_valid_apts(apts))
+        price_cache.disable()
+        uncached = (mmn15.average_price(apts), mmn15.top_price(apts), mmn15.only_valid_apts(apts))
+        self.assertEqual(cached, uncached)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
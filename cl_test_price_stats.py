@@ -0,0 +1,98 @@
+import unittest
+from apt import Apt
+from special_apt import SpecialApt
+import mmn15
+from price_stats import top_k_price, bottom_k_price, price_percentile
+from synthetic import random_apts
+
+
+class CountingApt(Apt):
+    """Apt that counts its get_price calls"""
+
+    __slots__ = ('calls',)
+
+    def __init__(self, floor, area):
+        super().__init__(floor, area)
+        self.calls = 0
+
+    def get_price(self):
+        self.calls += 1
+        return super().get_price()
+
+
+class TestPriceStats(unittest.TestCase):
+    """Test suite for the top-K and percentile functions"""
+
+    def setUp(self):
+        """Set up a random inventory with many equal prices"""
+        self.apts = random_apts(400, seed=41)
+
+    def test_top_k_matches_stable_sort(self):
+        """Test top_k_price against a stable descending sort"""
+        expected = sorted(self.apts, key=lambda apt: apt.get_price(), reverse=True)
+        for k in (1, 5, 100, 400, 1000):
+            with self.subTest(k=k):
+                result = top_k_price(self.apts, k)
+                self.assertEqual(len(result), min(k, len(self.apts)))
+                for apt, expected_apt in zip(result, expected):
+                    self.assertIs(apt, expected_apt)
+
+    def test_bottom_k_matches_stable_sort(self):
+        """Test bottom_k_price against a stable ascending sort"""
+        expected = sorted(self.apts, key=lambda apt: apt.get_price())
+        result = bottom_k_price(self.apts, 50)
+        for apt, expected_apt in zip(result, expected[:50]):
+            self.assertIs(apt, expected_apt)
+
+    def test_top_1_is_top_price(self):
+        """Test that ties are broken like top_price, first seen wins"""
+        apt_a = Apt(area=100, floor=0)
+        apt_b = Apt(area=100, floor=0)
+        apts = [SpecialApt(floor=0, area=10, has_view=False), apt_a, apt_b]
+        self.assertIs(top_k_price(apts, 1)[0], mmn15.top_price(apts))
+        self.assertEqual(top_k_price(apts, 2), [apt_a, apt_b])
+        self.assertIs(top_k_price(apts, 2)[0], apt_a)
+
+    def test_streaming_and_empty(self):
+        """Test the functions over generators and empty input"""
+        expected = top_k_price(self.apts, 10)
+        self.assertEqual(top_k_price(iter(self.apts), 10), expected)
+        self.assertEqual(top_k_price([], 3), [])
+        self.assertEqual(top_k_price(self.apts, 0), [])
+        self.assertEqual(bottom_k_price(iter([]), 3), [])
+        self.assertIsNone(price_percentile(iter([]), 50))
+
+    def test_each_price_evaluated_once(self):
+        """Test that every apartment is priced exactly once"""
+        for func, arg in ((top_k_price, 5), (bottom_k_price, 5), (price_percentile, 90)):
+            with self.subTest(func=func.__name__):
+                apts = [CountingApt(floor, area) for floor in range(5) for area in range(20)]
+                func(apts, arg)
+                self.assertTrue(all(apt.calls == 1 for apt in apts))
+
+    def test_percentiles_nearest_rank(self):
+        """Test percentiles against hand-picked nearest ranks"""
+        # 100 apartments on the ground floor, the one of rank r costs r * 20000
+        apts = [Apt(floor=0, area=area) for area in range(100, 0, -1)]
+        ranks = {0: 1, 1: 1, 7: 7, 14: 14, 25: 25, 28: 28, 50: 50,
+                 55: 55, 56: 56, 90: 90, 99.5: 100, 100: 100}
+        for q, rank in ranks.items():
+            with self.subTest(q=q):
+                self.assertEqual(price_percentile(apts, q), rank * 20000)
+
+    def test_percentiles_of_random_inventory(self):
+        """Test that percentiles are prices at rank ceil(q * n / 100)"""
+        prices = sorted(apt.get_price() for apt in self.apts)
+        # 400 apartments: q percent is rank 4 * q
+        for q, rank in ((0, 1), (1, 4), (7, 28), (25, 100), (90, 360), (99.5, 398), (100, 400)):
+            with self.subTest(q=q):
+                self.assertEqual(price_percentile(self.apts, q), prices[rank - 1])
+
+    def test_percentile_range(self):
+        """Test that percentiles outside 0..100 are rejected"""
+        with self.assertRaises(ValueError):
+            price_percentile(self.apts, 101)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,129 @@
+import unittest
+from apt import Apt
+from special_apt import SpecialApt
+from garden_apt import GardenApt
+from roof_apt import RoofApt
+import pricing
+from pricing import make_price, price, price_batch
+from synthetic import random_apts
+
+
+def chain_price(apt):
+    """Reference price following the original get_price chain of each class."""
+    area_price = apt.get_area() * 20000
+    floor_price = apt.get_floor() * 5000
+    if apt.get_floor() <= 1:
+        floor_price = 0
+    total = area_price + floor_price
+
+    if isinstance(apt, SpecialApt) and apt.get_has_view():
+        total += apt.get_floor() * 600
+
+    if isinstance(apt, RoofApt):
+        total += 40000
+        if apt.get_has_pool():
+            total += 30000
+
+    return total
+
+
+class TestPricingParity(unittest.TestCase):
+    """Test that the closed-form pricing matches the get_price chain"""
+
+    def setUp(self):
+        """Set up a random inventory with edge floors added"""
+        self.apts = random_apts(1000, seed=7) + [
+            Apt(floor=-1, area=50), Apt(floor=1, area=50), Apt(floor=2, area=50),
+            SpecialApt(floor=0, area=50, has_view=True),
+            SpecialApt(floor=1, area=50, has_view=True),
+            RoofApt(floor=1, area=0, has_pool=True),
+            GardenApt(area=0, garden_area=0)
+        ]
+
+    def test_classes_match_chain(self):
+        """Test get_price of every class against the reference chain"""
+        for apt in self.apts:
+            with self.subTest(apt=str(apt)):
+                self.assertEqual(apt.get_price(), chain_price(apt))
+
+    def test_scalar_price(self):
+        """Test the scalar fast path for each combination of features"""
+        self.assertEqual(price(1, 100), 2000000)
+        self.assertEqual(price(5, 120, has_view=True), 2428000)
+        self.assertEqual(price(10, 130, True, True, True), 2726000)
+        self.assertEqual(price(8, 110, True, True, False), 2284800)
+        # a pool is only priced on roof apartments
+        self.assertEqual(price(8, 110, True, False, True), price(8, 110, True))
+
+    def test_price_batch_matches_chain(self):
+        """Test the batch engine against the reference chain"""
+        prices = price_batch(
+            [apt.get_floor() for apt in self.apts],
+            [apt.get_area() for apt in self.apts],
+            [isinstance(apt, SpecialApt) and apt.get_has_view() for apt in self.apts],
+            [isinstance(apt, RoofApt) for apt in self.apts],
+            [isinstance(apt, RoofApt) and apt.get_has_pool() for apt in self.apts]
+        )
+        self.assertEqual(prices.tolist(), [chain_price(apt) for apt in self.apts])
+
+    def test_price_batch_empty(self):
+        """Test the batch engine on empty input"""
+        self.assertEqual(len(price_batch([], [], [], [], [])), 0)
+
+    def test_make_price(self):
+        """Test the formula bound to fixed constants"""
+        constants = {name: getattr(pricing, name) for name in pricing.CONSTANT_NAMES}
+        default_price = make_price(constants)
+        cheap_price = make_price(dict(constants, PRICE_PER_SQR_METER=1, MILLION=5))
+        for args in ((1, 100), (5, 120, True), (10, 130, True, True, True)):
+            with self.subTest(args=args):
+                self.assertEqual(default_price(*args), price(*args))
+        self.assertEqual(cheap_price(10, 130, True, True, True), 130 + 50000 + 6000 + 70000)
+        with self.assertRaises(KeyError):
+            make_price({'PRICE_PER_SQR_METER': 1})
+
+        with pricing.configured(PRICE_PER_SQR_METER=7):
+            self.assertEqual(default_price(1, 100), 2000000)
+
+    def test_configured(self):
+        """Test that configured restores the constants, even on errors"""
+        with self.assertRaises(ZeroDivisionError):
+            with pricing.configured(PRICE_PER_SQR_METER=1, POOL_PRICE=0):
+                self.assertEqual(price(1, 100, True, True, True), 100 + 600 + 40000)
+                1 / 0
+        self.assertEqual(price(1, 100, True, True, True), 2000000 + 600 + 40000 + 30000)
+
+    def test_configure_rejects_non_integers(self):
+        """Test that configure only accepts integer constants"""
+        epoch = pricing.epoch
+        for value in (600.5, 600.0, '600', True, None):
+            with self.subTest(value=value):
+                with self.assertRaises(TypeError):
+                    pricing.configure(ADDITIONAL_VIEW_FEE_PER_FLOOR=value)
+        with self.assertRaises(TypeError):
+            pricing.configure(MILLION=5)
+        self.assertEqual(pricing.epoch, epoch)
+        self.assertEqual(pricing.ADDITIONAL_VIEW_FEE_PER_FLOOR, 600)
+
+    def test_old_modules_forward_constants(self):
+        """Test the constants of apt, special_apt and roof_apt"""
+        import apt, roof_apt, special_apt
+
+        self.assertEqual(apt.PRICE_PER_SQR_METER, 20000)
+        self.assertEqual(special_apt.ADDITIONAL_VIEW_FEE_PER_FLOOR, 600)
+        with pricing.configured(ROOF_PRICE=1):
+            self.assertEqual(roof_apt.ROOF_PRICE, 1)
+            with self.assertWarns(DeprecationWarning):
+                roof_apt.ROOF_PRICE = 0
+            self.assertEqual(pricing.ROOF_PRICE, 0)
+            self.assertEqual(RoofApt(1, 0, False).get_price(), 600)
+            with self.assertWarns(DeprecationWarning):
+                apt.FIRST_FLOOR = 0
+            self.assertEqual(Apt(1, 0).get_price(), 5000)
+        self.assertEqual(pricing.ROOF_PRICE, 40000)
+        with self.assertRaises(AttributeError):
+            roof_apt.PRICE_PER_SQR_METER
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
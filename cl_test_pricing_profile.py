@@ -0,0 +1,105 @@
+import threading
+import unittest
+from unittest import mock
+import mmn15
+import pricing
+from apartment_table import ApartmentTable
+from pricing_profile import PricingProfile, price_matrix, count_valid_apts
+from synthetic import random_apts
+
+
+def market_profiles():
+    """A few profiles that differ in every constant, FIRST_FLOOR included"""
+    return [PricingProfile(f"market {i}", PRICE_PER_SQR_METER=10000 + 1000 * i,
+                           ADDITIONAL_PRICE_PER_FLOOR=4000 + 100 * i,
+                           FIRST_FLOOR=i % 3, ADDITIONAL_VIEW_FEE_PER_FLOOR=500 + 10 * i,
+                           ROOF_PRICE=30000 + i, POOL_PRICE=20000 - i,
+                           MILLION=2000000 + 50000 * i)
+            for i in range(7)]
+
+
+class TestPricingProfile(unittest.TestCase):
+    """Test suite for immutable pricing profiles and the price matrix"""
+
+    def setUp(self):
+        self.apts = random_apts(1000, seed=101)
+        self.table = ApartmentTable.from_apts(self.apts)
+
+    def test_default_profile_matches_get_price(self):
+        """Test that a profile of the current constants prices like get_price"""
+        profile = PricingProfile()
+        self.assertEqual([profile.price_apt(apt) for apt in self.apts],
+                         [apt.get_price() for apt in self.apts])
+        self.assertEqual(profile.get('MILLION'), mmn15.MILLION)
+        with mock.patch.object(mmn15, 'MILLION', 5):
+            self.assertEqual(PricingProfile().get('MILLION'), 5)
+
+    def test_matrix_matches_configured_prices(self):
+        """Test every matrix column against get_price under configure()"""
+        profiles = market_profiles()
+        matrix = price_matrix(self.table, profiles)
+        self.assertEqual(matrix.shape, (len(self.apts), len(profiles)))
+
+        for column, profile in enumerate(profiles):
+            with self.subTest(profile=profile.get_name()):
+                constants = profile.as_dict()
+                del constants['MILLION']
+                with pricing.configured(**constants):
+                    expected = [apt.get_price() for apt in self.apts]
+                self.assertEqual(matrix[:, column].tolist(), expected)
+                self.assertEqual([profile.price_apt(apt) for apt in self.apts], expected)
+
+    def test_count_valid_apts(self):
+        """Test the per-profile only_valid_apts counts"""
+        profiles = market_profiles()
+        counts = count_valid_apts(self.table, profiles)
+        for count, profile in zip(counts, profiles):
+            prices = [profile.price_apt(apt) for apt in self.apts]
+            expected = sum(1 for apt, price in zip(self.apts, prices)
+                           if apt.SUPPORTS_VIEW and apt.get_has_view()
+                           and price > profile.get('MILLION'))
+            self.assertEqual(count, expected)
+
+    def test_immutable_and_hashable(self):
+        """Test that profiles cannot change and compare by constants"""
+        profile = PricingProfile('a', ROOF_PRICE=1)
+        with self.assertRaises(AttributeError):
+            profile._name = 'b'
+        with self.assertRaises(TypeError):
+            PricingProfile(PRICE=1)
+
+        self.assertEqual(profile, profile.replace('b'))
+        self.assertEqual(len({profile, profile.replace('b')}), 1)
+        self.assertNotEqual(profile, profile.replace(ROOF_PRICE=2))
+        self.assertEqual(profile.replace(ROOF_PRICE=2).get('ROOF_PRICE'), 2)
+
+    def test_integer_constants(self):
+        """Test that non-integer constants are rejected, not truncated"""
+        for value in (20000.5, 20000.0, '20000', True):
+            with self.subTest(value=value):
+                with self.assertRaises(TypeError):
+                    PricingProfile(PRICE_PER_SQR_METER=value)
+                with self.assertRaises(TypeError):
+                    PricingProfile().replace(MILLION=value)
+
+    def test_globals_untouched_by_threads(self):
+        """Test that pricing under profiles in threads leaves globals alone"""
+        epoch = pricing.epoch
+        results = {}
+
+        def run(profile):
+            results[profile.get_name()] = price_matrix(self.table, [profile])[:, 0].sum()
+
+        threads = [threading.Thread(target=run, args=(profile,)) for profile in market_profiles()]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), len(threads))
+        self.assertEqual(pricing.epoch, epoch)
+        self.assertEqual(pricing.PRICE_PER_SQR_METER, 20000)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,126 @@
+import http.client
+import json
+import os
+import tempfile
+import threading
+import unittest
+import mmn15
+import pricing
+from records import apt_to_record
+from inventory_file import write_inventory
+from query_server import QueryServer, QueryService, valid_apts_predicate
+from synthetic import random_apts
+
+
+class TestQueryServer(unittest.TestCase):
+    """Test suite for the HTTP query server"""
+
+    def setUp(self):
+        """Start a server on a free port over a temporary inventory file"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'inventory.bin')
+        self.apts = random_apts(500, seed=31)
+        write_inventory(self.path, self.apts)
+
+        self.service = QueryService(self.apts, cache_size=4)
+        self.server = QueryServer(self.service, ('127.0.0.1', 0), self.path)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.connection = http.client.HTTPConnection(*self.server.server_address[:2])
+
+    def tearDown(self):
+        """Stop the server and remove the temporary files"""
+        self.connection.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def request(self, method, path):
+        self.connection.request(method, path)
+        response = self.connection.getresponse()
+        return response.status, json.loads(response.read())
+
+    def get(self, path):
+        status, body = self.request('GET', path)
+        self.assertEqual(status, 200, body)
+        return body['result']
+
+    def test_matches_mmn15(self):
+        """Test every query over one kept-alive connection"""
+        self.assertEqual(self.get('/average_price'), mmn15.average_price(self.apts))
+        self.assertEqual(self.get('/how_many_rooftop'), mmn15.how_many_rooftop(self.apts))
+        self.assertEqual(self.get('/how_many_apt_type'), mmn15.how_many_apt_type(self.apts))
+        self.assertEqual(self.get('/top_price'), apt_to_record(mmn15.top_price(self.apts)))
+        self.assertEqual(self.get('/only_valid_apts'),
+                         [apt_to_record(apt) for apt in mmn15.only_valid_apts(self.apts)])
+
+    def test_valid_apts_parameters(self):
+        """Test the extra conditions of only_valid_apts"""
+        result = self.get('/only_valid_apts?min_price=2000000&min_floor=10&type=RoofApt')
+        expected = [apt_to_record(apt) for apt in self.apts
+                    if type(apt).__name__ == 'RoofApt' and apt.get_floor() >= 10
+                    and apt.get_price() > 2000000]
+        self.assertTrue(expected)
+        self.assertEqual(result, expected)
+        self.assertIsNone(self.get('/only_valid_apts?type=Apt,GardenApt'))
+
+    def test_errors(self):
+        """Test unknown queries and invalid parameters"""
+        self.assertEqual(self.request('GET', '/cheapest')[0], 404)
+        self.assertEqual(self.request('GET', '/only_valid_apts?min_price=lots')[0], 400)
+        self.assertEqual(self.request('GET', '/only_valid_apts?type=Castle')[0], 400)
+        self.assertEqual(self.request('GET', '/average_price?min_price=1')[0], 400)
+        # the connection is still usable after errors
+        self.assertEqual(self.get('/how_many_rooftop'), mmn15.how_many_rooftop(self.apts))
+
+    def test_lru_cache(self):
+        """Test that repeated queries hit the cache and old answers are evicted"""
+        for _ in range(3):
+            self.get('/average_price')
+        self.assertEqual(self.service.stats()['hits'], 2)
+        self.assertEqual(self.service.stats()['misses'], 1)
+
+        # equal parameters in another order share one cache entry
+        self.get('/only_valid_apts?type=RoofApt,SpecialApt')
+        self.get('/only_valid_apts?type=SpecialApt,RoofApt')
+        self.assertEqual(self.service.stats()['hits'], 3)
+
+        for query in ('how_many_rooftop', 'how_many_apt_type', 'top_price'):
+            self.get('/' + query)
+        self.assertEqual(self.service.stats()['cached'], 4)
+        self.get('/average_price')  # evicted as least recently used
+        self.assertEqual(self.service.stats()['misses'], 6)
+
+    def test_inventory_change_invalidates_cache(self):
+        """Test that a new inventory is never answered from the old cache"""
+        self.get('/average_price')
+        new_apts = random_apts(100, seed=32)
+        self.service.set_inventory(new_apts)
+        self.assertEqual(self.service.stats()['cached'], 0)
+        self.assertEqual(self.get('/average_price'), mmn15.average_price(new_apts))
+
+    def test_pricing_change_invalidates_cache(self):
+        """Test that answers are recomputed after pricing.configure"""
+        self.get('/average_price')
+        with pricing.configured(PRICE_PER_SQR_METER=1):
+            self.assertEqual(self.get('/average_price'), mmn15.average_price(self.apts))
+        self.assertEqual(self.get('/average_price'), mmn15.average_price(self.apts))
+        self.assertEqual(self.service.stats()['misses'], 3)
+
+    def test_predicates_memoized(self):
+        """Test that equal only_valid_apts parameters share one compiled filter"""
+        self.assertIs(valid_apts_predicate(2000000, 3, ['RoofApt', 'SpecialApt']),
+                      valid_apts_predicate(2000000, 3, ('SpecialApt', 'RoofApt')))
+        self.assertIs(valid_apts_predicate(), mmn15.valid_apt_predicate())
+
+    def test_reload(self):
+        """Test that POST /reload reads the inventory file again"""
+        new_apts = random_apts(50, seed=33)
+        write_inventory(self.path, new_apts)
+        status, body = self.request('POST', '/reload')
+        self.assertEqual(status, 200)
+        self.assertEqual(body['generation'], 1)
+        self.assertEqual(self.get('/how_many_apt_type'), mmn15.how_many_apt_type(new_apts))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
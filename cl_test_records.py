@@ -0,0 +1,61 @@
+import json
+import unittest
+from apt import Apt
+from roof_apt import RoofApt
+from records import apt_from_record, apt_to_record, parse_json_line
+from synthetic import random_apts
+
+
+class TestRecords(unittest.TestCase):
+    """Test suite for converting apartments to and from records"""
+
+    def test_round_trip(self):
+        """Test that every apartment type survives a record round trip"""
+        for apt in random_apts(100, seed=71):
+            with self.subTest(apt=str(apt)):
+                copy = apt_from_record(apt_to_record(apt))
+                self.assertIs(type(copy), type(apt))
+                self.assertEqual(copy, apt)
+
+    def test_json_line(self):
+        """Test parsing typed JSON values"""
+        apt = parse_json_line(json.dumps(apt_to_record(RoofApt(10, 130, True))))
+        self.assertEqual(apt, RoofApt(10, 130, True))
+
+    def test_string_values(self):
+        """Test parsing string values as read from CSV"""
+        record = {'type': 'RoofApt', 'floor': '10', 'area': '130', 'has_pool': 'true'}
+        self.assertEqual(apt_from_record(record), RoofApt(10, 130, True))
+
+    def test_bad_records(self):
+        """Test that invalid records raise ValueError"""
+        bad_records = [
+            {'type': 'Castle', 'floor': 1, 'area': 1},
+            {'type': 'Apt', 'area': 1},
+            {'type': 'Apt', 'floor': 'high', 'area': 1},
+            {'type': 'RoofApt', 'floor': 1, 'area': 1, 'has_pool': 'maybe'},
+        ]
+        for record in bad_records:
+            with self.subTest(record=record):
+                with self.assertRaises(ValueError):
+                    apt_from_record(record)
+        with self.assertRaises(ValueError):
+            parse_json_line('{not json')
+        with self.assertRaises(ValueError):
+            parse_json_line('[1, 2]')
+
+    def test_json_numbers(self):
+        """Test that only whole JSON numbers are accepted as integers"""
+        self.assertEqual(parse_json_line('{"type": "Apt", "floor": 2.0, "area": 100}'), Apt(2, 100))
+        for line in ('{"type": "Apt", "floor": 2.9, "area": 100}',
+                     '{"type": "Apt", "floor": 2, "area": 100.7}',
+                     '{"type": "Apt", "floor": 1e400, "area": 100}',
+                     '{"type": "Apt", "floor": NaN, "area": 100}',
+                     '{"type": "Apt", "floor": "2.5", "area": 100}'):
+            with self.subTest(line=line):
+                with self.assertRaises(ValueError):
+                    parse_json_line(line)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,78 @@
+import unittest
+from apt import Apt
+from special_apt import SpecialApt
+from roof_apt import RoofApt
+import mmn15
+from report import ApartmentReport
+from synthetic import random_apts
+
+
+class TestApartmentReport(unittest.TestCase):
+    """Test suite for the streaming ApartmentReport"""
+
+    def assert_matches_mmn15(self, report, apts):
+        self.assertEqual(len(report), len(apts))
+        self.assertEqual(report.average_price(), mmn15.average_price(apts))
+        self.assertEqual(report.how_many_rooftop(), mmn15.how_many_rooftop(apts))
+        self.assertEqual(report.how_many_apt_type(), mmn15.how_many_apt_type(apts))
+        self.assertIs(report.top_price(), mmn15.top_price(apts))
+        self.assertEqual(report.only_valid_apts(), mmn15.only_valid_apts(apts))
+
+    def test_empty_report(self):
+        """Test a report with no apartments"""
+        report = ApartmentReport()
+        self.assertEqual(report.average_price(), 0)
+        self.assertIsNone(report.top_price())
+        self.assertIsNone(report.only_valid_apts())
+        self.assert_matches_mmn15(report, [])
+
+    def test_matches_mmn15(self):
+        """Test that a report equals the mmn15 functions on the same list"""
+        apts = random_apts(1000, seed=3)
+        self.assert_matches_mmn15(ApartmentReport(apts), apts)
+
+    def test_generator_consumed_once(self):
+        """Test a report over a generator that can only be consumed once"""
+        apts = random_apts(200, seed=4)
+        report = ApartmentReport(apt for apt in apts)
+        self.assert_matches_mmn15(report, apts)
+
+    def test_incremental_updates(self):
+        """Test that add and update accumulate like one pass over everything"""
+        apts = random_apts(300, seed=5)
+        report = ApartmentReport(apts[:100])
+        report.add(apts[100])
+        report.update(iter(apts[101:]))
+        self.assert_matches_mmn15(report, apts)
+
+    def test_top_price_tie_returns_first(self):
+        """Test that the first of several top apartments is reported"""
+        apt_a = Apt(area=100, floor=0)
+        apt_b = Apt(area=100, floor=0)
+        self.assertIs(ApartmentReport([apt_a, apt_b]).top_price(), apt_a)
+
+    def test_results_are_copies(self):
+        """Test that returned containers do not alias the report state"""
+        report = ApartmentReport([SpecialApt(floor=5, area=120, has_view=True),
+                                  RoofApt(floor=10, area=130, has_pool=True)])
+        report.how_many_apt_type()['Apt'] = 99
+        report.only_valid_apts().clear()
+        self.assertEqual(report.how_many_apt_type()['Apt'], 0)
+        self.assertEqual(len(report.only_valid_apts()), 2)
+
+    def test_failing_iterable_keeps_report_consistent(self):
+        """Test that apartments read before an error are fully counted"""
+        apts = random_apts(50, seed=6)
+
+        def reader():
+            yield from apts
+            raise OSError("read error")
+
+        report = ApartmentReport()
+        with self.assertRaises(OSError):
+            report.update(reader())
+        self.assert_matches_mmn15(report, apts)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,136 @@
+import os
+import sys
+import threading
+import unittest
+from unittest import mock
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import mmn15
+import shared_store
+from shared_store import SharedStoreReader, SharedStoreWriter
+from synthetic import random_apts
+
+
+def worker_aggregates(name):
+    """Attach to a store in another process and run every aggregate"""
+    with SharedStoreReader(name) as reader:
+        return (reader.refresh().get_generation(), reader.average_price(),
+                reader.how_many_rooftop(), reader.how_many_apt_type(),
+                reader.top_price(), reader.only_valid_apts())
+
+
+class TestSharedStore(unittest.TestCase):
+    """Test suite for the shared-memory apartment store"""
+
+    def setUp(self):
+        """Create a store with a name unique to this test process"""
+        self.writer = SharedStoreWriter(f"aptstore_test_{os.getpid()}")
+
+    def tearDown(self):
+        """Unlink the store"""
+        self.writer.close()
+
+    def assert_matches_mmn15(self, reader, apts):
+        self.assertEqual(reader.average_price(), mmn15.average_price(apts))
+        self.assertEqual(reader.how_many_rooftop(), mmn15.how_many_rooftop(apts))
+        self.assertEqual(reader.how_many_apt_type(), mmn15.how_many_apt_type(apts))
+        self.assertEqual(reader.top_price(), mmn15.top_price(apts))
+        self.assertEqual(reader.only_valid_apts(), mmn15.only_valid_apts(apts))
+
+    def test_empty_store(self):
+        """Test a store before anything is published"""
+        with SharedStoreReader(self.writer.get_name()) as reader:
+            self.assertEqual(reader.refresh().get_generation(), 0)
+            self.assert_matches_mmn15(reader, [])
+
+    def test_zero_copy_read_only(self):
+        """Test that readers see read-only views of one shared segment"""
+        apts = random_apts(1000, seed=41)
+        self.writer.publish(apts)
+        with SharedStoreReader(self.writer.get_name()) as reader_a, \
+                SharedStoreReader(self.writer.get_name()) as reader_b:
+            self.assert_matches_mmn15(reader_a, apts)
+            table = reader_a.get_table()
+            # the columns are views into the shared segment, not copies
+            self.assertTrue(np.shares_memory(table.get_floor(), reader_a.snapshot().get_records()))
+            self.assertFalse(table.get_floor().flags.writeable)
+            with self.assertRaises(ValueError):
+                table.get_floor()[0] = 99
+            self.assertTrue(np.array_equal(table.get_area(), reader_b.get_table().get_area()))
+            del table
+
+    def test_new_versions(self):
+        """Test that readers move to newly published generations"""
+        first = random_apts(300, seed=42)
+        second = random_apts(200, seed=43)
+        self.assertEqual(self.writer.publish(first), 1)
+        with SharedStoreReader(self.writer.get_name()) as reader:
+            self.assert_matches_mmn15(reader, first)
+            old_snapshot = reader.snapshot()
+            old_table = old_snapshot.get_table()
+
+            self.assertEqual(self.writer.publish(second), 2)
+            self.assertEqual(reader.current_generation(), 2)
+            self.assert_matches_mmn15(reader, second)
+            # a table of an older version stays readable while it is used
+            self.assertEqual(len(old_table), len(first))
+            self.assertEqual(old_table.apt_at(0), first[0])
+            del old_table
+
+            # versions beyond the kept ones are unlinked
+            self.writer.publish(first)
+            self.writer.publish(second)
+            self.assert_matches_mmn15(reader, second)
+            self.assertEqual(reader.refresh().get_generation(), 4)
+
+    def test_pending_segments_closed_on_refresh(self):
+        """Test that a snapshot closed while in use is detached once unused"""
+        self.writer.publish(random_apts(100, seed=44))
+        with SharedStoreReader(self.writer.get_name()) as reader:
+            floors = reader.get_table().get_floor()
+            self.writer.publish(random_apts(100, seed=45))
+            reader.refresh()
+            self.assertEqual(len(shared_store._unclosed), 1)
+            del floors
+            reader.refresh()
+            self.assertEqual(shared_store._unclosed, [])
+
+    @unittest.skipIf(sys.version_info >= (3, 13), "attaching does not register segments")
+    def test_attach_skips_registration_in_its_thread_only(self):
+        """Test that segments created by other threads while attaching are registered"""
+        SharedStoreReader(self.writer.get_name()).close()  # wraps the tracker
+        registered = []
+        with mock.patch.object(shared_store, '_tracker_register',
+                               lambda name, rtype: registered.append(name)):
+            shared_store._attaching.active = True
+            try:
+                thread = threading.Thread(target=shared_store.resource_tracker.register,
+                                          args=('created', 'shared_memory'))
+                thread.start()
+                thread.join()
+                shared_store.resource_tracker.register('attached', 'shared_memory')
+            finally:
+                shared_store._attaching.active = False
+        self.assertEqual(registered, ['created'])
+
+    def test_worker_processes(self):
+        """Test the aggregates in worker processes attached to the store"""
+        apts = random_apts(2000, seed=44)
+        self.writer.publish(apts)
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            results = list(pool.map(worker_aggregates, [self.writer.get_name()] * 2))
+        expected = (1, mmn15.average_price(apts), mmn15.how_many_rooftop(apts),
+                    mmn15.how_many_apt_type(apts), mmn15.top_price(apts),
+                    mmn15.only_valid_apts(apts))
+        self.assertEqual(results, [expected, expected])
+        # the workers exiting does not remove the store
+        self.assertEqual(worker_aggregates(self.writer.get_name()), expected)
+
+    def test_missing_store(self):
+        """Test attaching to a store that does not exist"""
+        with self.assertRaises(FileNotFoundError):
+            SharedStoreReader(f"aptstore_missing_{os.getpid()}")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
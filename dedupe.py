@@ -0,0 +1,50 @@
+"""
+Duplicate detection for apartment lists.
+
+This module finds equal apartments in linear time by hashing them. The
+apartment classes hash consistently with their __eq__ rules, so two
+apartments land in the same group exactly when they compare equal.
+"""
+
+__author__ = "Bar-chaim Billy"
+
+
+def group_duplicates(apts):
+    """
+    Group equal apartments together.
+
+    Args:
+        apts (iterable): Apartment objects
+
+    Returns:
+        list: One list per distinct apartment, holding every apartment equal
+              to it in input order. Groups are ordered by first appearance.
+    """
+    groups = {}
+    for apt in apts:
+        group = groups.get(apt)
+        if group is None:
+            groups[apt] = [apt]
+        else:
+            group.append(apt)
+    return list(groups.values())
+
+
+def dedupe(apts):
+    """
+    Remove duplicate apartments.
+
+    Args:
+        apts (iterable): Apartment objects
+
+    Returns:
+        list: The first apartment of every group of equal apartments,
+              in input order
+    """
+    seen = set()
+    unique_apts = []
+    for apt in apts:
+        if apt not in seen:
+            seen.add(apt)
+            unique_apts.append(apt)
+    return unique_apts
@@ -0,0 +1,481 @@
+"""
+Bulk export of apartments to text files.
+
+This module writes batches of apartments as lines of text in three
+formats, and parses the str format back into apartment objects:
+
+    'str'    the __str__ text of each apartment, e.g.
+             "floor: 10, area: 100, has_view: True, has_pool: False"
+    'csv'    records.FIELDS columns under a header row
+    'jsonl'  one records.apt_to_record JSON object per line
+
+Every line is formatted by a function compiled once per apartment type and
+format, which reads the slots directly and fills a % template, instead of
+calling __str__ through the super() chain or building a record dict per
+apartment. The lines equal what str(apt), csv.writer over the records and
+json.dumps(apt_to_record(apt)) produce. In files, CSV lines end in CRLF,
+as with the default csv dialect, and the other formats in LF.
+
+Apartments of unregistered subclasses are written in the format of their
+nearest registered ancestor.
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import functools
+import os
+import re
+from itertools import islice
+
+from apt import APT_TYPES
+from garden_apt import GardenApt
+from records import FIELDS
+
+STR = 'str'
+CSV = 'csv'
+JSONL = 'jsonl'
+
+FORMATS_BY_EXTENSION = {'.txt': STR, '.csv': CSV, '.jsonl': JSONL, '.ndjson': JSONL}
+
+DEFAULT_BATCH_SIZE = 8192  # apartments formatted per write
+
+CSV_HEADER = ",".join(FIELDS)
+
+# the line ending of each format in files; CSV follows the default csv dialect
+LINE_ENDINGS = {STR: "\n", CSV: "\r\n", JSONL: "\n"}
+
+_PYTHON_BOOLS = {False: 'False', True: 'True'}
+_JSON_BOOLS = {False: 'false', True: 'true'}
+
+
+def _record_sources(cls):
+    """
+    Returns:
+        dict: Python expression reading every records.FIELDS field of an
+              apartment `apt` of class cls, or None for the 'type' field,
+              as in records.apt_to_record
+    """
+    return {
+        'type': None,
+        'floor': "apt._floor",
+        'area': "apt._area",
+        'has_view': "apt._has_view" if cls.SUPPORTS_VIEW else "False",
+        'has_pool': "apt._has_pool" if cls.SUPPORTS_POOL else "False",
+        'garden_area': "apt._garden_area" if cls.TYPE_CODE == GardenApt.TYPE_CODE else "0",
+    }
+
+
+def _compile(template, expressions):
+    """
+    Returns:
+        function: apt -> template % (the values of expressions)
+    """
+    namespace = {'_PYTHON_BOOLS': _PYTHON_BOOLS, '_JSON_BOOLS': _JSON_BOOLS}
+    values = "".join(f"{expression}, " for expression in expressions)
+    source = f"lambda apt: {template!r} % ({values})"
+    return eval(compile(source, f"<format {template!r}>", 'eval'), namespace)
+
+
+def _str_formatter(cls):
+    """
+    Returns:
+        function: apt -> the __str__ text of an apartment of class cls
+    """
+    template = ", ".join(f"{field}: %s" for field in cls._STR_FIELDS)
+    return _compile(template, [f"apt._{field}" for field in cls._STR_FIELDS])
+
+
+def _csv_formatter(cls):
+    """
+    Returns:
+        function: apt -> the CSV row of the record of an apartment of class cls
+    """
+    cells = []
+    expressions = []
+    for field, source in _record_sources(cls).items():
+        if source is None:
+            cells.append(cls.__name__)
+        elif field.startswith('has_'):
+            cells.append("%s")
+            expressions.append(f"_PYTHON_BOOLS[{source}]")
+        else:
+            cells.append("%s")
+            expressions.append(source)
+    return _compile(",".join(cells), expressions)
+
+
+def _jsonl_formatter(cls):
+    """
+    Returns:
+        function: apt -> the JSON text of the record of an apartment of class cls
+    """
+    members = []
+    expressions = []
+    for field, source in _record_sources(cls).items():
+        if source is None:
+            members.append(f'"{field}": "{cls.__name__}"')
+        elif field.startswith('has_'):
+            members.append(f'"{field}": %s')
+            expressions.append(f"_JSON_BOOLS[{source}]")
+        else:
+            members.append(f'"{field}": %s')
+            expressions.append(source)
+    return _compile("{" + ", ".join(members) + "}", expressions)
+
+
+_FORMATTER_BUILDERS = {STR: _str_formatter, CSV: _csv_formatter, JSONL: _jsonl_formatter}
+
+
+@functools.lru_cache(maxsize=None)
+def _formatters(file_format, type_code):
+    """
+    Returns:
+        function: The formatter of a format for apartments of a type code
+    """
+    return _FORMATTER_BUILDERS[file_format](APT_TYPES[type_code])
+
+
+def _format_for(file_format):
+    """
+    Returns:
+        str: A known format name
+
+    Raises:
+        ValueError: If the format is unknown
+    """
+    if file_format not in _FORMATTER_BUILDERS:
+        raise ValueError(f"unknown export format: {file_format!r}")
+    return file_format
+
+
+def format_apts(apts, file_format=STR):
+    """
+    Format apartments as lines of one of the export formats.
+
+    Args:
+        apts (iterable): Apartment objects
+        file_format (str): STR, CSV or JSONL
+
+    Returns:
+        list: One line per apartment, without line breaks
+
+    Raises:
+        ValueError: If the format is unknown
+    """
+    _format_for(file_format)
+    formatters = {}
+    lines = []
+    append = lines.append
+    for apt in apts:
+        code = apt.TYPE_CODE
+        formatter = formatters.get(code)
+        if formatter is None:
+            formatter = formatters[code] = _formatters(file_format, code)
+        append(formatter(apt))
+    return lines
+
+
+
+class ExportWriter:
+    """
+    Writes apartments to a text file in one of the export formats.
+
+    Apartments are formatted and written a batch at a time through a
+    buffered file. Use as a context manager, or call close() when done.
+
+    Attributes:
+        _file (file): The open output file
+        _format (str): STR, CSV or JSONL
+        _line_end (str): Line ending of the format, see LINE_ENDINGS
+        _batch_size (int): Apartments formatted per write
+        _count (int): Number of apartments written so far
+    """
+
+    def __init__(self, path, file_format=None, batch_size=DEFAULT_BATCH_SIZE,
+                 buffer_size=1 << 20):
+        """
+        Initialize a new ExportWriter and create the file.
+
+        Args:
+            path (str): Path of the file to create (overwritten if it exists)
+            file_format (str): STR, CSV or JSONL (default: from the extension
+                               of path, see FORMATS_BY_EXTENSION)
+            batch_size (int): Apartments formatted per write
+            buffer_size (int): Size of the file buffer in bytes
+
+        Raises:
+            ValueError: If the format is unknown or cannot be told from path
+        """
+        if file_format is None:
+            file_format = FORMATS_BY_EXTENSION.get(os.path.splitext(path)[1])
+        self._format = _format_for(file_format)
+        self._batch_size = batch_size
+        self._line_end = LINE_ENDINGS[self._format]
+        self._count = 0
+        self._file = open(path, 'w', buffering=buffer_size, newline='')
+        if self._format == CSV:
+            self._file.write(CSV_HEADER + self._line_end)
+
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+    def write(self, apts):
+        """
+        Append apartments to the file.
+
+        Args:
+            apts (iterable): Apartment objects
+        """
+        apts = iter(apts)
+        while True:
+            lines = format_apts(islice(apts, self._batch_size), self._format)
+            if not lines:
+                break
+            lines.append("")  # ends the last line
+            self._file.write(self._line_end.join(lines))
+            self._count += len(lines) - 1
+
+
+    def get_count(self):
+        """
+        Returns:
+            int: The number of apartments written so far
+        """
+        return self._count
+
+
+    def close(self):
+        """
+        Flush and close the file.
+        """
+        self._file.close()
+
+
+def export_apts(path, apts, file_format=None, **options):
+    """
+    Write apartments to a new text file.
+
+    Args:
+        path (str): Path of the file to create
+        apts (iterable): Apartment objects
+        file_format (str): STR, CSV or JSONL (default: from the extension)
+        **options: Other ExportWriter options
+
+    Returns:
+        int: The number of apartments written
+    """
+    with ExportWriter(path, file_format, **options) as writer:
+        writer.write(apts)
+        return writer.get_count()
+
+
+
+def _str_types():
+    """
+    Returns:
+        dict: The fields __str__ shows, in order -> the registered class
+              that shows them
+    """
+    return {tuple(cls._STR_FIELDS): cls for cls in APT_TYPES.values()}
+
+
+def _str_value(name, text):
+    """
+    Returns:
+        int or bool: The value of a str format field
+
+    Raises:
+        ValueError: If the text is not a valid value of the field
+    """
+    if name.startswith('has_'):
+        if text == 'True':
+            return True
+        if text == 'False':
+            return False
+        raise ValueError(f"{name} must be True or False, got {text!r}")
+    try:
+        return int(text)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {text!r}") from None
+
+
+def _parse_str_fields(line, str_types):
+    """
+    Split one line of the str format into its class and field values.
+
+    Args:
+        line (str): The line
+        str_types (dict): A _str_types() result
+
+    Returns:
+        tuple: (apartment class, dict of field name -> value)
+
+    Raises:
+        ValueError: If the line is not the __str__ text of an apartment
+    """
+    try:
+        names, texts = zip(*(field.split(': ', 1) for field in line.rstrip('\r\n').split(', ')))
+    except ValueError:
+        raise ValueError(f"not an apartment: {line!r}") from None
+
+    cls = str_types.get(names)
+    if cls is None:
+        raise ValueError(f"no apartment type has the fields {', '.join(names)}")
+    return cls, {name: _str_value(name, text) for name, text in zip(names, texts)}
+
+
+_STR_VALUE_PATTERNS = {'int': r"(-?\d+)", 'bool': r"(True|False)"}
+
+
+@functools.lru_cache(maxsize=None)
+def _str_parser(type_code):
+    """
+    Compile the parser of the str format of an apartment type.
+
+    Fixed slots (see Apt._FIXED_SLOTS) are part of the pattern, so a line
+    the pattern matches always holds a valid apartment of the type.
+
+    Returns:
+        tuple: (compiled pattern of a line, function: the pattern groups ->
+               the constructor argument tuple)
+    """
+    cls = APT_TYPES[type_code]
+    fields = []
+    groups = {}    # slot -> (group index, kind)
+    for field in cls._STR_FIELDS:
+        slot = '_' + field
+        kind = 'bool' if field.startswith('has_') else 'int'
+        if slot in cls._FIXED_SLOTS:
+            fields.append(re.escape(f"{field}: {cls._FIXED_SLOTS[slot]}"))
+        else:
+            fields.append(re.escape(f"{field}: ") + _STR_VALUE_PATTERNS[kind])
+            groups[slot] = (len(groups), kind)
+
+    arguments = []
+    for slot in cls._ARG_SLOTS:
+        index, kind = groups[slot]
+        arguments.append(f"values[{index}] == 'True'" if kind == 'bool' else f"int(values[{index}])")
+    source = f"lambda values: ({''.join(argument + ', ' for argument in arguments)})"
+    return (re.compile(", ".join(fields)),
+            eval(compile(source, f"<parse {cls.__name__}>", 'eval')))
+
+
+def _str_parsers():
+    """
+    Returns:
+        dict: The last field __str__ shows -> list of (class, pattern,
+              converter) of the registered classes that end with it
+    """
+    parsers = {}
+    for code, cls in APT_TYPES.items():
+        pattern, convert = _str_parser(code)
+        parsers.setdefault(cls._STR_FIELDS[-1], []).append((cls, pattern, convert))
+    return parsers
+
+
+def _parse_str_slow(line, str_types):
+    """
+    Parse a line the compiled patterns reject, field by field.
+
+    Returns:
+        tuple: (apartment class, constructor argument tuple)
+
+    Raises:
+        ValueError: Telling why the line is not a valid apartment
+    """
+    cls, values = _parse_str_fields(line, str_types)
+    for slot, fixed in cls._FIXED_SLOTS.items():
+        if values[slot[1:]] != fixed:
+            raise ValueError(f"{cls.__name__} must have {slot[1:]} {fixed}, "
+                             f"got {values[slot[1:]]}")
+    return cls, tuple(values[slot[1:]] for slot in cls._ARG_SLOTS)
+
+
+def parse_str_lines(lines):
+    """
+    Build apartments from lines of the str format.
+
+    Every line is matched by the pattern compiled for the type whose
+    __str__ ends with the same field, and apartments of each type are
+    built together with the bulk factories of their class (see
+    Apt.from_records).
+
+    Args:
+        lines (iterable): __str__ texts of apartments, one per line; blank
+                          lines are skipped
+
+    Returns:
+        list: The apartments, of the classes whose __str__ the lines are,
+              in order
+
+    Raises:
+        ValueError: If a line is not the __str__ text of an apartment, or
+                    holds values its class cannot have
+    """
+    parsers = _str_parsers()
+    str_types = None
+    rows = {}      # class -> (positions, constructor argument tuples)
+    position = 0
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if not line.strip():
+            continue
+
+        for cls, pattern, convert in parsers.get(line[line.rfind(', ') + 2:line.rfind(':')], ()):
+            match = pattern.fullmatch(line)
+            if match:
+                arguments = convert(match.groups())
+                break
+        else:
+            if str_types is None:
+                str_types = _str_types()
+            cls, arguments = _parse_str_slow(line, str_types)
+
+        positions, records = rows.setdefault(cls, ([], []))
+        positions.append(position)
+        records.append(arguments)
+        position += 1
+
+    apts = [None] * position
+    for cls, (positions, records) in rows.items():
+        for index, apt in zip(positions, cls.from_records(records)):
+            apts[index] = apt
+    return apts
+
+
+def parse_str_line(line):
+    """
+    Build an apartment from its __str__ text.
+
+    Args:
+        line (str): The text, e.g. "floor: 0, area: 80, has_view: False, garden_area: 20"
+
+    Returns:
+        Apt: An object of the class whose __str__ the text is
+
+    Raises:
+        ValueError: If the text is not the __str__ text of an apartment
+    """
+    apts = parse_str_lines([line])
+    if not apts:
+        raise ValueError("not an apartment: empty line")
+    return apts[0]
+
+
+def read_str_file(path):
+    """
+    Load every apartment of a str format file.
+
+    Args:
+        path (str): Path of the file
+
+    Returns:
+        list: The apartments in file order
+    """
+    with open(path) as file:
+        return parse_str_lines(file)
@@ -0,0 +1,481 @@
+"""
+Filter expressions over apartments.
+
+This module provides a small predicate language for selecting apartments,
+built from the fields below with comparison operators and combined with
+& (and), | (or) and ~ (not):
+
+    (TYPE.isin({SpecialApt, RoofApt}) & HAS_VIEW & (PRICE > MILLION)
+     & (FLOOR >= 3))
+
+Comparisons bind tighter than & and | only inside parentheses, so every
+comparison joined with & or | must be parenthesized.
+
+A predicate is compiled once into Python code that filters a list of
+apartment objects in a single comprehension, and can also be evaluated as
+whole-array operations over an ApartmentTable. The terms of every & are
+evaluated cheapest first, so prices are only computed for apartments that
+pass all the cheap checks.
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import operator
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed to evaluate predicates over tables
+    np = None
+
+from apt import APT_TYPES
+from garden_apt import GardenApt
+
+# relative cost of evaluating a term on one apartment
+TYPE_COST = 1
+ATTRIBUTE_COST = 2
+PRICE_COST = 10
+
+# how PRICE reads the price of `apt`
+_PRICE_SOURCE = "apt.get_price()"
+
+_OPERATORS = {
+    '==': operator.eq, '!=': operator.ne,
+    '<': operator.lt, '<=': operator.le,
+    '>': operator.gt, '>=': operator.ge,
+}
+
+
+def _capable_codes(flag):
+    """
+    Returns:
+        list: Type codes of the registered classes with a capability flag set
+    """
+    return [code for code, cls in APT_TYPES.items() if getattr(cls, flag)]
+
+
+def _rows(column, rows):
+    """
+    Returns:
+        ndarray: The column, or its values at rows when rows is not None
+    """
+    return column if rows is None else column[rows]
+
+
+
+class Field:
+    """
+    An attribute of an apartment that predicates compare with values.
+
+    Attributes:
+        _name (str): Name of the field in predicate descriptions
+        _source (str): Python expression reading the field of `apt`
+        _table_values (function): Reads the field from table rows
+        _cost (int): Relative cost of reading the field
+    """
+
+    def __init__(self, name, source, table_values, cost):
+        """
+        Initialize a new Field.
+
+        Args:
+            name (str): Name of the field in predicate descriptions
+            source (str): Python expression reading the field of `apt`
+            table_values (function): (table, rows) -> field values of the
+                                     rows, or of all rows if rows is None
+            cost (int): Relative cost of reading the field
+        """
+        self._name = name
+        self._source = source
+        self._table_values = table_values
+        self._cost = cost
+
+
+    def _compare(self, symbol, value):
+        return Comparison(self, symbol, value)
+
+    def __eq__(self, value):
+        return self._compare('==', value)
+
+    def __ne__(self, value):
+        return self._compare('!=', value)
+
+    def __lt__(self, value):
+        return self._compare('<', value)
+
+    def __le__(self, value):
+        return self._compare('<=', value)
+
+    def __gt__(self, value):
+        return self._compare('>', value)
+
+    def __ge__(self, value):
+        return self._compare('>=', value)
+
+    # comparisons build predicates, so fields cannot be dict keys
+    __hash__ = None
+
+
+    def isin(self, values):
+        """
+        Args:
+            values (iterable): Values the field may take
+
+        Returns:
+            Predicate: True for apartments whose field is one of values
+        """
+        return Membership(self, values)
+
+
+    def __repr__(self):
+        return self._name
+
+
+
+class TypeField(Field):
+    """
+    The apartment type, compared by type code.
+
+    Values may be apartment classes, registered type names or type codes.
+    """
+
+    @staticmethod
+    def code(value):
+        """
+        Returns:
+            int: The type code of an apartment class, type name or code
+
+        Raises:
+            ValueError: If a type name is not registered
+        """
+        if isinstance(value, type):
+            return value.TYPE_CODE
+        if isinstance(value, str):
+            for code, cls in APT_TYPES.items():
+                if cls.__name__ == value:
+                    return code
+            raise ValueError(f"unknown apartment type: {value!r}")
+        return value
+
+    def _compare(self, symbol, value):
+        return Comparison(self, symbol, self.code(value))
+
+    def isin(self, values):
+        return Membership(self, [self.code(value) for value in values])
+
+
+
+class Predicate:
+    """
+    A condition on apartments, combined with &, | and ~.
+
+    Attributes:
+        _cost (int): Relative cost of evaluating the predicate on one apartment
+    """
+
+    _cost = 0
+
+    def __and__(self, other):
+        return And([self, other])
+
+    def __or__(self, other):
+        return Or([self, other])
+
+    def __invert__(self):
+        return Not(self)
+
+    def __bool__(self):
+        # and, or, not and chained comparisons would silently drop a term
+        raise TypeError("use &, | and ~ to combine predicates")
+
+
+    def _source(self, bind):
+        """
+        Args:
+            bind (function): Stores a value in the compiled namespace and
+                             returns the name it can be read by
+
+        Returns:
+            str: Python expression evaluating the predicate on `apt`
+        """
+        raise NotImplementedError
+
+    def _mask(self, table, rows):
+        """
+        Args:
+            table (ApartmentTable): The apartments
+            rows (ndarray): Rows to evaluate, or None for all rows
+
+        Returns:
+            ndarray: Whether each of the rows matches
+        """
+        raise NotImplementedError
+
+
+    def _compiled(self):
+        """
+        Returns:
+            tuple: (matches, filter, matches_priced) functions compiled
+                   from the predicate
+        """
+        try:
+            return self._functions
+        except AttributeError:
+            pass
+
+        namespace = {}
+
+        def bind(value):
+            name = f"_v{len(namespace)}"
+            namespace[name] = value
+            return name
+
+        condition = self._source(bind)
+        # PRICE is the only field reading _PRICE_SOURCE
+        priced_condition = condition.replace(_PRICE_SOURCE, 'price')
+        source = (f"def matches(apt):\n    return bool({condition})\n"
+                  f"def filter(apts):\n    return [apt for apt in apts if {condition}]\n"
+                  f"def matches_priced(apt, price):\n    return bool({priced_condition})\n")
+        exec(compile(source, f"<filter {self!r}>", 'exec'), namespace)
+
+        self._functions = namespace['matches'], namespace['filter'], namespace['matches_priced']
+        return self._functions
+
+
+    def matches(self, apt):
+        """
+        Args:
+            apt (Apt): An apartment
+
+        Returns:
+            bool: True if the apartment matches the predicate
+        """
+        return self._compiled()[0](apt)
+
+
+    def matches_priced(self, apt, price):
+        """
+        Match an apartment whose price is already known, without pricing
+        it again.
+
+        Args:
+            apt (Apt): An apartment
+            price (int): The price of the apartment, used for PRICE
+
+        Returns:
+            bool: True if the apartment matches the predicate
+        """
+        return self._compiled()[2](apt, price)
+
+
+    def filter(self, apts):
+        """
+        Args:
+            apts (iterable): Apartment objects
+
+        Returns:
+            list: The matching apartments, in order
+        """
+        return self._compiled()[1](apts)
+
+
+    def mask(self, table):
+        """
+        Args:
+            table (ApartmentTable): The apartments
+
+        Returns:
+            ndarray: Whether each row of the table matches
+
+        Raises:
+            ImportError: If numpy is not installed
+        """
+        if np is None:
+            raise ImportError("evaluating predicates over tables requires numpy")
+        return self._mask(table, None)
+
+
+    def select(self, table):
+        """
+        Args:
+            table (ApartmentTable): The apartments
+
+        Returns:
+            ndarray: The row numbers of the matching rows, in order
+        """
+        return np.flatnonzero(self.mask(table))
+
+
+
+class Flag(Predicate):
+    """
+    A feature an apartment has only if its type supports it.
+
+    Attributes:
+        _name (str): Name of the flag in predicate descriptions
+        _attribute (str): The slot holding the flag, e.g. '_has_view'
+        _capability (str): The class flag enabling it, e.g. 'SUPPORTS_VIEW'
+        _column (str): The table getter of the flag column
+    """
+
+    _cost = ATTRIBUTE_COST
+
+    def __init__(self, name, attribute, capability, column):
+        self._name = name
+        self._attribute = attribute
+        self._capability = capability
+        self._column = column
+
+    def _source(self, bind):
+        return f"(apt.{self._capability} and apt.{self._attribute})"
+
+    def _mask(self, table, rows):
+        codes = _rows(table.get_type_code(), rows)
+        mask = np.isin(codes, _capable_codes(self._capability))
+        mask &= _rows(getattr(table, self._column)(), rows)
+        return mask
+
+    def __repr__(self):
+        return self._name
+
+
+
+class Comparison(Predicate):
+    """
+    A field compared with a value, e.g. PRICE > 1000000.
+    """
+
+    def __init__(self, field, symbol, value):
+        self._field = field
+        self._symbol = symbol
+        self._value = value
+        self._cost = field._cost
+
+    def _source(self, bind):
+        return f"{self._field._source} {self._symbol} {bind(self._value)}"
+
+    def _mask(self, table, rows):
+        return _OPERATORS[self._symbol](self._field._table_values(table, rows), self._value)
+
+    def __repr__(self):
+        return f"{self._field!r} {self._symbol} {self._value!r}"
+
+
+
+class Membership(Predicate):
+    """
+    A field taking one of a set of values, e.g. TYPE.isin({SpecialApt, RoofApt}).
+    """
+
+    def __init__(self, field, values):
+        self._field = field
+        self._values = frozenset(values)
+        self._cost = field._cost
+
+    def _source(self, bind):
+        return f"{self._field._source} in {bind(self._values)}"
+
+    def _mask(self, table, rows):
+        return np.isin(self._field._table_values(table, rows), sorted(self._values))
+
+    def __repr__(self):
+        return f"{self._field!r}.isin({sorted(self._values)!r})"
+
+
+
+class And(Predicate):
+    """
+    All of several predicates, evaluated cheapest first.
+    """
+
+    def __init__(self, terms):
+        flat = []
+        for term in terms:
+            flat.extend(term._terms if isinstance(term, And) else [term])
+
+        # stable, so terms of equal cost keep the order they were written in
+        self._terms = sorted(flat, key=lambda term: term._cost)
+        self._cost = sum(term._cost for term in flat)
+
+    def _source(self, bind):
+        return " and ".join(f"({term._source(bind)})" for term in self._terms)
+
+    def _mask(self, table, rows):
+        size = len(table) if rows is None else len(rows)
+        alive = None      # positions in rows still matching, None for all
+        alive_rows = rows  # table rows still matching, None for all
+
+        for term in self._terms:
+            matches = term._mask(table, alive_rows)
+            alive = np.flatnonzero(matches) if alive is None else alive[matches]
+            alive_rows = alive if rows is None else rows[alive]
+            if not len(alive):
+                break
+
+        mask = np.zeros(size, dtype=np.bool_)
+        mask[alive] = True
+        return mask
+
+    def __repr__(self):
+        return " & ".join(f"({term!r})" for term in self._terms)
+
+
+
+class Or(Predicate):
+    """
+    Any of several predicates.
+    """
+
+    def __init__(self, terms):
+        self._terms = []
+        for term in terms:
+            self._terms.extend(term._terms if isinstance(term, Or) else [term])
+        self._cost = sum(term._cost for term in self._terms)
+
+    def _source(self, bind):
+        return " or ".join(f"({term._source(bind)})" for term in self._terms)
+
+    def _mask(self, table, rows):
+        mask = self._terms[0]._mask(table, rows)
+        for term in self._terms[1:]:
+            mask |= term._mask(table, rows)
+        return mask
+
+    def __repr__(self):
+        return " | ".join(f"({term!r})" for term in self._terms)
+
+
+
+class Not(Predicate):
+    """
+    The opposite of a predicate.
+    """
+
+    def __init__(self, term):
+        self._term = term
+        self._cost = term._cost
+
+    def _source(self, bind):
+        return f"not ({self._term._source(bind)})"
+
+    def _mask(self, table, rows):
+        return ~self._term._mask(table, rows)
+
+    def __repr__(self):
+        return f"~({self._term!r})"
+
+
+
+TYPE = TypeField('TYPE', "apt.TYPE_CODE",
+                 lambda table, rows: _rows(table.get_type_code(), rows), TYPE_COST)
+FLOOR = Field('FLOOR', "apt._floor",
+              lambda table, rows: _rows(table.get_floor(), rows), ATTRIBUTE_COST)
+AREA = Field('AREA', "apt._area",
+             lambda table, rows: _rows(table.get_area(), rows), ATTRIBUTE_COST)
+GARDEN_AREA = Field('GARDEN_AREA',
+                    f"(apt._garden_area if apt.TYPE_CODE == {GardenApt.TYPE_CODE} else 0)",
+                    lambda table, rows: _rows(table.get_garden_area(), rows), ATTRIBUTE_COST)
+PRICE = Field('PRICE', _PRICE_SOURCE,
+              lambda table, rows: table.get_prices(rows), PRICE_COST)
+
+HAS_VIEW = Flag('HAS_VIEW', '_has_view', 'SUPPORTS_VIEW', 'get_has_view')
+HAS_POOL = Flag('HAS_POOL', '_has_pool', 'SUPPORTS_POOL', 'get_has_pool')
@@ -29,6 +29,15 @@ class GardenApt(SpecialApt):
         _garden_area (int): The garden area in square meters
     """
 
+    TYPE_CODE = 2
+    SUPPORTS_VIEW = False  # never has a view
+
+    __slots__ = ('_garden_area',)
+
+    _ARG_SLOTS = ('_area', '_garden_area')
+    _FIXED_SLOTS = {'_floor': GROUND_FLOOR, '_has_view': False}
+    _STR_FIELDS = ('floor', 'area', 'has_view', 'garden_area')
+
     def __init__(self,area, garden_area):
         """
         Initialize a new GardenApt instance.
@@ -73,6 +82,9 @@ class GardenApt(SpecialApt):
                 self._has_view == other._has_view and # for clarity only
                 self._garden_area == other._garden_area)
 
+    # defining __eq__ resets __hash__, keep the one that agrees with it
+    __hash__ = SpecialApt.__hash__
+
 
     def __str__(self):
         """
@@ -81,3 +93,10 @@ class GardenApt(SpecialApt):
             str: String including parent class info and garden area
         """
         return f"{super().__str__()}, garden_area: {self._garden_area}"
+
+
+    def __reduce__(self):
+        """
+        Pickle the garden apartment as its constructor arguments.
+        """
+        return type(self), (self._area, self._garden_area)
@@ -0,0 +1,365 @@
+"""
+Group-by aggregation over apartments.
+
+This module breaks the mmn15 statistics down by apartment attributes in a
+single pass. Groups are defined by keys and summarized by aggregates:
+
+    group_by(apts, keys=('type', floor_band(10)), aggs=('count', 'avg_price'))
+
+returns {('RoofApt', 20): {'count': 12, 'avg_price': 3516000.0}, ...}.
+
+Keys are GroupKey objects or the names of the KEYS below:
+    'type'         name of the apartment type
+    'has_view'     whether the apartment has a view
+    'has_pool'     whether the apartment has a pool
+    'floor_band'   floor_band(DEFAULT_FLOOR_BAND)
+    'area_bucket'  area_bucket(DEFAULT_AREA_BUCKET)
+
+Aggregates are names from AGGREGATES: 'count', 'sum_price', 'avg_price',
+'min_price', 'max_price' and 'top_price' (the first apartment of the group
+with the highest price, as mmn15.top_price). Apartments are priced once,
+and not at all when only counts are asked for.
+
+group_by runs over apartment objects with one compiled key function, and
+group_by_table runs over an ApartmentTable with whole-array reductions;
+both take linear time and return the groups in order of first appearance.
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import functools
+import operator
+import re
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed to group ApartmentTable rows
+    np = None
+
+from apt import APT_TYPES
+
+DEFAULT_FLOOR_BAND = 5
+DEFAULT_AREA_BUCKET = 50
+
+AGGREGATES = ('count', 'sum_price', 'avg_price', 'min_price', 'max_price', 'top_price')
+
+# what group_by keeps for every group when prices are needed
+_STATE = ('count', 'sum_price', 'min_price', 'max_price', 'top_price')
+
+
+
+class GroupKey:
+    """
+    An apartment attribute that apartments are grouped by.
+
+    Attributes:
+        _name (str): Name of the key
+        _source (str): Python expression computing the key of `apt`
+        _table_values (function): Computes the keys of all rows of a table
+        _label (function): Converts a computed key to the key reported in
+                           the results, or None to report it as is
+    """
+
+    def __init__(self, name, source, table_values, label=None):
+        """
+        Initialize a new GroupKey.
+
+        Args:
+            name (str): Name of the key
+            source (str): Python expression computing the key of `apt`;
+                          it must be hashable
+            table_values (function): table -> integer or boolean array of
+                                     the keys of every row
+            label (function): Converts a computed key to the reported key
+        """
+        self._name = name
+        self._source = source
+        self._table_values = table_values
+        self._label = label
+
+
+    def label(self, value):
+        """
+        Args:
+            value: A key as computed by the source expression
+
+        Returns:
+            The key as reported in the results
+        """
+        return value if self._label is None else self._label(value)
+
+
+    def __repr__(self):
+        return self._name
+
+
+def floor_band(width=DEFAULT_FLOOR_BAND):
+    """
+    Args:
+        width (int): Number of floors in a band
+
+    Returns:
+        GroupKey: Groups floors into bands, reported by their lowest floor
+    """
+    return GroupKey(f"floor_band({width})", f"apt._floor // {width} * {width}",
+                    lambda table: table.get_floor() // width * width)
+
+
+def area_bucket(width=DEFAULT_AREA_BUCKET):
+    """
+    Args:
+        width (int): Square meters in a bucket
+
+    Returns:
+        GroupKey: Groups areas into buckets, reported by their smallest area
+    """
+    return GroupKey(f"area_bucket({width})", f"apt._area // {width} * {width}",
+                    lambda table: table.get_area() // width * width)
+
+
+KEYS = {
+    'type': GroupKey('type', "apt.TYPE_CODE", lambda table: table.get_type_code(),
+                     lambda code: APT_TYPES[code].__name__),
+    # the table columns hold False for types without the feature
+    'has_view': GroupKey('has_view', "(apt.SUPPORTS_VIEW and apt._has_view)",
+                         lambda table: table.get_has_view(), bool),
+    'has_pool': GroupKey('has_pool', "(apt.SUPPORTS_POOL and apt._has_pool)",
+                         lambda table: table.get_has_pool(), bool),
+    'floor_band': floor_band(),
+    'area_bucket': area_bucket(),
+}
+
+
+def _keys(keys):
+    """
+    Returns:
+        list: The GroupKey of every key or key name
+
+    Raises:
+        ValueError: If there are no keys or a key name is unknown
+    """
+    if isinstance(keys, (str, GroupKey)):
+        keys = (keys,)
+    if not keys:
+        raise ValueError("group_by needs at least one key")
+
+    resolved = []
+    for key in keys:
+        if isinstance(key, str):
+            if key not in KEYS:
+                raise ValueError(f"unknown group key: {key!r}")
+            key = KEYS[key]
+        resolved.append(key)
+    return resolved
+
+
+def _aggs(aggs):
+    """
+    Returns:
+        tuple: The aggregate names
+
+    Raises:
+        ValueError: If an aggregate name is unknown
+    """
+    if isinstance(aggs, str):
+        aggs = (aggs,)
+    for agg in aggs:
+        if agg not in AGGREGATES:
+            raise ValueError(f"unknown aggregate: {agg!r}")
+    return tuple(aggs)
+
+
+@functools.lru_cache(maxsize=64)
+def _key_function(sources):
+    """
+    Compile the function computing the group of an apartment.
+
+    Args:
+        sources (tuple): The source expressions of the keys
+
+    Returns:
+        function: apt -> tuple of the computed keys, or the computed key
+                  itself when there is only one key
+    """
+    if len(sources) == 1:
+        # a plain attribute read is much faster through attrgetter
+        match = re.fullmatch(r"apt\.(\w+)", sources[0])
+        if match:
+            return operator.attrgetter(match.group(1))
+        source = f"lambda apt: {sources[0]}"
+    else:
+        source = f"lambda apt: ({', '.join(sources)})"
+    return eval(compile(source, f"<group key {source}>", 'eval'))
+
+
+def _results(group, keys, values, aggs):
+    """
+    Args:
+        group (tuple): The computed keys of the group
+        keys (list): The GroupKey objects
+        values (dict): 'count' of the group and, when prices were
+                       computed, 'sum_price', 'min_price', 'max_price'
+                       and 'top_price'
+        aggs (tuple): The requested aggregate names
+
+    Returns:
+        tuple: (reported group key, dict of the requested aggregates)
+    """
+    results = {}
+    for agg in aggs:
+        results[agg] = values['sum_price'] / values['count'] if agg == 'avg_price' else values[agg]
+    return tuple(key.label(value) for key, value in zip(keys, group)), results
+
+
+def group_by(apts, keys=('type',), aggs=('count',)):
+    """
+    Group apartments and aggregate every group in one pass.
+
+    Args:
+        apts (iterable): Apartment objects, consumed only once
+        keys (tuple): GroupKey objects or names of KEYS
+        aggs (tuple): Names of AGGREGATES
+
+    Returns:
+        dict: Tuple of the group keys -> dict of aggregate name -> value,
+              in order of first appearance. Groups without apartments are
+              left out.
+
+    Raises:
+        ValueError: If a key or an aggregate is unknown
+    """
+    keys = _keys(keys)
+    aggs = _aggs(aggs)
+    key_of = _key_function(tuple(key._source for key in keys))
+    # a single key is computed bare, see _key_function
+    single = len(keys) == 1
+
+    if all(agg == 'count' for agg in aggs):
+        counts = Counter(map(key_of, apts))
+        return dict(_results((group,) if single else group, keys, {'count': count}, aggs)
+                    for group, count in counts.items())
+
+    # group -> [count, sum, min, max, first apartment with the max]
+    states = {}
+    for apt in apts:
+        group = key_of(apt)
+        price = apt.get_price()
+        state = states.get(group)
+        if state is None:
+            states[group] = [1, price, price, price, apt]
+            continue
+        state[0] += 1
+        state[1] += price
+        if price < state[2]:
+            state[2] = price
+        # strictly greater keeps the first of several top apartments
+        if price > state[3]:
+            state[3] = price
+            state[4] = apt
+
+    return dict(_results((group,) if single else group, keys, dict(zip(_STATE, state)), aggs)
+                for group, state in states.items())
+
+
+def _dense_ids(values):
+    """
+    Number the distinct values of an array.
+
+    Small integer ranges are numbered with a lookup table in linear time;
+    other arrays fall back to sorting.
+
+    Args:
+        values (ndarray): Integer or boolean values
+
+    Returns:
+        tuple: (distinct values in ascending order, id of every value)
+    """
+    if values.dtype.kind == 'b':
+        values = values.view(np.uint8)
+    if not len(values):
+        return values[:0], np.zeros(0, dtype=np.int64)
+
+    lowest = int(values.min())
+    span = int(values.max()) - lowest + 1
+    if span > 4 * len(values):
+        return np.unique(values, return_inverse=True)
+
+    offsets = values.astype(np.int64) - lowest
+    present = np.flatnonzero(np.bincount(offsets, minlength=span))
+    lookup = np.zeros(span, dtype=np.int64)
+    lookup[present] = np.arange(len(present))
+    return present + lowest, lookup[offsets]
+
+
+def group_by_table(table, keys=('type',), aggs=('count',)):
+    """
+    Group the rows of an apartment table with whole-array reductions.
+
+    Args:
+        table (ApartmentTable): The apartments
+        keys (tuple): GroupKey objects or names of KEYS
+        aggs (tuple): Names of AGGREGATES
+
+    Returns:
+        dict: The groups and aggregates as returned by group_by for the
+              apartments of the table
+
+    Raises:
+        ValueError: If a key or an aggregate is unknown
+        ImportError: If numpy is not installed
+    """
+    if np is None:
+        raise ImportError("grouping apartment tables requires numpy")
+    keys = _keys(keys)
+    aggs = _aggs(aggs)
+    size = len(table)
+    if not size:
+        return {}
+
+    # number every combination of key values, then the combinations present
+    distinct = []
+    combined = np.zeros(size, dtype=np.int64)
+    for key in keys:
+        values, ids = _dense_ids(np.asarray(key._table_values(table)))
+        distinct.append(values)
+        combined = combined * len(values) + ids
+    group_combined, group_ids = _dense_ids(combined)
+    group_count = len(group_combined)
+
+    rows = np.arange(size)
+    first_rows = np.full(group_count, size)
+    np.minimum.at(first_rows, group_ids, rows)
+    order = np.argsort(first_rows)
+
+    columns = {'count': np.bincount(group_ids, minlength=group_count)}
+    if any(agg != 'count' for agg in aggs):
+        prices = table.get_prices()
+        # the float sums are exact while they stay below 2 ** 53
+        columns['sum_price'] = np.bincount(group_ids, weights=prices,
+                                           minlength=group_count).astype(np.int64)
+        columns['min_price'] = np.full(group_count, np.iinfo(np.int64).max)
+        np.minimum.at(columns['min_price'], group_ids, prices)
+        columns['max_price'] = np.full(group_count, np.iinfo(np.int64).min)
+        np.maximum.at(columns['max_price'], group_ids, prices)
+
+    top_rows = None
+    if 'top_price' in aggs:
+        top_candidates = np.flatnonzero(prices == columns['max_price'][group_ids])
+        top_rows = np.full(group_count, size)
+        np.minimum.at(top_rows, group_ids[top_candidates], top_candidates)
+
+    # split the combination numbers back into the values of every key
+    key_indexes = np.unravel_index(group_combined, [len(values) for values in distinct])
+    key_values = [values[indexes].tolist() for values, indexes in zip(distinct, key_indexes)]
+    columns = {name: column.tolist() for name, column in columns.items()}
+
+    groups = {}
+    for group in order.tolist():
+        values = {name: column[group] for name, column in columns.items()}
+        if top_rows is not None:
+            values['top_price'] = table.apt_at(int(top_rows[group]))
+        label, results = _results(tuple(column[group] for column in key_values),
+                                  keys, values, aggs)
+        groups[label] = results
+    return groups
@@ -0,0 +1,219 @@
+"""
+Asyncio ingestion pipeline feeding the mmn15 aggregates.
+
+This module defines the IngestPipeline class that reads apartment records
+from many concurrent producers (sockets, pipes, files or any async source
+of lines), parses them into apartment objects and feeds them into an
+ApartmentReport while ingestion continues. Producers hand batches to the
+consumer through a bounded queue, so a slow consumer pushes back on the
+producers instead of letting parsed apartments pile up in memory.
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import asyncio
+
+from records import parse_json_line
+from report import ApartmentReport
+
+DEFAULT_QUEUE_SIZE = 64
+DEFAULT_BATCH_SIZE = 256
+FILE_READ_SIZE = 1 << 20
+
+
+async def stream_lines(reader):
+    """
+    Yield the lines of an asyncio stream, e.g. a socket or a pipe.
+
+    Args:
+        reader (asyncio.StreamReader): The stream to read
+
+    Yields:
+        bytes: Every line of the stream
+    """
+    while True:
+        line = await reader.readline()
+        if not line:
+            return
+        yield line
+
+
+async def file_lines(path):
+    """
+    Yield the lines of a file without blocking the event loop.
+
+    Args:
+        path (str): Path of the file
+
+    Yields:
+        bytes: Every line of the file
+    """
+    with open(path, 'rb') as file:
+        while True:
+            lines = await asyncio.to_thread(file.readlines, FILE_READ_SIZE)
+            if not lines:
+                return
+            for line in lines:
+                yield line
+
+
+
+class IngestPipeline:
+    """
+    Parses apartments from concurrent producers into a live ApartmentReport.
+
+    Typical use:
+
+        pipeline = IngestPipeline()
+        await pipeline.run(pipeline.feed(stream_lines(reader), 'socket'),
+                           pipeline.feed(file_lines(path), path))
+
+    snapshot() may be called from other tasks at any time while run() is
+    in progress.
+
+    Attributes:
+        _queue (asyncio.Queue): Bounded queue of parsed batches
+        _batch_size (int): Apartments per batch handed to the consumer
+        _parse (callable): Builds an apartment from one line
+        _report (ApartmentReport): The aggregates of everything consumed
+        _errors (list): (source, line number, message) of every bad line
+    """
+
+    def __init__(self, queue_size=DEFAULT_QUEUE_SIZE, batch_size=DEFAULT_BATCH_SIZE,
+                 parse=parse_json_line):
+        """
+        Initialize a new IngestPipeline.
+
+        Args:
+            queue_size (int): Maximum number of batches waiting for the consumer
+            batch_size (int): Maximum number of apartments per batch
+            parse (callable): Builds an apartment from one line, raising
+                              ValueError for bad lines (default: JSON Lines)
+        """
+        self._queue = asyncio.Queue(maxsize=queue_size)
+        self._batch_size = batch_size
+        self._parse = parse
+        self._report = ApartmentReport()
+        self._errors = []
+
+
+    async def feed(self, lines, source='producer'):
+        """
+        Parse lines from one producer and queue them for the consumer.
+
+        Blank lines are skipped. Lines that fail to parse are recorded in
+        get_errors() and skipped.
+
+        Args:
+            lines (async iterable): Lines of text or bytes, one record each
+            source (str): Name of the producer used in error reports
+        """
+        parse = self._parse
+        batch = []
+        line_number = 0
+
+        async for line in lines:
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                batch.append(parse(line))
+            except ValueError as error:
+                self._errors.append((source, line_number, str(error)))
+                continue
+
+            if len(batch) >= self._batch_size:
+                await self._queue.put(batch)  # waits while the queue is full
+                batch = []
+
+        if batch:
+            await self._queue.put(batch)
+
+
+    async def _consume(self):
+        """
+        Add queued batches to the report until the end marker arrives.
+        """
+        while True:
+            batch = await self._queue.get()
+            if batch is None:
+                return
+            self._report.update(batch)
+
+
+    async def run(self, *producers):
+        """
+        Run producers to completion while consuming what they produce.
+
+        If a producer or the consumer fails, or run() is cancelled, every
+        other producer and the consumer are cancelled before run() returns,
+        so no task is left waiting on the queue.
+
+        Args:
+            *producers (coroutine): feed() coroutines, run concurrently
+
+        Returns:
+            ApartmentReport: The report of everything ingested
+
+        Raises:
+            Exception: The first error raised by a producer or the consumer
+        """
+        consumer = asyncio.create_task(self._consume())
+        tasks = [asyncio.ensure_future(producer) for producer in producers]
+        try:
+            # the consumer is watched too: producers blocked on a full queue
+            # would wait forever on a consumer that died
+            remaining = set(tasks)
+            while remaining:
+                done, _ = await asyncio.wait(remaining | {consumer},
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if consumer in done:
+                    consumer.result()
+                    raise RuntimeError("the consumer stopped before the producers")
+                for task in done:
+                    task.result()
+                remaining -= done
+
+            end = asyncio.ensure_future(self._queue.put(None))
+            tasks.append(end)
+            await asyncio.wait((end, consumer), return_when=asyncio.FIRST_COMPLETED)
+            await consumer
+        finally:
+            for task in tasks + [consumer]:
+                task.cancel()
+            await asyncio.gather(*tasks, consumer, return_exceptions=True)
+        return self._report
+
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: The current results of the five aggregates and the number
+                  of apartments and bad lines seen so far
+        """
+        report = self._report
+        return {
+            'count': len(report),
+            'errors': len(self._errors),
+            'average_price': report.average_price(),
+            'how_many_rooftop': report.how_many_rooftop(),
+            'how_many_apt_type': report.how_many_apt_type(),
+            'top_price': report.top_price(),
+            'only_valid_apts': report.only_valid_apts(),
+        }
+
+
+    def get_report(self):
+        """
+        Returns:
+            ApartmentReport: The live report of everything consumed so far
+        """
+        return self._report
+
+
+    def get_errors(self):
+        """
+        Returns:
+            list: (source, line number, message) of every bad line
+        """
+        return list(self._errors)
@@ -0,0 +1,212 @@
+"""
+Opt-in instrumentation of get_price and the mmn15 functions.
+
+When enabled, every get_price call is counted and timed per apartment type,
+and every call of the mmn15 utility functions is counted and timed per
+function. The numbers can be read with snapshot() or written to a JSON file
+or to a Prometheus text exposition file.
+
+When disabled (the default) the original functions are in place and the
+instrumentation costs nothing. The wrappers are installed through
+method_hooks, so instrumentation can be combined with price_cache in any
+order; enabled on top of the cache, get_price timings include cache hits.
+
+The mmn15 functions are wrapped on the mmn15 module, so only calls made
+through the module (mmn15.average_price(...)) are recorded, not calls
+through names imported from it before instrumentation was enabled.
+Counters are updated without locking, so counts from several threads
+calling at once may be slightly low.
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import functools
+import json
+from collections import defaultdict
+from time import perf_counter_ns
+
+import method_hooks
+import mmn15
+from apt import Apt, APT_TYPES
+
+FEATURE = 'instrumentation'
+
+INSTRUMENTED_FUNCTIONS = ('average_price', 'how_many_rooftop', 'how_many_apt_type',
+                          'top_price', 'only_valid_apts')
+
+# [calls, nanoseconds] of get_price by type code, and of each mmn15 function
+_price_counters = defaultdict(lambda: [0, 0])
+_function_counters = defaultdict(lambda: [0, 0])
+
+
+def _timing_price(compute):
+    """
+    Wrap a get_price method with a per-type call counter and timer.
+
+    Args:
+        compute (function): The get_price method to wrap
+
+    Returns:
+        function: A get_price method that records its calls
+    """
+    @functools.wraps(compute)
+    def get_price(self):
+        start = perf_counter_ns()
+        price = compute(self)
+        elapsed = perf_counter_ns() - start
+
+        counter = _price_counters[self.TYPE_CODE]
+        counter[0] += 1
+        counter[1] += elapsed
+        return price
+
+    return get_price
+
+
+def _timing_function(function):
+    """
+    Wrap an mmn15 function with a call counter and timer.
+
+    Args:
+        function (function): The function to wrap
+
+    Returns:
+        function: A function that records its calls
+    """
+    counter = _function_counters[function.__name__]
+
+    @functools.wraps(function)
+    def timed(*args, **kwargs):
+        start = perf_counter_ns()
+        result = function(*args, **kwargs)
+        elapsed = perf_counter_ns() - start
+
+        counter[0] += 1
+        counter[1] += elapsed
+        return result
+
+    return timed
+
+
+def enable():
+    """
+    Turn on instrumentation for Apt, every subclass defined so far and the
+    mmn15 functions.
+
+    Calling enable again while instrumentation is on has no effect.
+    """
+    if is_enabled():
+        return
+
+    for cls in method_hooks.hierarchy(Apt):
+        if 'get_price' in vars(cls):
+            method_hooks.install(FEATURE, cls, 'get_price', _timing_price)
+
+    for name in INSTRUMENTED_FUNCTIONS:
+        method_hooks.install(FEATURE, mmn15, name, _timing_function)
+
+
+def disable():
+    """
+    Turn off instrumentation and restore the original functions.
+
+    The recorded numbers are kept until reset().
+    """
+    method_hooks.uninstall(FEATURE)
+
+
+def is_enabled():
+    """
+    Returns:
+        bool: True if instrumentation is on, False otherwise
+    """
+    return method_hooks.is_installed(FEATURE)
+
+
+def reset():
+    """
+    Reset all recorded numbers to zero.
+    """
+    for counter in list(_price_counters.values()) + list(_function_counters.values()):
+        counter[0] = 0
+        counter[1] = 0
+
+
+def _stats(counter):
+    """
+    Returns:
+        dict: The 'calls' and cumulative 'seconds' of a counter
+    """
+    calls, nanoseconds = counter if counter is not None else (0, 0)
+    return {'calls': calls, 'seconds': nanoseconds / 1e9}
+
+
+def snapshot():
+    """
+    Returns:
+        dict: 'get_price' maps every registered apartment type name, in
+              type code order, and 'functions' maps every instrumented
+              mmn15 function name, to its 'calls' and cumulative 'seconds'
+    """
+    return {
+        'get_price': {APT_TYPES[code].__name__: _stats(_price_counters.get(code))
+                      for code in sorted(APT_TYPES)},
+        'functions': {name: _stats(_function_counters.get(name))
+                      for name in INSTRUMENTED_FUNCTIONS},
+    }
+
+
+def to_prometheus(data=None):
+    """
+    Format recorded numbers in the Prometheus text exposition format.
+
+    Args:
+        data (dict): A snapshot() result (default: a new snapshot)
+
+    Returns:
+        str: The metrics text
+    """
+    if data is None:
+        data = snapshot()
+
+    metrics = (
+        ('apt_get_price_calls_total', 'get_price', 'type', 'calls',
+         'Number of get_price calls by apartment type.'),
+        ('apt_get_price_seconds_total', 'get_price', 'type', 'seconds',
+         'Time spent in get_price by apartment type.'),
+        ('mmn15_function_calls_total', 'functions', 'function', 'calls',
+         'Number of calls of each mmn15 function.'),
+        ('mmn15_function_seconds_total', 'functions', 'function', 'seconds',
+         'Time spent in each mmn15 function.'),
+    )
+
+    lines = []
+    for metric, section, label, field, description in metrics:
+        lines.append(f"# HELP {metric} {description}")
+        lines.append(f"# TYPE {metric} counter")
+        for key, stats in data[section].items():
+            lines.append(f'{metric}{{{label}="{key}"}} {stats[field]}')
+    return "\n".join(lines) + "\n"
+
+
+def dump_json(path):
+    """
+    Write a snapshot to a JSON file.
+
+    Args:
+        path (str): Path of the file
+    """
+    with open(path, 'w') as file:
+        json.dump(snapshot(), file, indent=2)
+
+
+def dump_prometheus(path):
+    """
+    Write a snapshot to a Prometheus text exposition file.
+
+    Args:
+        path (str): Path of the file, e.g. for the node exporter textfile
+                    collector
+    """
+    with open(path, 'w') as file:
+        file.write(to_prometheus())
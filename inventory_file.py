@@ -0,0 +1,260 @@
+"""
+Binary apartment inventory files for the apartment management system.
+
+This module defines a compact fixed-width on-disk format for inventories of
+Apt, SpecialApt, GardenApt and RoofApt objects, a writer for it, and a
+memory-mapped reader that exposes the records as zero-copy columns or
+materializes apartment objects lazily on access.
+
+File layout (little endian):
+    header   16 bytes: MAGIC (8 bytes), record count (uint64)
+    records  16 bytes each, see RECORD_DTYPE
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import struct
+
+import numpy as np
+
+from apartment_table import ApartmentTable
+
+MAGIC = b'APTINV01'
+HEADER = struct.Struct('<8sQ')
+
+RECORD_DTYPE = np.dtype([
+    ('type_code', 'u1'),
+    ('has_view', 'u1'),
+    ('has_pool', 'u1'),
+    ('reserved', 'u1'),
+    ('floor', '<i4'),
+    ('area', '<i4'),
+    ('garden_area', '<i4')
+])
+
+
+# the integer columns checked against the range of their record fields
+_INT_FIELDS = ('floor', 'area', 'garden_area')
+
+
+def table_to_records(table):
+    """
+    Convert an apartment table to an array of binary records.
+
+    Args:
+        table (ApartmentTable): The apartments
+
+    Returns:
+        ndarray: One RECORD_DTYPE record per row
+
+    Raises:
+        ValueError: If a floor or area does not fit in its record field
+    """
+    for name in _INT_FIELDS:
+        column = getattr(table, f"get_{name}")()
+        limits = np.iinfo(RECORD_DTYPE[name])
+        if len(column) and (column.min() < limits.min or column.max() > limits.max):
+            raise ValueError(f"{name} values must be between {limits.min} and {limits.max}")
+
+    records = np.zeros(len(table), dtype=RECORD_DTYPE)
+    records['type_code'] = table.get_type_code()
+    records['has_view'] = table.get_has_view()
+    records['has_pool'] = table.get_has_pool()
+    records['floor'] = table.get_floor()
+    records['area'] = table.get_area()
+    records['garden_area'] = table.get_garden_area()
+    return records
+
+
+def records_to_table(records):
+    """
+    Wrap an array of binary records in an apartment table without copying.
+
+    Args:
+        records (ndarray): RECORD_DTYPE records
+
+    Returns:
+        ApartmentTable: A table whose columns are views of the records
+    """
+    return ApartmentTable(records['type_code'],
+                          records['floor'],
+                          records['area'],
+                          records['has_view'].view(np.bool_),
+                          records['has_pool'].view(np.bool_),
+                          records['garden_area'])
+
+
+
+class InventoryWriter:
+    """
+    Writes apartments to a binary inventory file in batches.
+
+    Use as a context manager, or call close() when done: the record count
+    in the header is written on close.
+
+    Attributes:
+        _file (file): The open output file
+        _count (int): Number of records written so far
+    """
+
+    def __init__(self, path):
+        """
+        Initialize a new InventoryWriter and create the file.
+
+        Args:
+            path (str): Path of the file to create (overwritten if it exists)
+        """
+        self._file = open(path, 'wb')
+        self._count = 0
+        self._file.write(HEADER.pack(MAGIC, 0))
+
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+    def write(self, apts):
+        """
+        Append apartments to the file.
+
+        Args:
+            apts (iterable): Apt, SpecialApt, GardenApt or RoofApt objects
+        """
+        self.write_table(ApartmentTable.from_apts(apts))
+
+
+    def write_table(self, table):
+        """
+        Append the rows of an apartment table to the file.
+
+        Args:
+            table (ApartmentTable): The apartments
+
+        Raises:
+            ValueError: If a floor or area does not fit in its record field
+        """
+        self._file.write(table_to_records(table).tobytes())
+        self._count += len(table)
+
+
+    def close(self):
+        """
+        Write the header and close the file.
+        """
+        if self._file.closed:
+            return
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, self._count))
+        self._file.close()
+
+
+def write_inventory(path, apts):
+    """
+    Write apartments to a new binary inventory file.
+
+    Args:
+        path (str): Path of the file to create
+        apts (iterable): Apt, SpecialApt, GardenApt or RoofApt objects
+    """
+    with InventoryWriter(path) as writer:
+        writer.write(apts)
+
+
+
+class InventoryReader:
+    """
+    Memory-mapped reader of a binary inventory file.
+
+    The records are not parsed when the file is opened. get_table() returns
+    a zero-copy columnar view that the apartment_table functions run on
+    directly, and indexing or iterating builds apartment objects only for
+    the records accessed.
+
+    Attributes:
+        _records (ndarray): Memory-mapped RECORD_DTYPE records
+        _table (ApartmentTable): Columnar view of _records
+    """
+
+    def __init__(self, path):
+        """
+        Initialize a new InventoryReader.
+
+        Args:
+            path (str): Path of the inventory file
+
+        Raises:
+            ValueError: If the file is not an inventory file or is truncated
+        """
+        with open(path, 'rb') as file:
+            magic, count = HEADER.unpack(file.read(HEADER.size).ljust(HEADER.size, b'\0'))
+            file.seek(0, 2)
+            size = file.tell()
+
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an apartment inventory file")
+        if size < HEADER.size + count * RECORD_DTYPE.itemsize:
+            raise ValueError(f"{path} is truncated")
+
+        if count:
+            self._records = np.memmap(path, dtype=RECORD_DTYPE, mode='r',
+                                      offset=HEADER.size, shape=(count,))
+        else:
+            # an empty file region cannot be mapped
+            self._records = np.zeros(0, dtype=RECORD_DTYPE)
+        self._table = records_to_table(self._records)
+
+
+    def __len__(self):
+        """
+        Returns:
+            int: The number of apartments in the file
+        """
+        return len(self._records)
+
+
+    def __getitem__(self, index):
+        """
+        Build the apartment object of a single record.
+
+        Args:
+            index (int): The record number
+
+        Returns:
+            Apt: An Apt, SpecialApt, GardenApt or RoofApt object
+
+        Raises:
+            ValueError: If the record holds an unknown type code
+        """
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("inventory index out of range")
+        return self._table.apt_at(index)
+
+
+    def __iter__(self):
+        """
+        Yields:
+            Apt: The apartment object of every record, built one at a time
+        """
+        for index in range(len(self)):
+            yield self._table.apt_at(index)
+
+
+    def get_records(self):
+        """
+        Returns:
+            ndarray: The memory-mapped records
+        """
+        return self._records
+
+
+    def get_table(self):
+        """
+        Returns:
+            ApartmentTable: A zero-copy columnar view of the records
+        """
+        return self._table
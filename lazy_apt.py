@@ -0,0 +1,231 @@
+"""
+Lazy apartments backed by columnar storage.
+
+This module defines proxy apartments that hold only a row number into an
+ApartmentTable and read their attributes from its columns on demand, and
+the LazyInventory sequence that hands them out. A proxy is a subclass of
+the apartment class of its row, so it prices, compares and prints like the
+real apartment and the mmn15 functions accept it unchanged.
+
+A LazyInventory keeps no per-row Python objects: proxies are created when
+a row is accessed and dropped with the last reference to them, so a pass
+over a large inventory holds one proxy at a time.
+"""
+
+__author__ = "Bar-chaim Billy"
+
+from apt import Apt
+from special_apt import SpecialApt
+from garden_apt import GardenApt
+from roof_apt import RoofApt
+from apartment_table import (ApartmentTable, APT_CODE, SPECIAL_APT_CODE,
+                             GARDEN_APT_CODE, ROOF_APT_CODE)
+
+# rows converted to Python values at a time while iterating
+ITER_CHUNK_SIZE = 4096
+
+
+class _LazyRow:
+    """
+    Reads the attributes of a proxy apartment from its table row.
+
+    The properties shadow the slots of the apartment classes, so every
+    inherited method of the real class works on the row. The concrete
+    proxy classes declare the _table and _row slots.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, table, row):
+        """
+        Initialize a new proxy apartment.
+
+        Args:
+            table (ApartmentTable): The table holding the apartment
+            row (int): The row of the apartment in the table
+        """
+        self._table = table
+        self._row = row
+
+
+    @property
+    def _floor(self):
+        return self._table.get_floor().item(self._row)
+
+    @property
+    def _area(self):
+        return self._table.get_area().item(self._row)
+
+    @property
+    def _has_view(self):
+        return self._table.get_has_view().item(self._row)
+
+    @property
+    def _has_pool(self):
+        return self._table.get_has_pool().item(self._row)
+
+    @property
+    def _garden_area(self):
+        return self._table.get_garden_area().item(self._row)
+
+
+    def materialize(self):
+        """
+        Returns:
+            Apt: A real apartment object equal to the proxy
+        """
+        return self._table.apt_at(self._row)
+
+
+    def __eq__(self, other):
+        """
+        Compare the apartment of the row like its real apartment object.
+
+        The equality rules of the apartment classes check exact types, so
+        both sides are compared as real apartments.
+        """
+        if isinstance(other, _LazyRow):
+            other = other.materialize()
+        return self.materialize() == other
+
+    # defining __eq__ resets __hash__, keep the one that agrees with it
+    __hash__ = Apt.__hash__
+
+
+    def __reduce__(self):
+        """
+        Pickle the proxy as the real apartment, without its table.
+        """
+        return self.materialize().__reduce__()
+
+
+
+class LazyApt(_LazyRow, Apt):
+    """A basic apartment read from a table row."""
+
+    __slots__ = ('_table', '_row')
+
+
+class LazySpecialApt(_LazyRow, SpecialApt):
+    """A special apartment read from a table row."""
+
+    __slots__ = ('_table', '_row')
+
+
+class LazyGardenApt(_LazyRow, GardenApt):
+    """A garden apartment read from a table row."""
+
+    __slots__ = ('_table', '_row')
+
+
+class LazyRoofApt(_LazyRow, RoofApt):
+    """A roof apartment read from a table row."""
+
+    __slots__ = ('_table', '_row')
+
+
+# proxy class of each type code stored in a table
+LAZY_TYPES = {
+    APT_CODE: LazyApt,
+    SPECIAL_APT_CODE: LazySpecialApt,
+    GARDEN_APT_CODE: LazyGardenApt,
+    ROOF_APT_CODE: LazyRoofApt,
+}
+
+
+
+class LazyInventory:
+    """
+    A read-only sequence of proxy apartments over an ApartmentTable.
+
+    Indexing returns a new proxy for the row, slicing returns a
+    LazyInventory over a view of the table, and iteration creates proxies
+    one at a time. It can be passed to the mmn15 functions in place of a
+    list of apartments.
+
+    Attributes:
+        _table (ApartmentTable): The table holding the apartments
+    """
+
+    def __init__(self, table):
+        """
+        Initialize a new LazyInventory.
+
+        Args:
+            table (ApartmentTable): The table holding the apartments
+        """
+        self._table = table
+
+
+    @classmethod
+    def from_apts(cls, apts):
+        """
+        Store apartment objects in a table and return a lazy view of it.
+
+        Args:
+            apts (iterable): Apt, SpecialApt, GardenApt or RoofApt objects
+
+        Returns:
+            LazyInventory: The inventory of the stored apartments
+        """
+        return cls(ApartmentTable.from_apts(apts))
+
+
+    def get_table(self):
+        """
+        Returns:
+            ApartmentTable: The table holding the apartments
+        """
+        return self._table
+
+
+    def __len__(self):
+        """
+        Returns:
+            int: The number of apartments
+        """
+        return len(self._table)
+
+
+    def __getitem__(self, key):
+        """
+        Args:
+            key (int or slice): A row number or a slice of rows
+
+        Returns:
+            Apt or LazyInventory: The proxy apartment of the row, or an
+                                  inventory over a view of the rows
+
+        Raises:
+            IndexError: If the row number is out of range
+        """
+        table = self._table
+
+        if isinstance(key, slice):
+            return LazyInventory(ApartmentTable(
+                table.get_type_code()[key], table.get_floor()[key], table.get_area()[key],
+                table.get_has_view()[key], table.get_has_pool()[key],
+                table.get_garden_area()[key]))
+
+        size = len(table)
+        row = key.__index__()
+        if row < 0:
+            row += size
+        if not 0 <= row < size:
+            raise IndexError("inventory index out of range")
+
+        return LAZY_TYPES[table.get_type_code().item(row)](table, row)
+
+
+    def __iter__(self):
+        """
+        Yields:
+            Apt: A new proxy apartment for every row, in order
+        """
+        table = self._table
+        type_code = table.get_type_code()
+
+        for start in range(0, len(table), ITER_CHUNK_SIZE):
+            codes = type_code[start:start + ITER_CHUNK_SIZE].tolist()
+            for row, code in enumerate(codes, start):
+                yield LAZY_TYPES[code](table, row)
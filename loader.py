@@ -0,0 +1,272 @@
+"""
+Chunked CSV and JSON Lines loader for apartment listings.
+
+This module reads a listings file in large chunks of whole lines, parses
+the chunks in a pool of worker processes and yields batches of apartment
+objects, or ApartmentTable batches, in file order. Rows that fail to parse
+are skipped and reported with their line numbers.
+
+Only a bounded number of chunks is read ahead of the consumer, so peak
+memory depends on the chunk size and the number of workers, not on the
+size of the file.
+
+CSV files must start with a header row naming columns from
+records.FIELDS, including at least REQUIRED_COLUMNS; a field may not
+contain a line break. A UTF-8 byte order mark at the start of a file, as
+written by spreadsheet programs, is skipped.
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import codecs
+import csv
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from apartment_table import ApartmentTable
+from records import FIELDS, apt_from_record, parse_json_line
+
+CSV = 'csv'
+JSONL = 'jsonl'
+
+FORMATS_BY_EXTENSION = {'.csv': CSV, '.jsonl': JSONL, '.ndjson': JSONL}
+
+# the columns every apartment type needs, see records.apt_from_record;
+# columns only some types need are checked row by row
+REQUIRED_COLUMNS = ('type', 'area')
+
+DEFAULT_CHUNK_SIZE = 4 << 20  # bytes
+CHUNKS_AHEAD_PER_WORKER = 2
+
+
+def _parse_chunk(file_format, header, first_line, data, columnar):
+    """
+    Parse a chunk of whole lines, run inside the worker processes.
+
+    Args:
+        file_format (str): CSV or JSONL
+        header (list): CSV column names, None for JSONL
+        first_line (int): Line number of the first line of the chunk
+        data (bytes): The lines
+        columnar (bool): Return an ApartmentTable instead of a list
+
+    Returns:
+        tuple: (list of apartments or ApartmentTable, list of
+               (line number, message) of the bad lines)
+    """
+    apts = []
+    errors = []
+    # split on newlines only, so line numbers agree with the file
+    lines = data.decode('utf-8', errors='replace').split('\n')
+    if lines[-1] == '':
+        lines.pop()
+
+    if file_format == CSV:
+        rows = csv.reader(lines)
+        for line_number, row in enumerate(rows, first_line):
+            if not row:
+                continue
+            try:
+                if len(row) != len(header):
+                    raise ValueError(f"expected {len(header)} fields, got {len(row)}")
+                apts.append(apt_from_record(dict(zip(header, row))))
+            except ValueError as error:
+                errors.append((line_number, str(error)))
+    else:
+        for line_number, line in enumerate(lines, first_line):
+            if not line.strip():
+                continue
+            try:
+                apts.append(parse_json_line(line))
+            except ValueError as error:
+                errors.append((line_number, str(error)))
+
+    if columnar:
+        return ApartmentTable.from_apts(apts), errors
+    return apts, errors
+
+
+
+class ChunkedLoader:
+    """
+    Loads apartments from a CSV or JSON Lines file in parallel chunks.
+
+    Iterating over the loader yields one batch per chunk, in file order.
+    Use as a context manager, or call close() when done, to shut the
+    worker pool down.
+
+        with ChunkedLoader('listings.csv') as loader:
+            for batch in loader:
+                report.update(batch)
+            errors = loader.get_errors()
+
+    Attributes:
+        _path (str): Path of the file
+        _format (str): CSV or JSONL
+        _chunk_size (int): Approximate size of a chunk in bytes
+        _workers (int): Number of worker processes, 0 to parse in process
+        _columnar (bool): Whether batches are ApartmentTable objects
+        _executor (ProcessPoolExecutor): The worker pool, if any
+        _errors (list): (line number, message) of every bad line so far
+    """
+
+    def __init__(self, path, file_format=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                 workers=None, columnar=False):
+        """
+        Initialize a new ChunkedLoader.
+
+        Args:
+            path (str): Path of the file
+            file_format (str): CSV or JSONL (default: from the file extension)
+            chunk_size (int): Approximate size of a chunk in bytes
+            workers (int): Number of worker processes (default: CPU count),
+                           0 to parse in the calling process
+            columnar (bool): Yield ApartmentTable batches instead of lists
+
+        Raises:
+            ValueError: If the format is not given and cannot be inferred
+        """
+        if file_format is None:
+            extension = os.path.splitext(path)[1].lower()
+            if extension not in FORMATS_BY_EXTENSION:
+                raise ValueError(f"cannot infer the format of {path}")
+            file_format = FORMATS_BY_EXTENSION[extension]
+        if file_format not in (CSV, JSONL):
+            raise ValueError(f"unknown format: {file_format}")
+
+        self._path = path
+        self._format = file_format
+        self._chunk_size = chunk_size
+        self._workers = (os.cpu_count() or 1) if workers is None else workers
+        self._columnar = columnar
+        self._executor = ProcessPoolExecutor(self._workers) if self._workers else None
+        self._errors = []
+
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Shut the worker pool down.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+
+
+    def get_errors(self):
+        """
+        Returns:
+            list: (line number, message) of every bad line read so far
+        """
+        return list(self._errors)
+
+
+    def _chunks(self, file):
+        """
+        Read the file in chunks that end at line boundaries.
+
+        Yields:
+            tuple: (line number of the first line, bytes of whole lines)
+        """
+        line_number = 1
+        while True:
+            data = file.read(self._chunk_size)
+            if not data:
+                return
+            if not data.endswith(b'\n'):
+                data += file.readline()  # finish the last line
+            yield line_number, data
+            line_number += data.count(b'\n')
+
+
+    def _header(self, file):
+        """
+        Returns:
+            list: The CSV column names, None for JSONL
+
+        Raises:
+            ValueError: If a CSV file has no header row, or its header
+                        misses a column of REQUIRED_COLUMNS
+        """
+        if self._format != CSV:
+            return None
+        line = file.readline().decode('utf-8')
+        header = next(csv.reader([line]), None)
+        if not header:
+            raise ValueError(f"{self._path} has no header row")
+        header = [name.strip() for name in header]
+
+        missing = [name for name in REQUIRED_COLUMNS if name not in header]
+        if missing:
+            raise ValueError(f"{self._path} has no {', '.join(missing)} column "
+                             f"(the header names {', '.join(header)}; "
+                             f"expected columns from {', '.join(FIELDS)})")
+        return header
+
+
+    def __iter__(self):
+        """
+        Yields:
+            list or ApartmentTable: The apartments of each chunk, in file order
+        """
+        with open(self._path, 'rb') as file:
+            if file.read(len(codecs.BOM_UTF8)) != codecs.BOM_UTF8:
+                file.seek(0)
+            header = self._header(file)
+            first_line_offset = 1 if header is not None else 0
+            chunks = ((line_number + first_line_offset, data)
+                      for line_number, data in self._chunks(file))
+
+            if self._executor is None:
+                for line_number, data in chunks:
+                    yield self._collect(_parse_chunk(self._format, header, line_number,
+                                                     data, self._columnar))
+                return
+
+            # at most this many chunks are read and not yet consumed
+            pending = deque()
+            limit = self._workers * CHUNKS_AHEAD_PER_WORKER
+
+            for line_number, data in chunks:
+                pending.append(self._executor.submit(_parse_chunk, self._format, header,
+                                                     line_number, data, self._columnar))
+                if len(pending) >= limit:
+                    yield self._collect(pending.popleft().result())
+
+            while pending:
+                yield self._collect(pending.popleft().result())
+
+
+    def _collect(self, result):
+        """
+        Returns:
+            list or ApartmentTable: The batch of a parsed chunk, keeping its errors
+        """
+        batch, errors = result
+        self._errors.extend(errors)
+        return batch
+
+
+
+def load_apts(path, **options):
+    """
+    Load all apartments of a CSV or JSON Lines file into one list.
+
+    Args:
+        path (str): Path of the file
+        **options: ChunkedLoader options except columnar
+
+    Returns:
+        tuple: (list of apartments in file order,
+                list of (line number, message) of the bad lines)
+    """
+    apts = []
+    with ChunkedLoader(path, **options) as loader:
+        for batch in loader:
+            apts.extend(batch)
+        return apts, loader.get_errors()
@@ -0,0 +1,99 @@
+"""
+Layered method wrapping for the opt-in apartment features.
+
+Features such as price_cache and instrumentation replace functions on
+classes or modules with wrappers while they are enabled. This module keeps
+the original of every wrapped attribute and the stack of wrappers installed
+on it, so features can be enabled and disabled in any order: removing one
+feature rebuilds the remaining wrappers on top of the original, and once
+no wrapper is left the original is put back and costs nothing.
+"""
+
+__author__ = "Bar-chaim Billy"
+
+# original function of every wrapped (owner, name) attribute
+_originals = {}
+
+# (feature, wrap) layers of every wrapped (owner, name), innermost first
+_layers = {}
+
+
+def _rebuild(owner, name):
+    """
+    Set an attribute to its original wrapped by all of its current layers.
+    """
+    function = _originals[(owner, name)]
+    for _, wrap in _layers[(owner, name)]:
+        function = wrap(function)
+    setattr(owner, name, function)
+
+
+def install(feature, owner, name, wrap):
+    """
+    Wrap a function defined directly on a class or module.
+
+    Args:
+        feature (str): Name of the feature installing the wrapper
+        owner (type or module): The class or module defining the function
+        name (str): Name of the function
+        wrap (callable): Takes the function to wrap and returns its wrapper
+
+    Raises:
+        KeyError: If owner does not define name itself
+    """
+    key = (owner, name)
+    if key not in _originals:
+        _originals[key] = vars(owner)[name]
+        _layers[key] = []
+
+    _layers[key].append((feature, wrap))
+    _rebuild(owner, name)
+
+
+def uninstall(feature):
+    """
+    Remove every wrapper a feature installed.
+
+    Args:
+        feature (str): Name of the feature
+    """
+    for key in list(_layers):
+        layers = _layers[key]
+        remaining = [layer for layer in layers if layer[0] != feature]
+        if len(remaining) == len(layers):
+            continue
+
+        owner, name = key
+        if remaining:
+            _layers[key] = remaining
+            _rebuild(owner, name)
+        else:
+            setattr(owner, name, _originals.pop(key))
+            del _layers[key]
+
+
+def is_installed(feature):
+    """
+    Returns:
+        bool: True if the feature has any wrapper installed
+    """
+    return any(layer[0] == feature for layers in _layers.values() for layer in layers)
+
+
+def original(owner, name):
+    """
+    Returns:
+        function: The unwrapped function of a class or module attribute
+    """
+    return _originals.get((owner, name), vars(owner)[name])
+
+
+def hierarchy(cls):
+    """
+    Returns:
+        list: cls and all of its subclasses, recursively
+    """
+    classes = [cls]
+    for subclass in cls.__subclasses__():
+        classes.extend(hierarchy(subclass))
+    return classes
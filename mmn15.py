@@ -6,17 +6,48 @@ This module provides utility functions for analyzing and processing
 lists of apartments in the building management system. It includes
 functions for calculating averages, counting specific apartment types,
 and filtering apartments based on various criteria.
+
+Apartments are classified by their TYPE_CODE and capability flags (see
+apt.APT_TYPES), so every check is a single attribute read.
 """
 
 __author__ = "Bar-chaim Biily"
 
-from apt import Apt
-from special_apt import SpecialApt
-from garden_apt import GardenApt
-from roof_apt import RoofApt
+from functools import lru_cache
+
+from apt import type_counts_by_name
+# imported to register their type codes
+import special_apt
+import garden_apt
+import roof_apt
+from filters import HAS_VIEW, PRICE
+from group_by import group_by
 
 MILLION = 1000000
 
+
+def valid_apt_predicate(threshold=None):
+    """
+    Build the condition only_valid_apts selects apartments by.
+
+    MILLION is read on every call, so scenarios that change it take effect
+    at once; the predicate of each threshold is compiled only once.
+
+    Args:
+        threshold (int): Price the apartments must exceed (default: MILLION)
+
+    Returns:
+        Predicate: A view and a price over threshold; Apt and GardenApt
+                   never have a view
+    """
+    return _valid_apt_predicate(MILLION if threshold is None else threshold)
+
+
+@lru_cache(maxsize=64)
+def _valid_apt_predicate(threshold):
+    return HAS_VIEW & (PRICE > threshold)
+
+
 # section c
 def average_price(apts):
     """
@@ -55,8 +86,9 @@ def how_many_rooftop(apts):
     if not apts:
         return rooftop_counter #  = 0
 
+    # only roof apartments support a pool
     for apt in apts:
-        if isinstance(apt, RoofApt) and apt.get_has_pool():
+        if apt.SUPPORTS_POOL and apt.get_has_pool():
                 rooftop_counter += 1
 
     return rooftop_counter
@@ -74,24 +106,19 @@ def how_many_apt_type(apts):
     Returns:
         dict: Dictionary with apartment type names as keys and counts as values.
               Keys are: 'Apt', 'SpecialApt', 'GardenApt', 'RoofApt'
+              (plus any other registered type), in type code order.
+              Apartments of unregistered subclasses are counted under
+              their nearest registered ancestor.
               Returns all counts as 0 if list is empty.
     """
-    apt_counts  ={
-        'Apt': 0,
-        'SpecialApt': 0,
-        'GardenApt': 0,
-        'RoofApt': 0
-    }
-
-    if not apts:
-        return apt_counts
+    # every registered type, including the ones with no apartments
+    type_counts = type_counts_by_name({})
 
-    # classified apt and update count
-    for apt in apts:
-        apt_type = type(apt).__name__
-        apt_counts[apt_type] += 1
+    # the type counts are the groups by type
+    for (type_name,), results in group_by(apts, keys=('type',), aggs=('count',)).items():
+        type_counts[type_name] = results['count']
 
-    return apt_counts
+    return type_counts
 
 
 
@@ -144,18 +171,8 @@ def only_valid_apts(apts):
         list or None: List of qualifying apartments, or None if no apartments
                       meet the criteria or if the input list is empty.
     """
-    valid_apts = []
-
-    for apt in apts:
-        apt_type = type(apt).__name__
-
-        # Apt and GardenApt have no view -> continue
-        if apt_type == "Apt" or apt_type == "GardenApt":
-            continue
-
-        # if apt has view and price > million -> add to valid list
-        if apt.get_has_view() and apt.get_price() > MILLION:
-            valid_apts.append(apt)
+    # the predicate checks the view before computing the price
+    valid_apts = valid_apt_predicate().filter(apts)
 
     if not valid_apts:
         return None
@@ -0,0 +1,305 @@
+"""
+Parallel execution of the mmn15 utility functions.
+
+This module loads an apartment list into a process pool once, splits it
+into contiguous shards, computes partial aggregates of each shard in the
+workers and merges them in shard order, so every result equals the serial
+mmn15 result: top_price keeps the first of several top apartments and
+only_valid_apts keeps list order.
+
+The workers receive the apartments when they start (shared copy-on-write
+with the fork start method, pickled once per worker otherwise), so a query
+sends each worker only shard bounds and the pricing constants, and gets
+back only partial aggregates. Workers report positions inside their shard
+rather than apartment objects, so the merged results are the original
+objects of the loaded list.
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import pricing
+from apt import type_counts_by_name
+import mmn15
+
+CHUNKS_PER_WORKER = 4
+
+# the loaded apartments, in each worker process
+_worker_apts = None
+
+# the parent pricing epoch the constants of the worker were copied from
+_worker_epoch = None
+
+
+def _init_worker(apts):
+    """
+    Keep the loaded apartments in a new worker process.
+    """
+    global _worker_apts
+    _worker_apts = apts
+
+
+def _run(task):
+    """
+    Apply a partial aggregate to one shard of the loaded apartments.
+
+    The worker takes over the pricing constants of the parent whenever the
+    parent was reconfigured since the previous task.
+
+    Args:
+        task (tuple): (partial aggregate, shard start, shard stop, parent
+                      pricing epoch, parent pricing constants)
+
+    Returns:
+        The partial aggregate of the shard
+    """
+    global _worker_epoch
+    func, start, stop, epoch, constants = task
+    if epoch != _worker_epoch:
+        pricing.configure(**constants)
+        _worker_epoch = epoch
+    return func(_worker_apts[start:stop])
+
+
+# partial aggregates, run inside the worker processes
+
+def _partial_sum(chunk):
+    """
+    Returns:
+        int: Sum of the prices of the apartments in the chunk
+    """
+    return sum(apt.get_price() for apt in chunk)
+
+
+def _partial_rooftop(chunk):
+    """
+    Returns:
+        int: Number of roof apartments with pools in the chunk
+    """
+    return sum(1 for apt in chunk if apt.SUPPORTS_POOL and apt.get_has_pool())
+
+
+def _partial_types(chunk):
+    """
+    Returns:
+        dict: Number of apartments of each type code in the chunk
+    """
+    counts = {}
+    for apt in chunk:
+        code = apt.TYPE_CODE
+        counts[code] = counts.get(code, 0) + 1
+    return counts
+
+
+def _partial_top(chunk):
+    """
+    Returns:
+        tuple: (price, position) of the first top-priced apartment in the chunk
+    """
+    top_price = chunk[0].get_price()
+    top_position = 0
+
+    for position in range(1, len(chunk)):
+        price = chunk[position].get_price()
+        if price > top_price:
+            top_price = price
+            top_position = position
+
+    return top_price, top_position
+
+
+def _partial_valid(chunk, threshold):
+    """
+    Args:
+        threshold (int): The MILLION of the parent process
+
+    Returns:
+        list: Positions of the valid apartments in the chunk, in order
+    """
+    matches = mmn15.valid_apt_predicate(threshold).matches
+    return [position for position, apt in enumerate(chunk) if matches(apt)]
+
+
+
+class ParallelAggregator:
+    """
+    Runs the mmn15 utility functions over a pool of worker processes that
+    hold a loaded apartment list.
+
+    The aggregates answer for the list given to the constructor or to the
+    last load() call; later changes to that list are not seen. Use as a
+    context manager, or call close() when done, to shut the pool down.
+
+    Attributes:
+        _workers (int): Number of worker processes
+        _chunks_per_worker (int): Number of shards handed to each worker
+        _apts (list): The loaded apartments
+        _bounds (list): (start, stop) of every shard, in list order
+        _executor (ProcessPoolExecutor): The worker pool, or None
+    """
+
+    def __init__(self, apts=(), workers=None, chunks_per_worker=CHUNKS_PER_WORKER):
+        """
+        Initialize a new ParallelAggregator and load apartments into it.
+
+        Args:
+            apts (iterable): The apartments to aggregate
+            workers (int): Number of worker processes (default: CPU count)
+            chunks_per_worker (int): Number of shards per worker, more shards
+                                     balance uneven work better
+        """
+        self._workers = workers or os.cpu_count() or 1
+        self._chunks_per_worker = chunks_per_worker
+        self._executor = None
+        self.load(apts)
+
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Shut the worker pool down.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+    def load(self, apts):
+        """
+        Replace the loaded apartments.
+
+        The worker pool is restarted, so the new apartments are sent to
+        every worker once.
+
+        Args:
+            apts (iterable): The apartments to aggregate
+        """
+        self.close()
+        self._apts = list(apts)
+
+        shard_count = self._workers * self._chunks_per_worker
+        size = max(1, -(-len(self._apts) // shard_count))  # ceiling division
+        self._bounds = [(start, min(start + size, len(self._apts)))
+                        for start in range(0, len(self._apts), size)]
+
+        self._executor = ProcessPoolExecutor(max_workers=self._workers,
+                                             initializer=_init_worker,
+                                             initargs=(self._apts,))
+
+
+    def get_workers(self):
+        """
+        Returns:
+            int: The number of worker processes
+        """
+        return self._workers
+
+
+    def __len__(self):
+        """
+        Returns:
+            int: The number of loaded apartments
+        """
+        return len(self._apts)
+
+
+    def _map(self, func):
+        """
+        Returns:
+            list: func applied to every shard in the workers, in shard order
+        """
+        constants = {name: getattr(pricing, name) for name in pricing.CONSTANT_NAMES}
+        tasks = [(func, start, stop, pricing.epoch, constants) for start, stop in self._bounds]
+        return list(self._executor.map(_run, tasks))
+
+
+    def average_price(self):
+        """
+        Calculate the average price of the loaded apartments.
+
+        Returns:
+            float: The average price of all apartments, or 0 if none are loaded
+        """
+        if not self._apts:
+            return 0
+
+        return sum(self._map(_partial_sum)) / len(self._apts)
+
+
+    def how_many_rooftop(self):
+        """
+        Count the number of roof apartments with pools.
+
+        Returns:
+            int: Number of roof apartments that have pools
+        """
+        return sum(self._map(_partial_rooftop))
+
+
+    def how_many_apt_type(self):
+        """
+        Count the loaded apartments by type.
+
+        Returns:
+            dict: Apartment type names as keys and counts as values.
+                  Keys are: 'Apt', 'SpecialApt', 'GardenApt', 'RoofApt'
+        """
+        code_counts = {}
+
+        for partial in self._map(_partial_types):
+            for code, count in partial.items():
+                code_counts[code] = code_counts.get(code, 0) + count
+
+        return type_counts_by_name(code_counts)
+
+
+    def top_price(self):
+        """
+        Find the loaded apartment with the highest price.
+
+        Returns:
+            Apt or None: The first apartment with the highest price,
+                         or None if none are loaded
+        """
+        if not self._apts:
+            return None
+
+        max_price = None
+        max_index = None
+
+        # shards are merged in list order, so strictly greater keeps the first
+        for (start, _), (price, position) in zip(self._bounds, self._map(_partial_top)):
+            if max_price is None or price > max_price:
+                max_price = price
+                max_index = start + position
+
+        return self._apts[max_index]
+
+
+    def only_valid_apts(self):
+        """
+        Filter the loaded apartments with a view and a price over MILLION.
+
+        Returns:
+            list or None: List of qualifying apartments in list order, or None
+                          if no apartments meet the criteria
+        """
+        valid_apts = []
+        # the workers may hold an older MILLION, so send the current one
+        partials = self._map(partial(_partial_valid, threshold=mmn15.MILLION))
+
+        for (start, _), positions in zip(self._bounds, partials):
+            valid_apts.extend(self._apts[start + position] for position in positions)
+
+        if not valid_apts:
+            return None
+
+        return valid_apts
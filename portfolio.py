@@ -0,0 +1,228 @@
+"""
+Live apartment portfolio for the apartment management system.
+
+This module defines the Portfolio class, a mutable collection of apartments
+that keeps the mmn15 aggregates up to date as apartments are added,
+removed or replaced, instead of recomputing them from the whole list.
+
+Prices are computed when apartments are added, under the current pricing
+constants. After pricing.configure the portfolio reprices every apartment
+once, on the next query that depends on prices.
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import heapq
+from collections import Counter
+
+import pricing
+from apt import type_counts_by_name
+
+
+class Portfolio:
+    """
+    An ordered collection of apartments with incrementally kept aggregates.
+
+    Every apartment added gets a handle; handles grow with insertion order
+    and replacing an apartment keeps its handle, so the portfolio behaves
+    like a list where the apartment at a position is swapped in place.
+
+    average_price, how_many_rooftop and how_many_apt_type are O(1).
+    top_price uses a max-heap with lazy deletion and is O(log n) amortized.
+    The first price query after pricing.configure reprices in O(n).
+
+    Attributes:
+        _apts (dict): Apartment of each handle, in list order
+        _prices (dict): Price of each handle, computed once per epoch
+        _epoch (int): The pricing epoch _prices were computed under
+        _sum_price (int): Sum of all prices
+        _rooftop_count (int): Number of roof apartments with pools
+        _type_counts (Counter): Number of apartments of each type code
+        _heap (list): (-price, handle) pairs, possibly stale
+        _next_handle (int): Handle of the next added apartment
+    """
+
+    def __init__(self, apts=()):
+        """
+        Initialize a new Portfolio.
+
+        Args:
+            apts (iterable): Apartments to add right away
+        """
+        self._apts = {}
+        self._prices = {}
+        self._epoch = pricing.epoch
+        self._sum_price = 0
+        self._rooftop_count = 0
+        self._type_counts = Counter()
+        self._heap = []
+        self._next_handle = 0
+
+        for apt in apts:
+            self.add(apt)
+
+
+    def _count(self, apt, price, step):
+        """
+        Add (step=1) or subtract (step=-1) an apartment from the aggregates.
+        """
+        self._sum_price += step * price
+        self._type_counts[apt.TYPE_CODE] += step
+        if apt.SUPPORTS_POOL and apt.get_has_pool():
+            self._rooftop_count += step
+
+
+    def add(self, apt):
+        """
+        Append an apartment to the portfolio.
+
+        Args:
+            apt (Apt): The apartment to add
+
+        Returns:
+            int: The handle of the apartment
+        """
+        handle = self._next_handle
+        self._next_handle += 1
+
+        price = apt.get_price()
+        self._count(apt, price, 1)
+        self._apts[handle] = apt
+        self._prices[handle] = price
+        heapq.heappush(self._heap, (-price, handle))
+        return handle
+
+
+    def remove(self, handle):
+        """
+        Remove an apartment from the portfolio.
+
+        Args:
+            handle (int): The handle returned by add
+
+        Returns:
+            Apt: The removed apartment
+
+        Raises:
+            KeyError: If no apartment has this handle
+        """
+        apt = self._apts.pop(handle)
+        self._count(apt, self._prices.pop(handle), -1)
+        self._compact()
+        return apt
+
+
+    def replace(self, handle, apt):
+        """
+        Replace an apartment, keeping its position in the portfolio.
+
+        Args:
+            handle (int): The handle of the apartment to replace
+            apt (Apt): The new apartment
+
+        Raises:
+            KeyError: If no apartment has this handle
+        """
+        old_apt = self._apts[handle]
+        self._count(old_apt, self._prices[handle], -1)
+
+        price = apt.get_price()
+        self._count(apt, price, 1)
+        self._apts[handle] = apt  # an existing key keeps its place in the dict
+        self._prices[handle] = price
+        heapq.heappush(self._heap, (-price, handle))
+        self._compact()
+
+
+    def _reprice(self):
+        """
+        Reprice every apartment if the pricing constants changed since the
+        prices were computed.
+        """
+        if self._epoch == pricing.epoch:
+            return
+        apts = self._apts
+        self._prices = {handle: apt.get_price() for handle, apt in apts.items()}
+        self._sum_price = sum(self._prices.values())
+        self._heap = [(-price, handle) for handle, price in self._prices.items()]
+        heapq.heapify(self._heap)
+        self._epoch = pricing.epoch
+
+
+    def _compact(self):
+        """
+        Rebuild the heap once stale entries outnumber live ones.
+        """
+        if len(self._heap) > 2 * len(self._apts) + 16:
+            self._heap = [(-price, handle) for handle, price in self._prices.items()]
+            heapq.heapify(self._heap)
+
+
+    def __len__(self):
+        """
+        Returns:
+            int: The number of apartments in the portfolio
+        """
+        return len(self._apts)
+
+
+    def __iter__(self):
+        """
+        Yields:
+            Apt: The apartments in list order
+        """
+        return iter(self._apts.values())
+
+
+    def get(self, handle):
+        """
+        Returns:
+            Apt: The apartment with the given handle
+        """
+        return self._apts[handle]
+
+
+    def average_price(self):
+        """
+        Returns:
+            float: The average price, or 0 if the portfolio is empty
+        """
+        if not self._apts:
+            return 0
+        self._reprice()
+        return self._sum_price / len(self._apts)
+
+    def how_many_rooftop(self):
+        """
+        Returns:
+            int: Number of roof apartments that have pools
+        """
+        return self._rooftop_count
+
+    def how_many_apt_type(self):
+        """
+        Returns:
+            dict: Apartment type names as keys and counts as values
+        """
+        return type_counts_by_name(self._type_counts)
+
+    def top_price(self):
+        """
+        Find the apartment with the highest price.
+
+        Returns:
+            Apt or None: The first apartment, in list order, with the highest
+                         price, or None if the portfolio is empty
+        """
+        self._reprice()
+        heap = self._heap
+        prices = self._prices
+
+        # drop entries of removed apartments and of replaced prices
+        while heap:
+            neg_price, handle = heap[0]
+            if prices.get(handle) == -neg_price:
+                return self._apts[handle]
+            heapq.heappop(heap)
+
+        return None
@@ -0,0 +1,136 @@
+"""
+Opt-in price memoization for the apartment management system.
+
+When enabled, get_price stores the prices it computes in a table keyed by
+what the price depends on: the get_price method and the floor, area, view
+and pool of the apartment. Equal apartments, and proxies of the same row,
+share one entry. The table belongs to one pricing epoch: reconfiguring the
+pricing constants with pricing.configure drops every cached price.
+
+Cached prices are kept outside the apartments, so apartments carry no
+cache slots and stay as small with the cache as without it. The table
+holds no references to apartments and keeps at most max_entries prices,
+dropping the oldest ones first.
+
+When disabled (the default) the original get_price methods are in place and
+the cache costs nothing. The cache is installed through method_hooks, so it
+can be combined with other wrappers of get_price such as instrumentation.
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import functools
+
+import method_hooks
+import pricing
+from apt import Apt
+
+FEATURE = 'price_cache'
+
+DEFAULT_MAX_ENTRIES = 1 << 20
+
+_hits = 0
+_misses = 0
+
+# (get_price, floor, area, has_view, has_pool) -> price in _prices_epoch,
+# oldest first
+_prices = {}
+_prices_epoch = None
+_max_entries = DEFAULT_MAX_ENTRIES
+
+
+def _caching(compute):
+    """
+    Wrap a get_price method with the price cache.
+
+    Args:
+        compute (function): The original get_price method
+
+    Returns:
+        function: A get_price method that caches its results
+    """
+    @functools.wraps(compute)
+    def get_price(self):
+        global _hits, _misses, _prices_epoch
+
+        if _prices_epoch != pricing.epoch:
+            _prices.clear()
+            _prices_epoch = pricing.epoch
+        key = (compute, self._floor, self._area,
+               self.SUPPORTS_VIEW and self._has_view, self.SUPPORTS_POOL and self._has_pool)
+        price = _prices.get(key)
+        if price is not None:
+            _hits += 1
+            return price
+
+        _misses += 1
+        price = compute(self)
+        _prices[key] = price
+        if len(_prices) > _max_entries:
+            del _prices[next(iter(_prices))]
+        return price
+
+    return get_price
+
+
+def enable(max_entries=DEFAULT_MAX_ENTRIES):
+    """
+    Turn on price caching for Apt and every subclass defined so far.
+
+    Calling enable again while the cache is on only changes max_entries.
+
+    Args:
+        max_entries (int): Most prices kept at once
+    """
+    global _max_entries
+    _max_entries = max_entries
+    while len(_prices) > _max_entries:
+        del _prices[next(iter(_prices))]
+
+    if is_enabled():
+        return
+
+    for cls in method_hooks.hierarchy(Apt):
+        if 'get_price' in vars(cls):
+            method_hooks.install(FEATURE, cls, 'get_price', _caching)
+
+
+def disable():
+    """
+    Turn off price caching, restore the original get_price methods and
+    drop every cached price.
+    """
+    method_hooks.uninstall(FEATURE)
+    clear()
+
+
+def clear():
+    """
+    Drop every cached price.
+    """
+    _prices.clear()
+
+
+def is_enabled():
+    """
+    Returns:
+        bool: True if price caching is on, False otherwise
+    """
+    return method_hooks.is_installed(FEATURE)
+
+
+def stats():
+    """
+    Returns:
+        dict: Number of cache 'hits' and 'misses' since the last reset
+    """
+    return {'hits': _hits, 'misses': _misses}
+
+
+def reset_stats():
+    """
+    Reset the hit and miss counters to zero.
+    """
+    global _hits, _misses
+    _hits = 0
+    _misses = 0
@@ -0,0 +1,114 @@
+"""
+Order statistics over apartment prices.
+
+This module generalizes mmn15.top_price to the K most (or least) expensive
+apartments and to price percentiles. Every function prices each apartment
+exactly once and accepts any iterable, including one-shot generators.
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import heapq
+import math
+import random
+from fractions import Fraction
+from operator import methodcaller
+
+_get_price = methodcaller('get_price')
+
+
+def top_k_price(apts, k):
+    """
+    Find the K most expensive apartments.
+
+    Uses a bounded heap of size K, so memory does not grow with the input.
+
+    Args:
+        apts (iterable): Apartment objects
+        k (int): Number of apartments to return
+
+    Returns:
+        list: Up to K apartments from the most expensive down. Apartments
+              with equal prices keep the order they were seen in, so
+              top_k_price(apts, 1) is [top_price(apts)].
+    """
+    if k <= 0:
+        return []
+
+    # nlargest is stable: equal keys keep their input order
+    return heapq.nlargest(k, apts, key=_get_price)
+
+
+def bottom_k_price(apts, k):
+    """
+    Find the K least expensive apartments.
+
+    Args:
+        apts (iterable): Apartment objects
+        k (int): Number of apartments to return
+
+    Returns:
+        list: Up to K apartments from the least expensive up. Apartments
+              with equal prices keep the order they were seen in.
+    """
+    if k <= 0:
+        return []
+
+    return heapq.nsmallest(k, apts, key=_get_price)
+
+
+def _select(values, rank):
+    """
+    Find the value that would be at a position of the sorted list.
+
+    Quickselect with random pivots, expected linear time.
+
+    Args:
+        values (list): Values to select from (not modified)
+        rank (int): Zero-based position in sorted order
+
+    Returns:
+        The value at position rank of sorted(values)
+    """
+    while True:
+        pivot = values[random.randrange(len(values))]
+        lower = [value for value in values if value < pivot]
+        if rank < len(lower):
+            values = lower
+            continue
+
+        equal_count = sum(1 for value in values if value == pivot)
+        if rank < len(lower) + equal_count:
+            return pivot
+
+        rank -= len(lower) + equal_count
+        values = [value for value in values if value > pivot]
+
+
+def price_percentile(apts, q):
+    """
+    Find a price percentile using the nearest-rank method.
+
+    Args:
+        apts (iterable): Apartment objects
+        q (float): Percentile between 0 and 100
+
+    Returns:
+        int or None: The smallest price such that at least q percent of the
+                     apartments cost no more, or None if there are no
+                     apartments. q = 0 gives the minimum price and q = 100
+                     the maximum.
+
+    Raises:
+        ValueError: If q is not between 0 and 100
+    """
+    if not 0 <= q <= 100:
+        raise ValueError("percentile must be between 0 and 100")
+
+    prices = [apt.get_price() for apt in apts]
+    if not prices:
+        return None
+
+    # Fraction keeps q / 100 * n exact: in floats 0.07 * 100 is just over 7
+    rank = max(1, math.ceil(Fraction(q) * len(prices) / 100))
+    return _select(prices, rank - 1)
@@ -0,0 +1,254 @@
+"""
+Pricing engine for the apartment management system.
+
+This module holds the pricing constants of all apartment types and compiles
+the get_price chain of Apt, SpecialApt and RoofApt into one closed-form
+formula. It provides a scalar fast path that the apartment classes delegate
+to, and a batch version that prices whole NumPy arrays at once.
+
+The constants can be changed at runtime with configure(), which also
+advances the pricing epoch so that cached prices are recomputed.
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import sys
+import types
+import warnings
+from contextlib import contextmanager
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for price_batch
+    np = None
+
+PRICE_PER_SQR_METER = 20000
+ADDITIONAL_PRICE_PER_FLOOR = 5000
+FIRST_FLOOR = 1
+ADDITIONAL_VIEW_FEE_PER_FLOOR = 600
+ROOF_PRICE = 40000
+POOL_PRICE = 30000
+
+CONSTANT_NAMES = (
+    'PRICE_PER_SQR_METER',
+    'ADDITIONAL_PRICE_PER_FLOOR',
+    'FIRST_FLOOR',
+    'ADDITIONAL_VIEW_FEE_PER_FLOOR',
+    'ROOF_PRICE',
+    'POOL_PRICE'
+)
+
+# incremented every time the pricing constants change
+epoch = 0
+
+
+def check_constant(name, value):
+    """
+    Check that a pricing constant is an integer.
+
+    Args:
+        name (str): Name of the constant, used in the error message
+        value: The value to check
+
+    Raises:
+        TypeError: If the value is not an int (bool is rejected too)
+    """
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise TypeError(f"{name} must be an integer, got {value!r}")
+
+
+def configure(**constants):
+    """
+    Change pricing constants at runtime.
+
+    Every call advances the pricing epoch, which invalidates all cached
+    prices (see price_cache). Constants must be changed through this
+    function rather than by assigning attributes of this module.
+
+    Args:
+        **constants: New values, keyed by names from CONSTANT_NAMES
+
+    Raises:
+        TypeError: If a name is not a pricing constant or a value is not
+                   an integer; price_batch computes in int64
+    """
+    global epoch
+
+    for name, value in constants.items():
+        if name not in CONSTANT_NAMES:
+            raise TypeError(f"unknown pricing constant: {name}")
+        check_constant(name, value)
+
+    globals().update(constants)
+    epoch += 1
+
+
+@contextmanager
+def configured(**constants):
+    """
+    Change pricing constants for the duration of a with block.
+
+    The previous values are restored through configure() when the block
+    exits, even if it raises, e.g.
+
+        with pricing.configured(PRICE_PER_SQR_METER=1):
+            ...
+
+    Args:
+        **constants: New values, keyed by names from CONSTANT_NAMES
+
+    Raises:
+        TypeError: As configure()
+    """
+    saved = {name: globals()[name] for name in CONSTANT_NAMES}
+    configure(**constants)
+    try:
+        yield
+    finally:
+        configure(**saved)
+
+
+class _ForwardingModule(types.ModuleType):
+    """
+    A module that used to define some of the pricing constants.
+
+    Reading such a constant from the module returns its current value in
+    pricing, and assigning it calls configure() with a DeprecationWarning,
+    so code written against the old modules keeps working.
+    """
+
+    def __getattr__(self, name):
+        if name in self.__dict__.get('_forwarded_constants', ()):
+            return globals()[name]
+        raise AttributeError(f"module {self.__name__!r} has no attribute {name!r}")
+
+    def __setattr__(self, name, value):
+        if name in self.__dict__.get('_forwarded_constants', ()):
+            warnings.warn(f"assigning {self.__name__}.{name} is deprecated, "
+                          f"use pricing.configure({name}=...)",
+                          DeprecationWarning, stacklevel=2)
+            configure(**{name: value})
+        else:
+            super().__setattr__(name, value)
+
+
+def forward_constants(module_name, *names):
+    """
+    Make pricing constants readable and assignable through another module.
+
+    Used by apt, special_apt and roof_apt, which defined the constants
+    before they moved here.
+
+    Args:
+        module_name (str): Name of the module, usually __name__
+        *names: Names from CONSTANT_NAMES
+    """
+    module = sys.modules[module_name]
+    module.__dict__['_forwarded_constants'] = frozenset(names)
+    module.__class__ = _ForwardingModule
+
+
+def price(floor, area, has_view=False, is_roof=False, has_pool=False):
+    """
+    Calculate the price of a single apartment.
+
+    Price calculation (the whole Apt -> SpecialApt -> RoofApt chain):
+    - Base price: area * PRICE_PER_SQR_METER
+    - Floor surcharge: floor * ADDITIONAL_PRICE_PER_FLOOR
+      (no additional payment for apartments <= FIRST_FLOOR)
+    - View surcharge: floor * ADDITIONAL_VIEW_FEE_PER_FLOOR (if has_view)
+    - Roof surcharge: ROOF_PRICE (if is_roof)
+    - Pool surcharge: POOL_PRICE (if is_roof and has_pool)
+
+    Args:
+        floor (int): The floor number of the apartment
+        area (int): The area of the apartment in square meters
+        has_view (bool): Whether the apartment has a view
+        is_roof (bool): Whether the apartment is a roof apartment
+        has_pool (bool): Whether the roof apartment has a pool
+
+    Returns:
+        int: The calculated price in currency units
+    """
+    total = area * PRICE_PER_SQR_METER
+
+    if floor > FIRST_FLOOR:
+        total += floor * ADDITIONAL_PRICE_PER_FLOOR
+
+    if has_view:
+        total += floor * ADDITIONAL_VIEW_FEE_PER_FLOOR
+
+    if is_roof:
+        total += ROOF_PRICE
+        if has_pool:
+            total += POOL_PRICE
+
+    return total
+
+
+# the formula of price(), kept apart from the name so wrappers of
+# pricing.price never end up in make_price functions
+_PRICE_CODE = price.__code__
+_PRICE_DEFAULTS = price.__defaults__
+
+
+def make_price(constants):
+    """
+    Build the formula of price() for fixed constants.
+
+    The returned function runs the very code of price(), but reads the
+    constants from the given mapping instead of this module, so it is not
+    affected by configure().
+
+    Args:
+        constants (dict): Value of every name in CONSTANT_NAMES; other
+                          keys are ignored
+
+    Returns:
+        function: price(floor, area, has_view=False, is_roof=False,
+                  has_pool=False) under the constants
+
+    Raises:
+        KeyError: If a pricing constant is missing
+    """
+    namespace = {name: constants[name] for name in CONSTANT_NAMES}
+    return types.FunctionType(_PRICE_CODE, namespace, 'price', _PRICE_DEFAULTS)
+
+
+def price_batch(floor, area, has_view, is_roof, has_pool):
+    """
+    Calculate the prices of many apartments in one vectorized pass.
+
+    Applies the same formula as price() to whole arrays.
+
+    Args:
+        floor (array-like): Floor number of each apartment
+        area (array-like): Area of each apartment in square meters
+        has_view (array-like): Whether each apartment has a view
+        is_roof (array-like): Whether each apartment is a roof apartment
+        has_pool (array-like): Whether each roof apartment has a pool
+
+    Returns:
+        ndarray: The price of each apartment (int64)
+
+    Raises:
+        ImportError: If numpy is not installed
+    """
+    if np is None:
+        raise ImportError("price_batch requires numpy")
+
+    floor = np.asarray(floor, dtype=np.int64)
+    area = np.asarray(area, dtype=np.int64)
+    has_view = np.asarray(has_view, dtype=np.bool_)
+    is_roof = np.asarray(is_roof, dtype=np.bool_)
+    has_pool = np.asarray(has_pool, dtype=np.bool_)
+
+    # per floor rate: the floor surcharge above FIRST_FLOOR plus the view fee
+    floor_rate = np.where(floor > FIRST_FLOOR, ADDITIONAL_PRICE_PER_FLOOR, 0)
+    floor_rate += np.where(has_view, ADDITIONAL_VIEW_FEE_PER_FLOOR, 0)
+
+    prices = area * PRICE_PER_SQR_METER
+    prices += floor * floor_rate
+    prices += np.where(is_roof, ROOF_PRICE, 0)
+    prices += np.where(is_roof & has_pool, POOL_PRICE, 0)
+    return prices
@@ -0,0 +1,254 @@
+"""
+Immutable pricing profiles for what-if pricing of an inventory.
+
+This module defines the PricingProfile class, a frozen set of pricing
+constants with its own price kernel (see pricing.make_price), and functions that price an
+ApartmentTable under many profiles in one batched pass. Profiles replace
+changing the module constants with pricing.configure for every scenario:
+they never touch global state, so they can be used from many threads at
+once.
+
+The price of an apartment is linear in the constants once the floor
+threshold (FIRST_FLOOR) is fixed:
+
+    price = area * PRICE_PER_SQR_METER
+          + floor above FIRST_FLOOR * ADDITIONAL_PRICE_PER_FLOOR
+          + floor with a view * ADDITIONAL_VIEW_FEE_PER_FLOOR
+          + is_roof * ROOF_PRICE
+          + roof with a pool * POOL_PRICE
+
+so the apartments x profiles price matrix is one matrix product of the
+apartment features by the profile constants, with one "floor above"
+feature for every distinct FIRST_FLOOR.
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import numpy as np
+
+import mmn15
+import pricing
+from apartment_table import ROOF_APT_CODE
+from filters import HAS_VIEW
+
+# constants a profile holds: the pricing constants and the price an
+# apartment must exceed to be valid (see mmn15.only_valid_apts)
+PROFILE_CONSTANTS = pricing.CONSTANT_NAMES + ('MILLION',)
+
+
+
+class PricingProfile:
+    """
+    An immutable set of pricing constants, e.g. the prices of one market.
+
+    Profiles compare equal when their constants are equal, whatever their
+    names, and are hashable.
+
+    Attributes:
+        _name (str): Name of the profile, used in reports
+        _constants (dict): Value of every name in PROFILE_CONSTANTS
+        _kernel (function): The price formula bound to the constants,
+                            see pricing.make_price
+    """
+
+    __slots__ = ('_name', '_constants', '_kernel')
+
+    def __init__(self, name='default', **constants):
+        """
+        Initialize a new PricingProfile.
+
+        Args:
+            name (str): Name of the profile
+            **constants: Values keyed by names from PROFILE_CONSTANTS;
+                         missing constants take their current global value
+
+        Raises:
+            TypeError: If a name is not a profile constant or a value is
+                       not an integer; price_matrix computes in int64
+        """
+        for constant, value in constants.items():
+            if constant not in PROFILE_CONSTANTS:
+                raise TypeError(f"unknown pricing constant: {constant}")
+            pricing.check_constant(constant, value)
+
+        values = {constant: getattr(pricing, constant) for constant in pricing.CONSTANT_NAMES}
+        values['MILLION'] = mmn15.MILLION
+        values.update(constants)
+
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_constants', values)
+        object.__setattr__(self, '_kernel', pricing.make_price(values))
+
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PricingProfile objects are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("PricingProfile objects are immutable")
+
+
+    def replace(self, name=None, **constants):
+        """
+        Build a new profile with some constants changed.
+
+        Args:
+            name (str): Name of the new profile (default: this name)
+            **constants: New values keyed by names from PROFILE_CONSTANTS
+
+        Returns:
+            PricingProfile: The new profile
+        """
+        values = dict(self._constants)
+        values.update(constants)
+        return PricingProfile(self._name if name is None else name, **values)
+
+
+    def get_name(self):
+        """
+        Returns:
+            str: The name of the profile
+        """
+        return self._name
+
+    def get(self, constant):
+        """
+        Args:
+            constant (str): A name from PROFILE_CONSTANTS
+
+        Returns:
+            int: The value of the constant in this profile
+        """
+        return self._constants[constant]
+
+    def as_dict(self):
+        """
+        Returns:
+            dict: A copy of the constants of the profile
+        """
+        return dict(self._constants)
+
+
+    def __eq__(self, other):
+        if not isinstance(other, PricingProfile):
+            return NotImplemented
+        return self._constants == other._constants
+
+    def __hash__(self):
+        return hash(tuple(self._constants[constant] for constant in PROFILE_CONSTANTS))
+
+    def __repr__(self):
+        values = ", ".join(f"{constant}={value}" for constant, value in self._constants.items())
+        return f"PricingProfile({self._name!r}, {values})"
+
+
+    def price(self, floor, area, has_view=False, is_roof=False, has_pool=False):
+        """
+        Calculate the price of a single apartment under this profile.
+
+        Uses the formula of pricing.price (see there for the arguments).
+
+        Returns:
+            int: The calculated price in currency units
+        """
+        return self._kernel(floor, area, has_view, is_roof, has_pool)
+
+
+    def price_apt(self, apt):
+        """
+        Calculate the price of an apartment object under this profile.
+
+        Args:
+            apt (Apt): An Apt, SpecialApt, GardenApt or RoofApt object
+
+        Returns:
+            int: The calculated price in currency units
+        """
+        return self._kernel(apt._floor, apt._area,
+                            apt.SUPPORTS_VIEW and apt._has_view,
+                            apt.SUPPORTS_POOL,
+                            apt.SUPPORTS_POOL and apt._has_pool)
+
+
+
+def _features(table, first_floors):
+    """
+    Build the apartment features multiplying the pricing constants.
+
+    Args:
+        table (ApartmentTable): The apartments
+        first_floors (list): The distinct FIRST_FLOOR values of the profiles
+
+    Returns:
+        ndarray: (apartments x features) int64 matrix with the columns
+                 area, floor with a view, is_roof, roof with a pool, and
+                 the floor above each of first_floors
+    """
+    floor = table.get_floor().astype(np.int64, copy=False)
+    is_roof = table.get_type_code() == ROOF_APT_CODE
+
+    features = np.empty((len(table), 4 + len(first_floors)), dtype=np.int64)
+    features[:, 0] = table.get_area()
+    np.multiply(floor, table.get_has_view(), out=features[:, 1])
+    features[:, 2] = is_roof
+    features[:, 3] = is_roof & table.get_has_pool()
+    for column, first_floor in enumerate(first_floors, 4):
+        np.multiply(floor, floor > first_floor, out=features[:, column])
+    return features
+
+
+def price_matrix(table, profiles):
+    """
+    Price every apartment of a table under every profile in one pass.
+
+    The prices are one integer matrix product of the apartment features by
+    the profile constants. Each distinct FIRST_FLOOR among the profiles
+    adds one feature column, so the cost hardly grows with the number of
+    profiles.
+
+    Args:
+        table (ApartmentTable): The apartments
+        profiles (sequence): PricingProfile objects
+
+    Returns:
+        ndarray: (apartments x profiles) int64 matrix; column j holds the
+                 prices under profiles[j]
+    """
+    first_floors = sorted({profile.get('FIRST_FLOOR') for profile in profiles})
+    floor_row = {first_floor: row for row, first_floor in enumerate(first_floors, 4)}
+
+    coefficients = np.zeros((4 + len(first_floors), len(profiles)), dtype=np.int64)
+    for column, profile in enumerate(profiles):
+        coefficients[0, column] = profile.get('PRICE_PER_SQR_METER')
+        coefficients[1, column] = profile.get('ADDITIONAL_VIEW_FEE_PER_FLOOR')
+        coefficients[2, column] = profile.get('ROOF_PRICE')
+        coefficients[3, column] = profile.get('POOL_PRICE')
+        coefficients[floor_row[profile.get('FIRST_FLOOR')], column] = \
+            profile.get('ADDITIONAL_PRICE_PER_FLOOR')
+
+    return _features(table, first_floors) @ coefficients
+
+
+def count_valid_apts(table, profiles, prices=None):
+    """
+    Count the apartments mmn15.only_valid_apts would return under every profile.
+
+    Args:
+        table (ApartmentTable): The apartments
+        profiles (sequence): PricingProfile objects
+        prices (ndarray): The price_matrix of the table and profiles, if
+                          already computed
+
+    Returns:
+        ndarray: Number of apartments with a view priced over the MILLION
+                 constant of each profile
+    """
+    if prices is None:
+        prices = price_matrix(table, profiles)
+
+    # the view half of mmn15.valid_apt_predicate, the prices are per profile
+    with_view = HAS_VIEW.mask(table)
+
+    thresholds = np.array([profile.get('MILLION') for profile in profiles], dtype=np.int64)
+    over = prices > thresholds
+    over &= with_view[:, None]
+    return over.sum(axis=0)
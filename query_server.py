@@ -0,0 +1,426 @@
+"""
+Local HTTP/JSON query service for the apartment management system.
+
+This module keeps an apartment inventory loaded in a long-running process
+and answers the mmn15 queries over HTTP, so a query costs a request on an
+open connection instead of starting an interpreter and importing the
+apartment modules:
+
+    GET /average_price
+    GET /how_many_rooftop
+    GET /how_many_apt_type
+    GET /top_price
+    GET /only_valid_apts?min_price=1500000&min_floor=3&type=RoofApt,SpecialApt
+    GET /stats
+    POST /reload
+
+Responses are JSON objects holding the answer under "result"; apartments
+are encoded as records (see records.apt_to_record). The server speaks
+HTTP/1.1, so clients can reuse one connection for many queries.
+
+Encoded responses are kept in an LRU cache. Replacing or reloading the
+inventory starts a new generation and empties the cache, and so does
+changing the pricing constants with pricing.configure.
+
+Usage:
+    python query_server.py INVENTORY [--host HOST] [--port PORT] [--cache-size N]
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import argparse
+import functools
+import json
+import os
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import mmn15
+import pricing
+from filters import FLOOR, TYPE
+from records import apt_to_record
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8015
+DEFAULT_CACHE_SIZE = 1024
+
+QUERIES = ('average_price', 'how_many_rooftop', 'how_many_apt_type',
+           'top_price', 'only_valid_apts')
+
+# parameters each query accepts
+QUERY_PARAMS = {'only_valid_apts': ('min_price', 'min_floor', 'type')}
+
+
+def load_inventory(path):
+    """
+    Load every apartment of an inventory file.
+
+    Args:
+        path (str): A binary inventory file (.bin) or a CSV or JSON Lines file
+
+    Returns:
+        list: The apartments in file order
+
+    Raises:
+        ValueError: If the file has lines that are not valid apartments
+    """
+    if os.path.splitext(path)[1] == '.bin':
+        from inventory_file import InventoryReader
+        return list(InventoryReader(path))
+
+    from loader import load_apts
+    apts, errors = load_apts(path, workers=0)
+    if errors:
+        line, message = errors[0]
+        raise ValueError(f"{path}:{line}: {message}")
+    return apts
+
+
+def _int_param(params, name):
+    """
+    Returns:
+        int or None: The integer value of a query parameter, if given
+
+    Raises:
+        ValueError: If the parameter is not an integer
+    """
+    if name not in params:
+        return None
+    try:
+        return int(params[name])
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {params[name]!r}") from None
+
+
+def valid_apts_predicate(min_price=None, min_floor=None, types=None):
+    """
+    Build the filter of only_valid_apts with optional extra conditions.
+
+    Args:
+        min_price (int): Price the apartments must exceed (default MILLION)
+        min_floor (int): Lowest floor of the apartments (default: any floor)
+        types (list): Names of the allowed apartment types (default: all)
+
+    Returns:
+        Predicate: The filter; mmn15.valid_apt_predicate() when no argument
+                   is given. Equal arguments return the same, already
+                   compiled, filter.
+    """
+    # read MILLION now, so the memoized filters follow changes to it
+    if min_price is None:
+        min_price = mmn15.MILLION
+    if types is not None:
+        types = tuple(sorted(set(types)))
+    return _valid_apts_predicate(min_price, min_floor, types)
+
+
+@functools.lru_cache(maxsize=DEFAULT_CACHE_SIZE)
+def _valid_apts_predicate(min_price, min_floor, types):
+    """
+    valid_apts_predicate for normalized arguments, memoized so each filter
+    is compiled once.
+    """
+    predicate = mmn15.valid_apt_predicate(min_price)
+    if min_floor is not None:
+        predicate = predicate & (FLOOR >= min_floor)
+    if types is not None:
+        predicate = predicate & TYPE.isin(types)
+    return predicate
+
+
+
+class QueryService:
+    """
+    Answers mmn15 queries over an inventory, caching the encoded answers.
+
+    The service is safe to use from several threads. A query started before
+    the inventory is replaced may still finish on the old inventory, but its
+    answer is not cached.
+
+    Attributes:
+        _apts (list): The current inventory
+        _generation (int): Number of times the inventory was replaced
+        _epoch (int): The pricing epoch the cached answers were computed under
+        _cache (OrderedDict): (generation, query key) -> encoded answer,
+                              least recently used first
+        _cache_size (int): Largest number of cached answers, 0 to disable
+        _hits (int): Number of answers served from the cache
+        _misses (int): Number of answers computed
+        _lock (Lock): Guards every attribute above
+    """
+
+    def __init__(self, apts=(), cache_size=DEFAULT_CACHE_SIZE):
+        """
+        Initialize a new QueryService.
+
+        Args:
+            apts (iterable): The inventory
+            cache_size (int): Largest number of cached answers, 0 to disable
+        """
+        self._apts = list(apts)
+        self._generation = 0
+        self._epoch = pricing.epoch
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+
+    def set_inventory(self, apts):
+        """
+        Replace the inventory and drop every cached answer.
+
+        Args:
+            apts (iterable): The new inventory
+
+        Returns:
+            int: The generation of the new inventory
+        """
+        apts = list(apts)
+        with self._lock:
+            self._apts = apts
+            self._generation += 1
+            self._cache.clear()
+            return self._generation
+
+
+    def get_generation(self):
+        """
+        Returns:
+            int: Number of times the inventory was replaced
+        """
+        return self._generation
+
+
+    def stats(self):
+        """
+        Returns:
+            dict: Inventory 'size' and 'generation', and cache 'hits',
+                  'misses' and 'cached' answers
+        """
+        with self._lock:
+            return {'size': len(self._apts), 'generation': self._generation,
+                    'hits': self._hits, 'misses': self._misses, 'cached': len(self._cache)}
+
+
+    @staticmethod
+    def _key(query, params):
+        """
+        Check a query and normalize its parameters into a cache key.
+
+        Args:
+            query (str): One of QUERIES
+            params (dict): Parameter name -> string value
+
+        Returns:
+            tuple: (query, normalized parameter values)
+
+        Raises:
+            KeyError: If the query is unknown
+            ValueError: If a parameter is unknown or invalid
+        """
+        if query not in QUERIES:
+            raise KeyError(query)
+
+        allowed = QUERY_PARAMS.get(query, ())
+        for name in params:
+            if name not in allowed:
+                raise ValueError(f"{query} does not take parameter {name!r}")
+        if not allowed:
+            return (query,)
+
+        types = None
+        if 'type' in params:
+            types = tuple(sorted(set(params['type'].split(','))))
+            valid_apts_predicate(types=types)  # rejects unknown type names
+        return (query, _int_param(params, 'min_price'), _int_param(params, 'min_floor'), types)
+
+
+    def _answer(self, apts, key):
+        """
+        Returns:
+            The JSON-compatible answer of a normalized query
+        """
+        query = key[0]
+        if query == 'top_price':
+            apt = mmn15.top_price(apts)
+            return None if apt is None else apt_to_record(apt)
+
+        if query == 'only_valid_apts':
+            min_price, min_floor, types = key[1:]
+            valid_apts = valid_apts_predicate(min_price, min_floor, types).filter(apts)
+            # None for no apartments, like mmn15.only_valid_apts
+            return [apt_to_record(apt) for apt in valid_apts] or None
+
+        return getattr(mmn15, query)(apts)
+
+
+    def query(self, query, params=None):
+        """
+        Answer a query, from the cache if possible.
+
+        Args:
+            query (str): One of QUERIES
+            params (dict): Parameter name -> string value, as in a URL
+
+        Returns:
+            bytes: The JSON encoded response {"result": answer}
+
+        Raises:
+            KeyError: If the query is unknown
+            ValueError: If a parameter is unknown or invalid
+        """
+        key = self._key(query, params or {})
+
+        with self._lock:
+            # answers priced under older pricing constants are stale
+            epoch = pricing.epoch
+            if epoch != self._epoch:
+                self._cache.clear()
+                self._epoch = epoch
+            generation = self._generation
+            apts = self._apts
+            body = self._cache.get((generation, key))
+            if body is not None:
+                self._cache.move_to_end((generation, key))
+                self._hits += 1
+                return body
+            self._misses += 1
+
+        body = json.dumps({'result': self._answer(apts, key)}).encode()
+
+        with self._lock:
+            # an answer for a replaced inventory or older pricing is never cached
+            if self._cache_size and generation == self._generation and epoch == pricing.epoch:
+                self._cache[(generation, key)] = body
+                if len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+        return body
+
+
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves the queries of the QueryServer it belongs to.
+    """
+
+    protocol_version = 'HTTP/1.1'  # keep connections open between requests
+    # headers and body are separate writes, Nagle would delay the body
+    disable_nagle_algorithm = True
+
+    def _send(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status, message):
+        self._send(status, json.dumps({'error': message}).encode())
+
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        name = url.path.strip('/')
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        if name == 'stats':
+            self._send(200, json.dumps(self.server.service.stats()).encode())
+            return
+        try:
+            self._send(200, self.server.service.query(name, params))
+        except KeyError:
+            self._send_error(404, f"unknown query: {name!r}")
+        except ValueError as error:
+            self._send_error(400, str(error))
+
+
+    def do_POST(self):
+        # the body is not used, but must be read to keep the connection usable
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+        if urlsplit(self.path).path.strip('/') != 'reload':
+            self._send_error(404, f"unknown action: {self.path!r}")
+            return
+        if self.server.path is None:
+            self._send_error(409, "the server has no inventory file to reload")
+            return
+        try:
+            generation = self.server.reload()
+        except (OSError, ValueError) as error:
+            self._send_error(500, str(error))
+            return
+        self._send(200, json.dumps({'generation': generation}).encode())
+
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+
+class QueryServer(ThreadingHTTPServer):
+    """
+    A threaded HTTP server answering queries with a QueryService.
+
+    Attributes:
+        service (QueryService): Answers the queries
+        path (str): The inventory file, or None if the inventory was given
+        verbose (bool): Whether to log every request
+    """
+
+    daemon_threads = True
+    # the default backlog of 5 drops connections when many clients start at once
+    request_queue_size = 128
+
+    def __init__(self, service, address=(DEFAULT_HOST, DEFAULT_PORT), path=None, verbose=False):
+        """
+        Initialize a new QueryServer and bind it to an address.
+
+        Args:
+            service (QueryService): Answers the queries
+            address (tuple): (host, port); port 0 picks a free port
+            path (str): The inventory file POST /reload loads again
+            verbose (bool): Whether to log every request
+        """
+        super().__init__(address, QueryRequestHandler)
+        self.service = service
+        self.path = path
+        self.verbose = verbose
+
+
+    def reload(self):
+        """
+        Load the inventory file again into the service.
+
+        Returns:
+            int: The generation of the loaded inventory
+        """
+        return self.service.set_inventory(load_inventory(self.path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('path', help="inventory file (.bin, .csv or .jsonl)")
+    parser.add_argument('--host', default=DEFAULT_HOST, help="address to listen on")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="port to listen on")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE,
+                        help="largest number of cached answers, 0 to disable")
+    parser.add_argument('--verbose', action='store_true', help="log every request")
+    args = parser.parse_args()
+
+    service = QueryService(load_inventory(args.path), cache_size=args.cache_size)
+    with QueryServer(service, (args.host, args.port), args.path, args.verbose) as server:
+        host, port = server.server_address[:2]
+        print(f"serving {service.stats()['size']} apartments on http://{host}:{port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
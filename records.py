@@ -0,0 +1,142 @@
+"""
+Plain record representation of apartments.
+
+This module converts apartments to and from flat records (dicts keyed by
+FIELDS), the common form used by the text loaders, exporters and
+ingestion pipelines. A record names the apartment type in its 'type' field
+and holds the constructor arguments of that type; fields a type does not
+use are ignored when parsing.
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import json
+
+from apt import Apt, APT_TYPES
+from special_apt import SpecialApt
+from garden_apt import GardenApt
+from roof_apt import RoofApt
+
+FIELDS = ('type', 'floor', 'area', 'has_view', 'has_pool', 'garden_area')
+
+TRUE_STRINGS = ('1', 'true', 'True', 'TRUE', 'yes')
+FALSE_STRINGS = ('0', 'false', 'False', 'FALSE', 'no')
+
+
+def _int(record, field):
+    """
+    Returns:
+        int: The integer value of a record field
+
+    Raises:
+        ValueError: If the field is missing or not an integer; floats are
+                    accepted only when they hold a whole number
+    """
+    value = record.get(field)
+    if value is None:
+        raise ValueError(f"missing field: {field}")
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    # int() would truncate 2.9 to 2 and raise OverflowError on inf
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            pass
+    raise ValueError(f"{field} must be an integer, got {value!r}")
+
+
+def _bool(record, field):
+    """
+    Returns:
+        bool: The boolean value of a record field
+
+    Raises:
+        ValueError: If the field is missing or not a boolean
+    """
+    value = record.get(field)
+    if isinstance(value, bool):
+        return value
+    if value in (0, 1) and isinstance(value, int):
+        return bool(value)
+    if isinstance(value, str):
+        if value in TRUE_STRINGS:
+            return True
+        if value in FALSE_STRINGS:
+            return False
+    if value is None:
+        raise ValueError(f"missing field: {field}")
+    raise ValueError(f"{field} must be a boolean, got {value!r}")
+
+
+def apt_from_record(record):
+    """
+    Build an apartment from a record.
+
+    Args:
+        record (dict): Field name -> value; values may be strings, as read
+                       from CSV, or typed, as read from JSON
+
+    Returns:
+        Apt: An Apt, SpecialApt, GardenApt or RoofApt object
+
+    Raises:
+        ValueError: If the type is unknown or a needed field is invalid
+    """
+    apt_type = record.get('type')
+
+    if apt_type == 'Apt':
+        return Apt(_int(record, 'floor'), _int(record, 'area'))
+    if apt_type == 'SpecialApt':
+        return SpecialApt(_int(record, 'floor'), _int(record, 'area'), _bool(record, 'has_view'))
+    if apt_type == 'GardenApt':
+        return GardenApt(_int(record, 'area'), _int(record, 'garden_area'))
+    if apt_type == 'RoofApt':
+        return RoofApt(_int(record, 'floor'), _int(record, 'area'), _bool(record, 'has_pool'))
+
+    raise ValueError(f"unknown apartment type: {apt_type!r}")
+
+
+def apt_to_record(apt):
+    """
+    Convert an apartment to a record holding every field.
+
+    Apartments of unregistered subclasses are recorded as their nearest
+    registered ancestor.
+
+    Args:
+        apt (Apt): An Apt, SpecialApt, GardenApt or RoofApt object
+
+    Returns:
+        dict: The record; fields the type does not have are False or 0
+    """
+    code = apt.TYPE_CODE
+    return {
+        'type': APT_TYPES[code].__name__,
+        'floor': apt._floor,
+        'area': apt._area,
+        'has_view': bool(apt.SUPPORTS_VIEW and apt._has_view),
+        'has_pool': bool(apt.SUPPORTS_POOL and apt._has_pool),
+        'garden_area': apt._garden_area if code == GardenApt.TYPE_CODE else 0,
+    }
+
+
+def parse_json_line(line):
+    """
+    Build an apartment from one line of JSON Lines text.
+
+    Args:
+        line (str or bytes): A JSON object holding a record
+
+    Returns:
+        Apt: The apartment
+
+    Raises:
+        ValueError: If the line is not valid JSON or not a valid record
+    """
+    record = json.loads(line)
+    if not isinstance(record, dict):
+        raise ValueError("record must be a JSON object")
+    return apt_from_record(record)
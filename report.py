@@ -0,0 +1,154 @@
+"""
+Streaming apartment report for the apartment management system.
+
+This module defines the ApartmentReport class that computes the results of
+all five mmn15 utility functions in a single pass over any iterable of
+apartments, including generators that can only be consumed once.
+"""
+
+__author__ = "Bar-chaim Billy"
+
+from collections import Counter
+
+from apt import type_counts_by_name
+from mmn15 import valid_apt_predicate
+
+
+class ApartmentReport:
+    """
+    Accumulates the mmn15 statistics of a stream of apartments.
+
+    Each apartment is priced once. Only the results are kept in memory:
+    running totals, the type histogram, the top-priced apartment and the
+    list of valid apartments.
+
+    Attributes:
+        _count (int): Number of apartments seen
+        _sum_price (int): Sum of the prices of all apartments seen
+        _rooftop_count (int): Number of roof apartments with pools
+        _type_counts (Counter): Number of apartments seen of each type code
+        _top_apt (Apt): First apartment with the highest price, or None
+        _top_price (int): Price of _top_apt, or None
+        _valid_apts (list): Apartments with a view and a price over 1 million
+    """
+
+    def __init__(self, apts=()):
+        """
+        Initialize a new ApartmentReport.
+
+        Args:
+            apts (iterable): Apartments to add to the report right away
+        """
+        self._count = 0
+        self._sum_price = 0
+        self._rooftop_count = 0
+        self._type_counts = Counter()
+        self._top_apt = None
+        self._top_price = None
+        self._valid_apts = []
+
+        self.update(apts)
+
+
+    def add(self, apt):
+        """
+        Add a single apartment to the report.
+
+        Args:
+            apt (Apt): The apartment to add
+        """
+        self.update((apt,))
+
+
+    def update(self, apts):
+        """
+        Add every apartment of an iterable to the report in one pass.
+
+        Args:
+            apts (iterable): Apartment objects, consumed only once
+        """
+        count = self._count
+        sum_price = self._sum_price
+        rooftop_count = self._rooftop_count
+        type_counts = self._type_counts
+        top_apt = self._top_apt
+        top_price = self._top_price
+        valid_apts = self._valid_apts
+        is_valid = valid_apt_predicate().matches_priced
+
+        # the totals are written back even if the iterable raises partway,
+        # so they stay consistent with the type counts and valid apartments
+        try:
+            for apt in apts:
+                price = apt.get_price()
+
+                count += 1
+                sum_price += price
+                type_counts[apt.TYPE_CODE] += 1
+
+                if apt.SUPPORTS_POOL and apt.get_has_pool():
+                    rooftop_count += 1
+
+                # strictly greater keeps the first of several top apartments
+                if top_price is None or price > top_price:
+                    top_price = price
+                    top_apt = apt
+
+                if is_valid(apt, price):
+                    valid_apts.append(apt)
+        finally:
+            self._count = count
+            self._sum_price = sum_price
+            self._rooftop_count = rooftop_count
+            self._top_apt = top_apt
+            self._top_price = top_price
+
+
+    def __len__(self):
+        """
+        Returns:
+            int: The number of apartments added to the report
+        """
+        return self._count
+
+
+    def average_price(self):
+        """
+        Returns:
+            float: The average price, or 0 if no apartments were added
+        """
+        if not self._count:
+            return 0
+        return self._sum_price / self._count
+
+    def how_many_rooftop(self):
+        """
+        Returns:
+            int: Number of roof apartments that have pools
+        """
+        return self._rooftop_count
+
+    def how_many_apt_type(self):
+        """
+        Returns:
+            dict: Apartment type names as keys and counts as values
+        """
+        return type_counts_by_name(self._type_counts)
+
+    def top_price(self):
+        """
+        Returns:
+            Apt or None: The first apartment with the highest price,
+                         or None if no apartments were added
+        """
+        return self._top_apt
+
+    def only_valid_apts(self):
+        """
+        Returns:
+            list or None: Apartments with a view and a price over 1 million
+                          in the order they were added, or None if there are none
+        """
+        if not self._valid_apts:
+            return None
+        return list(self._valid_apts)
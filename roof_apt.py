@@ -10,9 +10,8 @@ pricing for both roof location and pool features.
 __author__ = "Bar-chaim Billy"
 
 from special_apt import SpecialApt
-
-ROOF_PRICE = 40000
-POOL_PRICE = 30000
+import pricing
+from pricing import price
 
 
 class RoofApt(SpecialApt):
@@ -29,6 +28,15 @@ class RoofApt(SpecialApt):
         _has_pool (bool): Whether the apartment has a pool
     """
 
+    TYPE_CODE = 3
+    SUPPORTS_POOL = True
+
+    __slots__ = ('_has_pool',)
+
+    _ARG_SLOTS = ('_floor', '_area', '_has_pool')
+    _FIXED_SLOTS = {'_has_view': True}
+    _STR_FIELDS = ('floor', 'area', 'has_view', 'has_pool')
+
     def __init__(self, floor,  area, has_pool):
         """
         Initialize a new RoofApt instance.
@@ -74,6 +82,9 @@ class RoofApt(SpecialApt):
                 self._has_view == other._has_view and # for clarity only
                 self._has_pool == other._has_pool)
 
+    # defining __eq__ resets __hash__, keep the one that agrees with it
+    __hash__ = SpecialApt.__hash__
+
 
     def __str__(self):
         """
@@ -85,6 +96,13 @@ class RoofApt(SpecialApt):
         return f"{super().__str__()}, has_pool: {self._has_pool}"
 
 
+    def __reduce__(self):
+        """
+        Pickle the roof apartment as its constructor arguments.
+        """
+        return type(self), (self._floor, self._area, self._has_pool)
+
+
     def get_price(self):
         """
         Calculate the price of the roof apartment.
@@ -94,10 +112,14 @@ class RoofApt(SpecialApt):
         - Roof apartment surcharge: ROOF_PRICE
         - Pool surcharge: POOL_PRICE (if has_pool is True)
 
+        The whole chain is computed in one call to pricing.price.
+
         Returns:
             int: The calculated price in currency units
         """
-        if self._has_pool:
-            return super().get_price() + ROOF_PRICE + POOL_PRICE
-        else:
-            return super().get_price() + ROOF_PRICE
+        return price(self._floor, self._area, self._has_view, True, self._has_pool)
+
+
+# the pricing constants of this module moved to pricing, reads and
+# assignments of them here are forwarded there
+pricing.forward_constants(__name__, 'ROOF_PRICE', 'POOL_PRICE')
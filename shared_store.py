@@ -0,0 +1,468 @@
+"""
+Cross-process shared-memory apartment store.
+
+This module lets one writer process publish apartment inventories into
+multiprocessing.shared_memory, and any number of worker processes attach
+to them read-only and run the apartment_table aggregates directly on the
+shared columns, without each worker holding its own copy.
+
+Every published inventory is a new version with a generation number. A
+version lives in its own segment named '<store>_<generation>', laid out
+like a binary inventory file (see inventory_file). A small control segment
+named '<store>' holds the generation of the current version; the writer
+fills a new version completely before storing its generation there, so
+readers never see a partly written inventory.
+
+Old versions are unlinked once newer ones are published. Readers that
+are still attached to an unlinked version keep a valid mapping until they
+move on to a newer one.
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import atexit
+import struct
+import threading
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+import apartment_table
+from apartment_table import ApartmentTable
+from inventory_file import HEADER, MAGIC, RECORD_DTYPE, records_to_table, table_to_records
+
+CONTROL = struct.Struct('<Q')  # generation of the current version
+
+# published versions kept besides the current one, for slow readers
+DEFAULT_KEEP = 1
+
+ATTACH_RETRIES = 8
+
+# attached segments whose arrays were still in use when they were closed
+_unclosed = []
+
+# set in the thread that is attaching, see _attach
+_attaching = threading.local()
+_tracker_lock = threading.Lock()
+_tracker_register = None  # the original resource_tracker.register, once wrapped
+
+
+def _version_name(name, generation):
+    """
+    Returns:
+        str: The segment name of a version of a store
+    """
+    return f"{name}_{generation}"
+
+
+def _register(name, rtype):
+    """
+    resource_tracker.register, skipped in a thread that is attaching.
+    """
+    if not getattr(_attaching, 'active', False):
+        _tracker_register(name, rtype)
+
+
+def _attach(name):
+    """
+    Attach to an existing shared memory segment without owning it.
+
+    Before Python 3.13 every attached segment is registered with the
+    resource tracker, which unlinks it when the attaching process exits.
+    Only the writer may unlink segments, and unregistering afterwards
+    would also drop the writer's registration when both share a tracker,
+    so registration is skipped while attaching. resource_tracker.register
+    is wrapped once to skip it in the attaching thread only; segments
+    created by other threads meanwhile are registered as usual.
+
+    Args:
+        name (str): Name of the segment
+
+    Returns:
+        SharedMemory: The attached segment
+
+    Raises:
+        FileNotFoundError: If no segment has this name
+    """
+    global _tracker_register
+
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:  # Python < 3.13 has no track argument
+        pass
+
+    with _tracker_lock:
+        if _tracker_register is None:
+            _tracker_register = resource_tracker.register
+            resource_tracker.register = _register
+
+    _attaching.active = True
+    try:
+        return shared_memory.SharedMemory(name)
+    finally:
+        _attaching.active = False
+
+
+def _close(segment):
+    """
+    Detach from a segment now, or once no array uses its memory anymore.
+
+    Segments that cannot be closed yet are kept referenced, so they are
+    not closed by the garbage collector while arrays still use them, and
+    closed by a later call of _close_pending.
+
+    Args:
+        segment (SharedMemory): An attached segment
+    """
+    _unclosed.append(segment)
+    _close_pending()
+
+
+def _close_pending():
+    """
+    Detach from the segments whose arrays were in use when they were closed
+    and are not anymore.
+    """
+    for pending in list(_unclosed):
+        try:
+            pending.close()
+        except BufferError:  # arrays still export the mapping
+            continue
+        _unclosed.remove(pending)
+
+
+atexit.register(_close_pending)
+
+
+
+class SharedStoreWriter:
+    """
+    Publishes apartment inventories to a shared-memory store.
+
+    There must be a single writer per store. Use as a context manager, or
+    call close() when done: closing unlinks every segment of the store.
+
+    Attributes:
+        _name (str): Name of the store
+        _control (SharedMemory): The control segment
+        _versions (list): (generation, segment) of the versions not yet
+                          unlinked, oldest first
+        _keep (int): Versions kept besides the current one
+    """
+
+    def __init__(self, name, keep=DEFAULT_KEEP):
+        """
+        Initialize a new SharedStoreWriter and create the store.
+
+        The store starts at generation 0 with an empty inventory.
+
+        Args:
+            name (str): Name of the store, unique on the machine
+            keep (int): Published versions to keep besides the current one
+
+        Raises:
+            FileExistsError: If a store with this name already exists
+        """
+        self._name = name
+        self._keep = keep
+        self._versions = []
+        self._control = shared_memory.SharedMemory(name, create=True, size=CONTROL.size)
+        self._publish_records(0, np.zeros(0, dtype=RECORD_DTYPE))
+
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+    def get_name(self):
+        """
+        Returns:
+            str: The name readers attach to
+        """
+        return self._name
+
+
+    def get_generation(self):
+        """
+        Returns:
+            int: The generation of the current version
+        """
+        return self._versions[-1][0]
+
+
+    def publish(self, apts):
+        """
+        Publish a new version of the inventory.
+
+        Args:
+            apts (iterable or ApartmentTable): The apartments of the new version
+
+        Returns:
+            int: The generation of the new version
+        """
+        table = apts if isinstance(apts, ApartmentTable) else ApartmentTable.from_apts(apts)
+        generation = self.get_generation() + 1
+        self._publish_records(generation, table_to_records(table))
+        return generation
+
+
+    def _publish_records(self, generation, records):
+        """
+        Write records to a new version segment and make it current.
+        """
+        segment = shared_memory.SharedMemory(_version_name(self._name, generation), create=True,
+                                             size=HEADER.size + records.nbytes)
+        HEADER.pack_into(segment.buf, 0, MAGIC, len(records))
+        segment.buf[HEADER.size:HEADER.size + records.nbytes] = records.tobytes()
+
+        # the version is complete before readers can find it
+        CONTROL.pack_into(self._control.buf, 0, generation)
+        self._versions.append((generation, segment))
+
+        while len(self._versions) > self._keep + 1:
+            _, old_segment = self._versions.pop(0)
+            old_segment.close()
+            old_segment.unlink()
+
+
+    def close(self):
+        """
+        Unlink every segment of the store.
+        """
+        if self._control is None:
+            return
+        for _, segment in self._versions:
+            segment.close()
+            segment.unlink()
+        self._versions = []
+        self._control.close()
+        self._control.unlink()
+        self._control = None
+
+
+
+class SharedSnapshot:
+    """
+    One version of a shared store, attached read-only.
+
+    The columns of get_table() are zero-copy, read-only views of the shared
+    segment. The snapshot stays valid until it is closed, even after the
+    writer publishes newer versions.
+
+    Attributes:
+        _segment (SharedMemory): The attached version segment
+        _generation (int): Generation of the version
+        _records (ndarray): Read-only RECORD_DTYPE records in the segment
+        _table (ApartmentTable): Columnar view of _records
+    """
+
+    def __init__(self, segment, generation):
+        """
+        Initialize a new SharedSnapshot over an attached version segment.
+
+        Args:
+            segment (SharedMemory): The version segment
+            generation (int): Generation of the version
+
+        Raises:
+            ValueError: If the segment does not hold an inventory
+        """
+        magic, count = HEADER.unpack_from(segment.buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{segment.name} is not an apartment store version")
+
+        self._segment = segment
+        self._generation = generation
+        # frombuffer holds an export of the mapping, so it cannot be unmapped
+        # while the records or views of them are alive
+        self._records = np.frombuffer(segment.buf, dtype=RECORD_DTYPE,
+                                      count=count, offset=HEADER.size)
+        self._records.flags.writeable = False
+        self._table = records_to_table(self._records)
+
+
+    def __len__(self):
+        """
+        Returns:
+            int: The number of apartments in the version
+        """
+        return len(self._records)
+
+
+    def get_generation(self):
+        """
+        Returns:
+            int: The generation of the version
+        """
+        return self._generation
+
+
+    def get_records(self):
+        """
+        Returns:
+            ndarray: The read-only records in the shared segment
+        """
+        return self._records
+
+
+    def get_table(self):
+        """
+        Returns:
+            ApartmentTable: A zero-copy, read-only columnar view of the version
+        """
+        return self._table
+
+
+    def close(self):
+        """
+        Detach from the version segment.
+
+        The mapping is released once the arrays obtained from the snapshot
+        are no longer used.
+        """
+        if self._segment is None:
+            return
+        self._table = None
+        self._records = None
+        _close(self._segment)
+        self._segment = None
+
+
+
+class SharedStoreReader:
+    """
+    Attaches read-only to a shared store and follows its current version.
+
+    The aggregate methods refresh to the current version first and then
+    run the apartment_table functions on the shared columns.
+
+    Attributes:
+        _name (str): Name of the store
+        _control (SharedMemory): The control segment
+        _snapshot (SharedSnapshot): The version attached last
+    """
+
+    def __init__(self, name):
+        """
+        Initialize a new SharedStoreReader and attach to the current version.
+
+        Args:
+            name (str): Name of the store
+
+        Raises:
+            FileNotFoundError: If the store does not exist
+        """
+        self._name = name
+        self._control = _attach(name)
+        self._snapshot = None
+        self.refresh()
+
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+    def current_generation(self):
+        """
+        Returns:
+            int: The generation of the version the writer published last
+        """
+        return CONTROL.unpack_from(self._control.buf, 0)[0]
+
+
+    def refresh(self):
+        """
+        Attach to the current version if it is newer than the attached one.
+
+        Returns:
+            SharedSnapshot: The current version
+
+        Raises:
+            FileNotFoundError: If the store was closed by its writer
+        """
+        _close_pending()
+        for _ in range(ATTACH_RETRIES):
+            generation = self.current_generation()
+            if self._snapshot is not None and self._snapshot.get_generation() == generation:
+                return self._snapshot
+            try:
+                segment = _attach(_version_name(self._name, generation))
+            except FileNotFoundError:
+                continue  # unlinked by newer publications meanwhile
+            if self._snapshot is not None:
+                self._snapshot.close()
+            self._snapshot = SharedSnapshot(segment, generation)
+            return self._snapshot
+
+        raise FileNotFoundError(f"cannot attach to a version of store {self._name!r}")
+
+
+    def snapshot(self):
+        """
+        Returns:
+            SharedSnapshot: The version attached last, without refreshing
+        """
+        return self._snapshot
+
+
+    def get_table(self):
+        """
+        Returns:
+            ApartmentTable: The current version as a read-only table
+        """
+        return self.refresh().get_table()
+
+
+    def average_price(self):
+        """
+        Returns:
+            float: The average price of the current version
+        """
+        return apartment_table.average_price(self.get_table())
+
+    def how_many_rooftop(self):
+        """
+        Returns:
+            int: Number of roof apartments with pools in the current version
+        """
+        return apartment_table.how_many_rooftop(self.get_table())
+
+    def how_many_apt_type(self):
+        """
+        Returns:
+            dict: Apartment type names as keys and counts as values
+        """
+        return apartment_table.how_many_apt_type(self.get_table())
+
+    def top_price(self):
+        """
+        Returns:
+            Apt or None: The first apartment with the highest price
+        """
+        return apartment_table.top_price(self.get_table())
+
+    def only_valid_apts(self):
+        """
+        Returns:
+            list or None: Apartments with a view and a price over 1 million
+        """
+        return apartment_table.only_valid_apts(self.get_table())
+
+
+    def close(self):
+        """
+        Detach from the store.
+        """
+        if self._control is None:
+            return
+        if self._snapshot is not None:
+            self._snapshot.close()
+            self._snapshot = None
+        self._control.close()
+        self._control = None
@@ -8,7 +8,8 @@ with an additional view feature that affects the apartment pricing.
 __author__ = "Bar-chaim Billy"
 
 from apt import Apt
-ADDITIONAL_VIEW_FEE_PER_FLOOR = 600
+import pricing
+from pricing import price
 
 
 class SpecialApt(Apt):
@@ -24,6 +25,14 @@ class SpecialApt(Apt):
         _has_view (bool): Whether the apartment has a view
     """
 
+    TYPE_CODE = 1
+    SUPPORTS_VIEW = True
+
+    __slots__ = ('_has_view',)
+
+    _ARG_SLOTS = ('_floor', '_area', '_has_view')
+    _STR_FIELDS = ('floor', 'area', 'has_view')
+
     def __init__(self, floor, area ,has_view):
         """
         Initialize a new SpecialApt instance.
@@ -73,6 +82,9 @@ class SpecialApt(Apt):
         # it's a subclass, let subclass handle the comparison
         return NotImplemented
 
+    # defining __eq__ resets __hash__, keep the one that agrees with it
+    __hash__ = Apt.__hash__
+
 
     def __str__(self):
         """
@@ -83,18 +95,29 @@ class SpecialApt(Apt):
         return f"{super().__str__()}, has_view: {self._has_view}"
 
 
+    def __reduce__(self):
+        """
+        Pickle the special apartment as its constructor arguments.
+        """
+        return type(self), (self._floor, self._area, self._has_view)
+
+
     def get_price(self):
         """
         Calculate the price of the special apartment.
 
         Price calculation includes the base apartment price plus view surcharge:
-        - Base price from parent class (area and floor costs)
+        - Base price as in Apt.get_price (area and floor costs)
         - View surcharge: floor * ADDITIONAL_VIEW_FEE_PER_FLOOR (if has_view)
 
+        The whole chain is computed in one call to pricing.price.
+
         Returns:
             int: The calculated price in currency units
         """
-        view_price = 0
-        if self._has_view:
-            view_price = self._floor * ADDITIONAL_VIEW_FEE_PER_FLOOR
-        return super().get_price() + view_price
+        return price(self._floor, self._area, self._has_view)
+
+
+# the pricing constants of this module moved to pricing, reads and
+# assignments of them here are forwarded there
+pricing.forward_constants(__name__, 'ADDITIONAL_VIEW_FEE_PER_FLOOR')
@@ -0,0 +1,65 @@
+"""
+Synthetic apartment inventories for tests and benchmarks.
+
+This module builds reproducible random lists of Apt, SpecialApt, GardenApt
+and RoofApt objects.
+"""
+
+__author__ = "Bar-chaim Billy"
+
+import random
+
+from apt import Apt
+from special_apt import SpecialApt
+from garden_apt import GardenApt
+from roof_apt import RoofApt
+
+# relative weights of Apt, SpecialApt, GardenApt and RoofApt
+UNIFORM_MIX = (1, 1, 1, 1)
+REALISTIC_MIX = (55, 30, 10, 5)
+
+
+def random_specs(count, seed=0, mix=UNIFORM_MIX):
+    """
+    Draw reproducible random constructor calls for all four apartment types.
+
+    Args:
+        count (int): Number of apartments to draw
+        seed (int): Seed of the random generator
+        mix (tuple): Relative weights of Apt, SpecialApt, GardenApt and RoofApt
+
+    Returns:
+        list: (class, constructor arguments) pairs
+    """
+    rng = random.Random(seed)
+    specs = []
+
+    for kind in rng.choices(range(4), weights=mix, k=count):
+        floor = rng.randint(0, 30)
+        area = rng.randint(30, 200)
+
+        if kind == 0:
+            specs.append((Apt, (floor, area)))
+        elif kind == 1:
+            specs.append((SpecialApt, (floor, area, rng.random() < 0.5)))
+        elif kind == 2:
+            specs.append((GardenApt, (area, rng.randint(0, 150))))
+        else:
+            specs.append((RoofApt, (floor, area, rng.random() < 0.5)))
+
+    return specs
+
+
+def random_apts(count, seed=0, mix=UNIFORM_MIX):
+    """
+    Build a reproducible random mix of all four apartment types.
+
+    Args:
+        count (int): Number of apartments to build
+        seed (int): Seed of the random generator
+        mix (tuple): Relative weights of Apt, SpecialApt, GardenApt and RoofApt
+
+    Returns:
+        list: The apartment objects
+    """
+    return [cls(*args) for cls, args in random_specs(count, seed, mix)]